@@ -0,0 +1,71 @@
+from sqlalchemy import select
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+import os
+
+from . import models
+
+# Longest range the per-day absence histogram covers in one request
+ABSENCE_HISTOGRAM_MAX_DAYS = int(os.getenv("ABSENCE_HISTOGRAM_MAX_DAYS", "366"))
+
+# Sick leaves in these statuses count as absences
+ABSENT_STATUSES = (models.RequestStatus.PENDING.value, models.RequestStatus.APPROVED.value)
+
+# A leave covers every calendar day from its start_date to its end_date, inclusive.
+# Returns the conditions selecting leaves that touch any day of [first_day, last_day].
+# The end_date bound comes first so the (end_date, start_date) index limits the
+# scan to leaves ending inside or after the window.
+def leave_overlap_conditions(first_day: date, last_day: date):
+    return (
+        models.SickLeave.end_date >= datetime.combine(first_day, time.min),
+        models.SickLeave.start_date < datetime.combine(last_day + timedelta(days=1), time.min),
+        models.SickLeave.status.in_(ABSENT_STATUSES),
+    )
+
+# (user_id, start_date, end_date) of the leaves overlapping the window, ordered
+# by user and start so absence_histogram can merge them in one pass
+def absence_intervals_query(first_day: date, last_day: date, department: str = None):
+    query = (
+        select(models.SickLeave.user_id, models.SickLeave.start_date, models.SickLeave.end_date)
+        .where(*leave_overlap_conditions(first_day, last_day))
+    )
+    if department is not None:
+        query = query.join(models.User, models.User.id == models.SickLeave.user_id).where(
+            models.User.department == department
+        )
+    return query.order_by(models.SickLeave.user_id, models.SickLeave.start_date)
+
+# Number of people absent on each day of [first_day, last_day].
+# Sweep line: every leave adds +1 where it starts and -1 the day after it ends,
+# and a running sum over the days gives the count. Overlapping leaves of one
+# person are merged first, so nobody is counted twice on the same day.
+def absence_histogram(intervals, first_day: date, last_day: date):
+    days = (last_day - first_day).days + 1
+    changes = [0] * (days + 1)
+
+    def mark(start: date, end: date):
+        changes[(start - first_day).days] += 1
+        changes[(end - first_day).days + 1] -= 1
+
+    for _, rows in groupby(intervals, key=lambda row: row[0]):
+        current = None
+        for _, start, end in rows:
+            start = max(start.date(), first_day)
+            end = min(end.date(), last_day)
+            if start > end:
+                continue
+            if current and start <= current[1] + timedelta(days=1):
+                current[1] = max(current[1], end)
+            else:
+                if current:
+                    mark(*current)
+                current = [start, end]
+        if current:
+            mark(*current)
+
+    histogram = []
+    absent = 0
+    for offset in range(days):
+        absent += changes[offset]
+        histogram.append((first_day + timedelta(days=offset), absent))
+    return histogram
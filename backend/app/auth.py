@@ -4,30 +4,98 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+import asyncio
+import hashlib
 import os
+import secrets
+import threading
+import time
+import uuid
+
+from . import models
+from .revocation import revocation_list, revoke
+from .cache import TTLCache
+from .database import get_async_db
+from .signing_keys import KeyRing, load_key_ring
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "a_secure_secret_key_should_be_set_in_production")
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Refresh tokens are opaque, single-use and stored only as hashes. Each use
+# returns a new pair; reusing one that was already spent revokes every token
+# descended from the same login (its "family"), since one of the copies is stolen.
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+# Tokens whose signature this process has checked are remembered until they
+# expire (at most TOKEN_CACHE_TTL_SECONDS), so repeat requests skip the
+# signature check. Keyed by the whole token: any change to it is a miss.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Resolved users are cached per process, keyed by token subject. Updates and
+# deletes invalidate the entry in this process; other workers catch up within the TTL.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+# bcrypt cost factor; stored hashes with a different cost are rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt runs on a bounded thread pool (it releases the GIL) so logins don't block
+# the event loop. Beyond HASHING_WORKERS running plus HASHING_MAX_QUEUE waiting,
+# new requests get a 503 instead of piling up behind a login storm.
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", str(os.cpu_count() or 1)))
+HASHING_MAX_QUEUE = int(os.getenv("HASHING_MAX_QUEUE", "64"))
+
 # Password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # OAuth2 scheme
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/token")
 
 # Token model
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 # TokenData model
 class TokenData(BaseModel):
     username: Optional[str] = None
     role: Optional[str] = None
 
+# Authenticated user as seen by the routers
+class CurrentUser(BaseModel):
+    id: int
+    username: str
+    email: Optional[str] = None
+    role: str
+    department: Optional[str] = None
+    is_active: bool
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# Keys that sign and verify access tokens, see signing_keys.py
+key_ring = load_key_ring(default_secret=SECRET_KEY)
+
+# Swap the signing keys; tokens verified with the old ones are checked again
+def use_key_ring(ring: KeyRing):
+    global key_ring
+    key_ring = ring
+    token_cache.clear()
+
+# Drop a user from the cache after it changes
+def invalidate_user(username: str):
+    user_cache.pop(username)
+
 # Functions for password hashing and verification
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -35,33 +103,182 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Bounded pool for the async hashing API
+class HashingPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.capacity = workers + max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent password operations, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+hashing_pool = HashingPool(HASHING_WORKERS, HASHING_MAX_QUEUE)
+
+async def get_password_hash_async(password):
+    return await hashing_pool.run(pwd_context.hash, password)
+
+# Returns (valid, new_hash); new_hash is set when the stored hash should be replaced
+async def verify_and_update_password(plain_password, hashed_password):
+    return await hashing_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 # Functions for JWT token creation and validation
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # Token id, so a single token can be revoked
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    key = key_ring.active
+    encoded_jwt = jwt.encode(to_encode, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid})
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+# Claims of a valid token; raises JWTError otherwise
+def decode_token(token: str) -> dict:
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    key = key_ring.get(jwt.get_unverified_header(token).get("kid"))
+    if key is None:
+        raise JWTError("Unknown signing key")
+    # Only the key's own algorithm, so a token can't pick a weaker one
+    claims = jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+    if "exp" in claims:
+        ttl = min(claims["exp"] - time.time(), TOKEN_CACHE_TTL_SECONDS)
+        if ttl > 0:
+            token_cache.set(token, claims, ttl=ttl)
+    return claims
+
+def _hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+# New refresh token in a family, added to the caller's transaction
+def issue_refresh_token(db, user_id: int, family_id: str) -> str:
+    token = secrets.token_urlsafe(32)
+    db.add(models.RefreshToken(
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=_hash_refresh_token(token),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+# Access and refresh token pair for a user; family_id is None on login
+async def create_tokens(db, user, family_id: Optional[str] = None) -> dict:
+    family_id = family_id or uuid.uuid4().hex
+    access_token = create_access_token(data={"sub": user.username, "role": user.role, "fam": family_id})
+    refresh_token = issue_refresh_token(db, user.id, family_id)
+    await db.commit()
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+# Revoke a login: its refresh tokens and every access token issued from them
+async def revoke_family(db, family_id: str):
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.family_id == family_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    # Access tokens of the family outlive its refresh tokens by at most one lifetime
+    await revoke(db, family_id, datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+
+# Revoke every login of a user, e.g. when it is deactivated
+async def revoke_user_tokens(db, user_id: int):
+    families = await db.scalars(
+        select(models.RefreshToken.family_id).distinct().where(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.revoked_at.is_(None),
+            models.RefreshToken.expires_at > datetime.utcnow(),
+        )
+    )
+    for family_id in families.all():
+        await revoke_family(db, family_id)
+
+# Spend a refresh token for a new pair; raises 401 if it is unknown, expired,
+# revoked or already spent
+async def rotate_refresh_token(db, token: str) -> dict:
+    refresh_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    now = datetime.utcnow()
+    db_token = await db.scalar(
+        select(models.RefreshToken).where(models.RefreshToken.token_hash == _hash_refresh_token(token))
+    )
+    if db_token is None or db_token.revoked_at is not None or db_token.expires_at <= now:
+        raise refresh_exception
+
+    # Only one request can spend a token, however many present it at once
+    spent = await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.id == db_token.id, models.RefreshToken.used_at.is_(None))
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if spent.rowcount == 0:
+        await revoke_family(db, db_token.family_id)
+        await db.commit()
+        raise refresh_exception
+
+    db_user = await db.get(models.User, db_token.user_id)
+    if db_user is None or not db_user.is_active:
+        await db.rollback()
+        raise refresh_exception
+    return await create_tokens(db, db_user, db_token.family_id)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username: str = payload.get("sub")
         role: str = payload.get("role", "employee")
         if username is None:
             raise credentials_exception
+        # In-process mirror of revoked_tokens, see revocation.py
+        if revocation_list.is_revoked(payload.get("jti"), payload.get("fam")):
+            raise credentials_exception
         token_data = TokenData(username=username, role=role)
     except JWTError:
         raise credentials_exception
-    
-    # Here we would typically query the database to get the user
-    # For now, we just return the token data
-    return token_data
+
+    current_user = user_cache.get(token_data.username)
+    if current_user is None:
+        db_user = await db.scalar(select(models.User).where(models.User.username == token_data.username))
+        if db_user is None or not db_user.is_active:
+            raise credentials_exception
+        # The role stored on the user wins over the one in the token
+        current_user = CurrentUser(
+            id=db_user.id,
+            username=db_user.username,
+            email=db_user.email,
+            role=db_user.role,
+            department=db_user.department,
+            is_active=db_user.is_active,
+        )
+        user_cache.set(token_data.username, current_user)
+    return current_user
 
 # Function to check if user has admin role
 async def get_current_admin(current_user = Depends(get_current_user)):
@@ -70,4 +287,13 @@ async def get_current_admin(current_user = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Function to check if user may see team-wide data
+async def get_current_manager(current_user = Depends(get_current_user)):
+    if current_user.role not in ("admin", "manager"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
@@ -0,0 +1,111 @@
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, select, update
+from datetime import datetime, timedelta, timezone
+import math
+import os
+
+from . import models
+
+# Longest booking accepted for new bookings and rescheduling
+ASSET_BOOKING_MAX_HOURS = int(os.getenv("ASSET_BOOKING_MAX_HOURS", "168"))
+ASSET_BOOKING_MAX_DURATION = timedelta(hours=ASSET_BOOKING_MAX_HOURS)
+# Widest window an availability query may cover
+ASSET_AVAILABILITY_MAX_DAYS = int(os.getenv("ASSET_AVAILABILITY_MAX_DAYS", "31"))
+
+# Bookings in these statuses hold their slot
+ACTIVE_BOOKING_STATUSES = (models.RequestStatus.PENDING.value, models.RequestStatus.APPROVED.value)
+
+# Times are stored as naive UTC
+def to_naive_utc(value: datetime):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def validate_interval(start: datetime, end: datetime, max_duration: timedelta = None):
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_time must be after start_time"
+        )
+    if max_duration is not None and end - start > max_duration:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bookings may last at most {ASSET_BOOKING_MAX_HOURS} hours"
+        )
+
+# Conditions selecting active bookings that overlap [start, end). Each asset
+# records the longest booking it has ever held, which bounds the overlap check
+# to a range scan on the (asset_id, start_time, end_time) index: a booking that
+# overlaps [start, end) must have started in [start - longest, end). The bound
+# is stored rather than taken from ASSET_BOOKING_MAX_HOURS, so bookings made
+# under a higher limit are still found after it is lowered.
+def overlap_conditions(start: datetime, end: datetime, longest: timedelta):
+    return (
+        models.AssetBooking.start_time >= start - longest,
+        models.AssetBooking.start_time < end,
+        models.AssetBooking.end_time > start,
+        models.AssetBooking.status.in_(ACTIVE_BOOKING_STATUSES),
+    )
+
+def booking_seconds(start: datetime, end: datetime) -> int:
+    return math.ceil((end - start).total_seconds())
+
+# Longest booking held by any of the assets matching conditions
+async def longest_booking(db, *conditions):
+    seconds = await db.scalar(select(func.max(models.Asset.longest_booking_seconds)).where(*conditions))
+    return timedelta(seconds=seconds or 0)
+
+# Serialize bookings of one asset. Writing to the asset row takes its row lock
+# on MySQL/MariaDB and the database write lock on SQLite, so a concurrent
+# booking of the same asset waits here until this transaction ends and then
+# sees its result in the overlap check. The write only raises the asset's
+# longest booking to the duration about to be stored; updated_at is kept, as
+# it dates the asset's catalog entry (and its cached ETag), not its bookings.
+async def lock_asset(db, asset_id: int, seconds: int = 0):
+    longest = models.Asset.longest_booking_seconds
+    result = await db.execute(
+        update(models.Asset)
+        .where(models.Asset.id == asset_id)
+        .values(
+            updated_at=models.Asset.updated_at,
+            longest_booking_seconds=case((func.coalesce(longest, 0) < seconds, seconds), else_=longest),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Asset not found"
+        )
+
+# First active booking of the asset overlapping [start, end), if any
+async def find_conflict(db, asset_id: int, start: datetime, end: datetime, exclude_id: int = None):
+    longest = await longest_booking(db, models.Asset.id == asset_id)
+    query = select(models.AssetBooking.id).where(
+        models.AssetBooking.asset_id == asset_id, *overlap_conditions(start, end, longest)
+    )
+    if exclude_id is not None:
+        query = query.where(models.AssetBooking.id != exclude_id)
+    result = await db.execute(query.limit(1))
+    return result.scalar_one_or_none()
+
+def conflict_error(booking_id: int):
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Asset is already booked in this period (booking {booking_id})"
+    )
+
+# Gaps of at least min_duration between sorted, possibly overlapping intervals
+# inside [window_start, window_end)
+def free_slots(window_start, window_end, intervals, min_duration=timedelta(0)):
+    slots = []
+    cursor = window_start
+    for start, end in intervals:
+        if start > cursor and start - cursor >= min_duration:
+            slots.append((cursor, min(start, window_end)))
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+    if cursor < window_end and window_end - cursor >= min_duration:
+        slots.append((cursor, window_end))
+    return slots
@@ -0,0 +1,51 @@
+from datetime import datetime
+import csv
+import io
+import json
+
+# Rows are fetched from the database in batches of this size and written out
+# batch by batch, so memory stays flat however many rows are exported
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def format_csv(columns, rows, include_header):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(columns)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+def format_ndjson(columns, rows, include_header):
+    return "".join(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
+
+FORMATTERS = {
+    "csv": format_csv,
+    "ndjson": format_ndjson,
+}
+
+# Stream a column select() from an AsyncSession as CSV or NDJSON text chunks.
+# Selecting columns instead of ORM entities keeps rows out of the identity map,
+# and yield_per makes the driver use a server-side cursor where it has one.
+async def stream_export(db, stmt, export_format: str):
+    formatter = FORMATTERS[export_format]
+    columns = [column.name for column in stmt.selected_columns]
+    result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    include_header = True
+    async for rows in result.partitions():
+        yield formatter(columns, rows, include_header)
+        include_header = False
+    # An empty CSV export still gets its header row
+    if include_header and export_format == "csv":
+        yield formatter(columns, [], True)
@@ -0,0 +1,206 @@
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import uuid
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Durable job queue in the application database. Jobs are enqueued in the
+# caller's transaction, so they exist exactly when the change that caused
+# them was committed, and are run by worker processes (python -m app.worker).
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "8"))
+# Retry n waits JOB_BACKOFF_SECONDS * 2 ** (n - 1), capped, with jitter
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+# A running job whose worker has been silent this long is handed to another worker
+JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "300"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+QUEUED = "queued"
+RUNNING = "running"
+
+# kind -> async handler(payload)
+HANDLERS = {}
+
+# Raised by handlers for failures that retrying can't fix; the job is dead-lettered at once
+class PermanentJobError(Exception):
+    pass
+
+def job_handler(kind: str):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+async def enqueue(db, kind: str, payload: dict, delay: float = 0, max_attempts: int = None):
+    job = models.Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    return job
+
+# Add items to the queued job for (kind, key), or queue a new one due after
+# delay. Everything enqueued for a key before a worker picks the job up is
+# handled in one run, as payload["items"].
+async def enqueue_coalesced(db, kind: str, key: str, items: list, delay: float = 0, max_attempts: int = None):
+    pending_key = f"{kind}:{key}"
+    # Lock the pending job first so concurrent appends can't overwrite each other
+    locked = await db.execute(
+        update(models.Job)
+        .where(models.Job.pending_key == pending_key)
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if locked.rowcount:
+        job_id, payload = (await db.execute(
+            select(models.Job.id, models.Job.payload).where(models.Job.pending_key == pending_key)
+        )).one()
+        payload = json.loads(payload)
+        payload["items"].extend(items)
+        await db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id)
+            .values(payload=json.dumps(payload))
+            .execution_options(synchronize_session=False)
+        )
+        return
+
+    try:
+        async with db.begin_nested():
+            job = await enqueue(db, kind, {"key": key, "items": list(items)}, delay, max_attempts)
+            job.pending_key = pending_key
+    except IntegrityError:
+        # Another transaction queued a job for this key in the meantime; join it
+        await enqueue_coalesced(db, kind, key, items, delay, max_attempts)
+
+def _due(now: datetime):
+    stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+    return or_(
+        and_(models.Job.status == QUEUED, models.Job.run_at <= now),
+        # Left running by a worker that died
+        and_(models.Job.status == RUNNING, models.Job.locked_at < stale),
+    )
+
+# Claim up to limit due jobs for this worker and commit the claim. SKIP LOCKED
+# (MySQL 8, PostgreSQL) lets workers pick disjoint batches without waiting on
+# each other; on SQLite, which ignores it, the conditional UPDATE settles races
+# and only the rows it changed are returned.
+async def claim_jobs(db, worker_id: str, limit: int = JOB_BATCH_SIZE):
+    now = datetime.utcnow()
+    candidates = (await db.execute(
+        select(models.Job.id)
+        .where(_due(now))
+        .order_by(models.Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+    if not candidates:
+        await db.commit()
+        return []
+
+    token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+    await db.execute(
+        update(models.Job)
+        .where(models.Job.id.in_(candidates), _due(now))
+        # Later enqueues for the same key start a new job
+        .values(status=RUNNING, locked_by=token, locked_at=now, pending_key=None, attempts=models.Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = (await db.execute(
+        select(models.Job).where(models.Job.locked_by == token).order_by(models.Job.run_at)
+    )).scalars().all()
+    await db.commit()
+    return jobs
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), JOB_BACKOFF_MAX_SECONDS)
+    # Jitter spreads out retries of jobs that failed together
+    return delay * random.uniform(0.5, 1.0)
+
+async def _finish(db, job):
+    # Scoped to our claim, in case the lock timed out and another worker took the job
+    await db.execute(delete(models.Job).where(models.Job.id == job.id, models.Job.locked_by == job.locked_by))
+
+async def _fail(db, job, exc: Exception):
+    error = f"{type(exc).__name__}: {exc}"
+    if isinstance(exc, PermanentJobError) or job.attempts >= job.max_attempts:
+        logger.error("Job %s (%s) failed permanently after %s attempts: %s", job.id, job.kind, job.attempts, error)
+        db.add(models.DeadJob(
+            job_id=job.id, kind=job.kind, payload=job.payload, attempts=job.attempts,
+            last_error=error, created_at=job.created_at,
+        ))
+        await _finish(db, job)
+        return
+    delay = backoff_seconds(job.attempts)
+    logger.warning("Job %s (%s) failed, retry %s in %.0f s: %s", job.id, job.kind, job.attempts, delay, error)
+    await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id, models.Job.locked_by == job.locked_by)
+        .values(
+            status=QUEUED, locked_by=None, locked_at=None, last_error=error,
+            run_at=datetime.utcnow() + timedelta(seconds=delay),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+# Run one claimed job and record the outcome in its own session
+async def run_job(session_factory, job):
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise PermanentJobError(f"No handler for job kind {job.kind!r}")
+        await handler(json.loads(job.payload))
+    except Exception as exc:
+        async with session_factory() as db:
+            await _fail(db, job, exc)
+            await db.commit()
+        return False
+    async with session_factory() as db:
+        await _finish(db, job)
+        await db.commit()
+    return True
+
+class Worker:
+    def __init__(self, session_factory, worker_id: str = None, batch_size: int = JOB_BATCH_SIZE,
+                 poll_seconds: float = JOB_POLL_SECONDS):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+
+    # Claim one batch and run its jobs concurrently; returns how many were claimed
+    async def run_once(self) -> int:
+        async with self.session_factory() as db:
+            jobs = await claim_jobs(db, self.worker_id, self.batch_size)
+        await asyncio.gather(*(run_job(self.session_factory, job) for job in jobs))
+        return len(jobs)
+
+    # Work until stop is set; a claimed batch is always finished first
+    async def run(self, stop: asyncio.Event):
+        logger.info("Job worker %s started", self.worker_id)
+        while not stop.is_set():
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Job worker %s could not claim jobs", self.worker_id)
+                claimed = 0
+            if not claimed:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info("Job worker %s stopped", self.worker_id)
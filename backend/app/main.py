@@ -1,13 +1,18 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, configure_mappers
+from contextlib import asynccontextmanager
+import asyncio
+import inspect
 import logging
 import os
+import time
 
 # Import routers and database components
-# These will be implemented in separate files
-# from .routers import users, expenses, sick_leave, education, assets, maintenance, travel
-from .database import engine, Base, get_db
+from .routers import users, expenses, assets, sick_leave, education, maintenance, travel, search
+from .database import engine, async_engine, AsyncSessionLocal, Base, get_db, pool_status, warm_pool
+from . import auth, metrics, revocation
+from .pagination import NEXT_CURSOR_HEADER
 # from .auth import oauth2_scheme, get_current_user
 
 # Set up logging
@@ -21,11 +26,53 @@ logger = logging.getLogger(__name__)
 # Commented out as we'll use init_db.py for initial setup
 # Base.metadata.create_all(bind=engine)
 
+# Load revoked tokens into the in-process list
+async def load_revocations():
+    async with AsyncSessionLocal() as db:
+        await revocation.revocation_list.sync(db)
+
+# Work done before serving, so the first requests don't pay for it. Each
+# step is timed into app.state.startup_timings (see benchmarks/startup_report.py).
+async def initialize(app: FastAPI):
+    timings = {}
+    for name, step in (
+        ("mappers", configure_mappers),
+        ("warm_pool", lambda: warm_pool(async_engine)),
+        ("revocations", load_revocations),
+    ):
+        started = time.perf_counter()
+        result = step()
+        if inspect.isawaitable(result):
+            await result
+        timings[name] = time.perf_counter() - started
+    app.state.startup_timings = timings
+    logger.info("Startup: %s", ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()))
+
+# Initialize, then keep revoked tokens in sync with other workers and, when
+# several share a metrics directory, write this worker's metrics there.
+# Runs in every worker process.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    await initialize(app)
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(revocation.run_sync(AsyncSessionLocal, stop))]
+    if metrics.METRICS_MULTIPROC_DIR:
+        tasks.append(asyncio.create_task(metrics.run_snapshots(metrics.METRICS_MULTIPROC_DIR, stop)))
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        stop.set()
+        await asyncio.gather(*tasks)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Internal Management Platform",
     description="A comprehensive platform for HR, Expense, Asset, Maintenance, Education/Social, and Travel Management",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -35,13 +82,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Per-route latency, response size and SQL metrics, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+metrics.registry.add_collector(metrics.pool_collector({"sync": engine, "async": async_engine}))
+
 # Health check endpoint
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+# Readiness probe for load balancers and orchestrators: unlike /health it
+# fails until startup has finished and again while shutting down
+@app.get("/health/ready")
+def readiness_check(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Not ready"
+        )
+    return {"status": "ready"}
+
+# Connection pool statistics for sizing pools per worker
+@app.get("/health/pool")
+def pool_health():
+    return {"sync": pool_status(engine), "async": pool_status(async_engine)}
+
+# Public keys for services that verify our access tokens themselves (RS256/ES256 only)
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def read_jwks(response: Response):
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return auth.key_ring.jwks()
+
+# Prometheus scrape endpoint; totals of all workers when they share METRICS_MULTIPROC_DIR
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(metrics.registry.render(metrics.METRICS_MULTIPROC_DIR), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
 # Setup endpoint - creates admin user if no users exist
 @app.get("/setup")
 def setup():
@@ -50,14 +131,16 @@ def setup():
     return {"message": "Setup endpoint. Will be implemented to create admin user on first run."}
 
 # Include routers
-# app.include_router(users.router, prefix="/api/users", tags=["users"])
-# app.include_router(expenses.router, prefix="/api/expenses", tags=["expenses"])
-# app.include_router(sick_leave.router, prefix="/api/sick-leave", tags=["sick-leave"])
-# app.include_router(education.router, prefix="/api/education", tags=["education"])
-# app.include_router(assets.router, prefix="/api/assets", tags=["assets"])
-# app.include_router(maintenance.router, prefix="/api/maintenance", tags=["maintenance"])
-# app.include_router(travel.router, prefix="/api/travel", tags=["travel"])
+app.include_router(users.router, prefix="/api/users", tags=["users"])
+app.include_router(expenses.router, prefix="/api/expenses", tags=["expenses"])
+app.include_router(sick_leave.router, prefix="/api/sick-leave", tags=["sick-leave"])
+app.include_router(education.router, prefix="/api/education", tags=["education"])
+app.include_router(assets.router, prefix="/api/assets", tags=["assets"])
+app.include_router(maintenance.router, prefix="/api/maintenance", tags=["maintenance"])
+app.include_router(travel.router, prefix="/api/travel", tags=["travel"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
 
+# Development server; production runs gunicorn with gunicorn.conf.py
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,368 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.routing import Mount
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Request and SQL instrumentation exposed in Prometheus text format at /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("1", "true", "yes")
+# Statements slower than this are logged with the route that issued them
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Each worker process keeps its own registry. With several workers, set a
+# directory shared by them (gunicorn.conf.py does): every worker writes a
+# snapshot there every METRICS_FLUSH_SECONDS and /metrics adds them all up.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# Worker processes serving the app; gunicorn.conf.py exports the count it starts
+WORKERS = int(os.getenv("WEB_CONCURRENCY") or "1")
+if WORKERS > 1 and METRICS_MULTIPROC_DIR is None:
+    logger.warning("METRICS_MULTIPROC_DIR is not set: /metrics only reports the worker that serves the scrape")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    # JSON-safe copy of the values, keyed by the labels as a JSON list
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(list(labels)): value for labels, value in self._values.items()}
+
+    def merge(self, snapshot):
+        for key, value in snapshot.items():
+            self.inc(tuple(json.loads(key)), value)
+
+    def empty(self):
+        return Counter(self.name, self.documentation, self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket (not cumulative), sum, count]
+        self._values = {}
+
+    def observe(self, labels=(), value=0.0):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, labels=()):
+        with self._lock:
+            entry = self._values.get(labels)
+            return entry[2] if entry else 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                json.dumps(list(labels)): [list(entry[0]), entry[1], entry[2]]
+                for labels, entry in self._values.items()
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, (bucket_counts, total, count) in snapshot.items():
+                labels = tuple(json.loads(key))
+                entry = self._values.get(labels)
+                if entry is None:
+                    entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+                entry[0] = [a + b for a, b in zip(entry[0], bucket_counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def empty(self):
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, (list(entry[0]), entry[1], entry[2])) for labels, entry in self._values.items())
+        for labels, (bucket_counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                label_text = _format_labels(self.labelnames, labels, [("le", _format_number(bound))])
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    # Callables returning (name, documentation, kind, [(labels dict, value)]) at scrape time
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def collect(self):
+        return [sample for collector in self.collectors for sample in collector()]
+
+    # This worker's values, as written to the shared directory
+    def snapshot(self) -> dict:
+        return {
+            "metrics": {metric.name: metric.snapshot() for metric in self.metrics},
+            "collected": [
+                [name, documentation, kind, [[labels, value] for labels, value in samples]]
+                for name, documentation, kind, samples in self.collect()
+            ],
+        }
+
+    def write_snapshot(self, directory: str):
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        with open(path + ".part", "w") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(path + ".part", path)
+
+    # Exposition of this worker alone, or of every worker that wrote to
+    # directory. Counters and histograms are summed, so the counts of workers
+    # that have exited are kept; collector gauges are reported per worker.
+    def render(self, directory: str = None) -> str:
+        if directory is None:
+            return _render(self.metrics, self.collect())
+        self.write_snapshot(directory)
+        snapshots = {}
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            try:
+                with open(path) as handle:
+                    snapshots[os.path.basename(path)[:-len(".json")]] = json.load(handle)
+            except (OSError, ValueError):
+                continue
+        merged = []
+        for metric in self.metrics:
+            total = metric.empty()
+            for snapshot in snapshots.values():
+                total.merge(snapshot["metrics"].get(metric.name, {}))
+            merged.append(total)
+        collected = {}
+        for worker, snapshot in snapshots.items():
+            for name, documentation, kind, samples in snapshot.get("collected", []):
+                entry = collected.setdefault(name, (documentation, kind, []))
+                entry[2].extend(({**labels, "worker": worker}, value) for labels, value in samples)
+        return _render(merged, [(name, *entry) for name, entry in collected.items()])
+
+def _render(metrics, collected) -> str:
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    for name, documentation, kind, samples in collected:
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+# Write this worker's snapshot every interval until stop is set, and once more on the way out
+async def run_snapshots(directory: str, stop: asyncio.Event, interval: float = METRICS_FLUSH_SECONDS):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await asyncio.to_thread(registry.write_snapshot, directory)
+        except OSError:
+            logger.exception("Writing the metrics snapshot to %s failed", directory)
+
+# Called by the server when a worker exits: its gauges no longer describe anything
+# running, but its counters stay in the totals
+def mark_worker_dead(directory: str, pid: int):
+    path = os.path.join(directory, f"{pid}.json")
+    try:
+        with open(path) as handle:
+            snapshot = json.load(handle)
+    except (OSError, ValueError):
+        return
+    snapshot["collected"] = []
+    with open(path + ".part", "w") as handle:
+        json.dump(snapshot, handle)
+    os.replace(path + ".part", path)
+
+registry = Registry()
+
+REQUEST_LABELS = ("method", "route", "status")
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request, including streaming the body.",
+    REQUEST_LABELS, LATENCY_BUCKETS,
+))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Size of the response body.", REQUEST_LABELS, SIZE_BUCKETS,
+))
+request_sql_statements = registry.register(Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", REQUEST_LABELS, SQL_COUNT_BUCKETS,
+))
+request_sql_duration = registry.register(Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL statements per request.", REQUEST_LABELS, LATENCY_BUCKETS,
+))
+sql_statements = registry.register(Counter(
+    "sql_statements_total", "SQL statements executed, per route (\"none\" outside requests).", ("route",),
+))
+slow_queries = registry.register(Counter(
+    "sql_slow_statements_total", "SQL statements slower than SLOW_QUERY_MS, per route.", ("route",),
+))
+
+# Route template of the request, e.g. /api/expenses/{expense_id}, so that
+# labels stay few. FastAPI releases differ in whether routes of an included
+# router report the prefix; when it is missing it is taken from the request
+# path, which has as many segments as the full template.
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    if isinstance(route, Mount):
+        return template + "/{path}"
+    segments = scope["path"].split("/")
+    depth = template.count("/")
+    if len(segments) > depth + 1:
+        template = "/".join(segments[:len(segments) - depth]) + template
+    return template
+
+# SQL totals of the request being served. The middleware sets a fresh object per
+# request; sync endpoints in the threadpool and the async engine's greenlets
+# run in a copy of the request's context, so they update the same object.
+class RequestStats:
+    def __init__(self, scope):
+        self.scope = scope
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+
+    # The router records the matched route in the scope before the endpoint runs
+    @property
+    def route(self):
+        return _route_label(self.scope)
+
+_request_stats: ContextVar = ContextVar("request_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _request_stats.get()
+    route = stats.route if stats is not None else "none"
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+    sql_statements.inc((route,))
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries.inc((route,))
+        logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, route, " ".join(statement.split())[:2000])
+
+# Count and time every statement of a (sync) engine; pass async_engine.sync_engine for async engines
+def instrument_engine(engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# Pool gauges read from database.pool_status when /metrics is scraped
+def pool_collector(engines: dict):
+    from .database import pool_status
+
+    def collect():
+        gauges = {}
+        for engine_name, engine in engines.items():
+            for key, value in pool_status(engine).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges.setdefault(key, []).append(({"engine": engine_name}, value))
+        for key, samples in sorted(gauges.items()):
+            kind = "counter" if key in ("checkouts", "timeouts", "wait_seconds_total") else "gauge"
+            yield f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}.", kind, samples
+    return collect
+
+# Pure ASGI middleware, so streamed responses are timed until their last chunk
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            labels = (scope["method"], stats.route, str(status_code))
+            request_duration.observe(labels, time.perf_counter() - started)
+            response_size.observe(labels, body_size)
+            request_sql_statements.observe(labels, stats.sql_count)
+            request_sql_duration.observe(labels, stats.sql_seconds)
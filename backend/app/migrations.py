@@ -0,0 +1,86 @@
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+import os
+
+from .database import Base, engine
+from . import models  # noqa: F401 - registers every table on Base.metadata
+from .search import is_search_object
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Revision matching the schema that Base.metadata.create_all used to build
+BASELINE_REVISION = "0001"
+
+# Alembic config for running migrations in-process on an open connection
+def alembic_config(connection=None):
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["target_metadata"] = Base.metadata
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+# Table, column and index names of a database, without Alembic's version
+# table and the full-text search objects. Names rather than types are compared,
+# so the check does not depend on how each database reports its types.
+def _database_names(connection):
+    inspector = inspect(connection)
+    names = set()
+    for table in inspector.get_table_names():
+        if table == "alembic_version" or is_search_object(table):
+            continue
+        names.add((table,))
+        names.update((table, column["name"]) for column in inspector.get_columns(table))
+        names.update(
+            (table, "index", index["name"]) for index in inspector.get_indexes(table)
+            if not is_search_object(index["name"])
+        )
+    return names
+
+# The same names for the current models
+def _model_names():
+    names = set()
+    for table in Base.metadata.sorted_tables:
+        names.add((table.name,))
+        names.update((table.name, column.name) for column in table.columns)
+        names.update((table.name, "index", index.name) for index in table.indexes)
+    return names
+
+# The same names for the baseline revision, built in a scratch SQLite database
+def _baseline_names():
+    scratch = create_engine("sqlite://")
+    try:
+        with scratch.begin() as connection:
+            command.upgrade(alembic_config(connection), BASELINE_REVISION)
+            return _database_names(connection)
+    finally:
+        scratch.dispose()
+
+# Revision of a database that has tables but no version row: one built by
+# create_all from the current models is at head, one created before migrations
+# existed is at the baseline. Anything else is left for the operator to stamp.
+def unversioned_revision(connection):
+    found = _database_names(connection)
+    head = _model_names()
+    if head <= found:
+        return "head"
+    baseline = _baseline_names()
+    if baseline <= found and not (head - baseline) & found:
+        return BASELINE_REVISION
+    raise RuntimeError(
+        "The database has tables but no alembic_version, and its schema matches neither the baseline "
+        f"revision {BASELINE_REVISION} nor the current models. Find the revision it was built at and "
+        "record it with `alembic stamp <revision>` (run from the backend directory), then upgrade again."
+    )
+
+# Bring the database up to the latest revision
+def upgrade_database(bind=None, revision="head"):
+    bind = bind if bind is not None else engine
+    with bind.begin() as connection:
+        tables = inspect(connection).get_table_names()
+        config = alembic_config(connection)
+        if tables and "alembic_version" not in tables:
+            command.stamp(config, unversioned_revision(connection))
+        command.upgrade(config, revision)
@@ -1,5 +1,5 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Enum, Index
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 import enum
 
@@ -17,9 +17,33 @@ class RequestStatus(str, enum.Enum):
     REJECTED = "rejected"
     CANCELLED = "cancelled"
 
+class RegistrationStatus(str, enum.Enum):
+    REGISTERED = "registered"
+    WAITLISTED = "waitlisted"
+    CANCELLED = "cancelled"
+
+class IssuePriority(str, enum.Enum):
+    CRITICAL = "critical"
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+
+class IssueStatus(str, enum.Enum):
+    OPEN = "open"
+    IN_PROGRESS = "in_progress"
+    RESOLVED = "resolved"
+    CLOSED = "closed"
+
+# Sort key of each priority, most urgent first
+PRIORITY_RANKS = {priority.value: rank for rank, priority in enumerate(IssuePriority)}
+
 # Models
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination order, see pagination.py
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
@@ -28,6 +52,7 @@ class User(Base):
     first_name = Column(String)
     last_name = Column(String)
     role = Column(String, default=UserRole.EMPLOYEE)
+    department = Column(String(100), nullable=True, index=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -35,11 +60,18 @@ class User(Base):
     # Relationships
     expenses = relationship("Expense", back_populates="user")
     sick_leaves = relationship("SickLeave", back_populates="user")
-    maintenance_reports = relationship("MaintenanceIssue", back_populates="reporter")
+    maintenance_reports = relationship("MaintenanceIssue", back_populates="reporter", foreign_keys="MaintenanceIssue.reporter_id")
     travel_requests = relationship("TravelRequest", back_populates="user")
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Keyset pagination order, see pagination.py
+        Index("ix_expenses_created_at_id", "created_at", "id"),
+        # /api/expenses/me?status= and the admin status filter, both paged by (created_at, id)
+        Index("ix_expenses_user_status_created_at", "user_id", "status", "created_at", "id"),
+        Index("ix_expenses_status_created_at", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -54,8 +86,44 @@ class Expense(Base):
     # Relationships
     user = relationship("User", back_populates="expenses")
 
+# Per-user, per-status expense count and total, kept in step with the expenses
+# table in the same transaction (see summaries.py)
+class ExpenseSummary(Base):
+    __tablename__ = "expense_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+# Uploaded receipt file. Identical uploads share one row, found by content hash.
+class Receipt(Base):
+    __tablename__ = "receipts"
+    __table_args__ = (
+        # Uploads are deduplicated per user, by content hash
+        Index("ix_receipts_uploaded_by_sha256", "uploaded_by", "sha256", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), index=True)
+    storage_key = Column(String(255))
+    filename = Column(String(255))
+    content_type = Column(String(100), nullable=True)
+    size = Column(Integer)
+    status = Column(String(32), default="processing")  # processing, ready, rejected
+    rejection_reason = Column(String(255), nullable=True)
+    thumbnail_key = Column(String(255), nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class SickLeave(Base):
     __tablename__ = "sick_leaves"
+    __table_args__ = (
+        Index("ix_sick_leaves_user_start_date", "user_id", "start_date"),
+        # Calendar queries: leaves ending on or after the window start, mostly recent ones
+        Index("ix_sick_leaves_end_start", "end_date", "start_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -80,6 +148,8 @@ class EducationActivity(Base):
     end_date = Column(DateTime)
     location = Column(String)
     capacity = Column(Integer, nullable=True)
+    # Free seats, kept in step with registrations; NULL when capacity is unlimited
+    seats_remaining = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -88,11 +158,16 @@ class EducationActivity(Base):
 
 class ActivityRegistration(Base):
     __tablename__ = "activity_registrations"
+    __table_args__ = (
+        Index("ix_activity_registrations_activity_user", "activity_id", "user_id", unique=True),
+        # Waitlist order within an activity
+        Index("ix_activity_registrations_activity_status_id", "activity_id", "status", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     activity_id = Column(Integer, ForeignKey("education_activities.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
-    status = Column(String, default=RequestStatus.PENDING)
+    status = Column(String, default=RegistrationStatus.REGISTERED)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -108,6 +183,8 @@ class Asset(Base):
     category = Column(String)
     location = Column(String)
     is_available = Column(Boolean, default=True)
+    # Longest booking this asset has held, bounding overlap checks (see bookings.py)
+    longest_booking_seconds = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -116,6 +193,11 @@ class Asset(Base):
 
 class AssetBooking(Base):
     __tablename__ = "asset_bookings"
+    __table_args__ = (
+        # Overlap checks look up one asset's bookings by time range
+        Index("ix_asset_bookings_asset_time", "asset_id", "start_time", "end_time"),
+        Index("ix_asset_bookings_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("assets.id"))
@@ -133,6 +215,10 @@ class AssetBooking(Base):
 
 class MaintenanceIssue(Base):
     __tablename__ = "maintenance_issues"
+    __table_args__ = (
+        # Triage queue order: open issues, most urgent then oldest first
+        Index("ix_maintenance_issues_status_rank_created", "status", "priority_rank", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reporter_id = Column(Integer, ForeignKey("users.id"))
@@ -140,16 +226,28 @@ class MaintenanceIssue(Base):
     description = Column(Text)
     location = Column(String)
     priority = Column(String)
+    # Set from priority, see PRIORITY_RANKS
+    priority_rank = Column(Integer, nullable=False, default=PRIORITY_RANKS[IssuePriority.MEDIUM.value])
     status = Column(String, default="open")
+    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
     image_url = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    reporter = relationship("User", back_populates="maintenance_reports")
+    reporter = relationship("User", back_populates="maintenance_reports", foreign_keys=[reporter_id])
+
+    @validates("priority")
+    def _set_priority_rank(self, key, priority):
+        self.priority_rank = PRIORITY_RANKS[IssuePriority(priority).value]
+        return IssuePriority(priority).value
 
 class TravelRequest(Base):
     __tablename__ = "travel_requests"
+    __table_args__ = (
+        Index("ix_travel_requests_user_status_created_at", "user_id", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -166,8 +264,16 @@ class TravelRequest(Base):
     user = relationship("User", back_populates="travel_requests")
     bookings = relationship("TravelBooking", back_populates="travel_request")
 
+    # Sum of the booking costs; load bookings eagerly (selectinload) before reading it
+    @property
+    def actual_cost(self):
+        return sum(booking.cost or 0.0 for booking in self.bookings)
+
 class TravelBooking(Base):
     __tablename__ = "travel_bookings"
+    __table_args__ = (
+        Index("ix_travel_bookings_travel_request_id", "travel_request_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     travel_request_id = Column(Integer, ForeignKey("travel_requests.id"))
@@ -180,4 +286,65 @@ class TravelBooking(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    travel_request = relationship("TravelRequest", back_populates="bookings")
\ No newline at end of file
+    travel_request = relationship("TravelRequest", back_populates="bookings")
+
+# Durable background jobs, see jobs.py
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers look for due jobs in run_at order
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50))
+    payload = Column(Text)  # JSON
+    # Set while queued for jobs that later enqueues merge into; unique, so at most one per key
+    pending_key = Column(String(255), nullable=True, unique=True)
+    status = Column(String(16), default="queued")  # queued, running
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer)
+    run_at = Column(DateTime, default=datetime.utcnow)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Jobs that failed max_attempts times, kept for inspection and replay
+class DeadJob(Base):
+    __tablename__ = "dead_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer)
+    kind = Column(String(50))
+    payload = Column(Text)
+    attempts = Column(Integer)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime)
+    failed_at = Column(DateTime, default=datetime.utcnow)
+
+# Issued refresh tokens, stored by hash and rotated on every use (see auth.py)
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Every token rotated from one login shares its family
+    family_id = Column(String(32), index=True)
+    # SHA-256 of the token; the token itself is never stored
+    token_hash = Column(String(64), unique=True)
+    expires_at = Column(DateTime)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Revoked access token ids (jti) and refresh families, mirrored in every worker
+# by app.revocation. Rows can go once expires_at has passed.
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_id = Column(String(64))
+    expires_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
\ No newline at end of file
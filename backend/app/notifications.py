@@ -0,0 +1,41 @@
+import logging
+import os
+
+from .jobs import PermanentJobError, enqueue_coalesced, job_handler
+
+logger = logging.getLogger(__name__)
+
+# Notifications are posted to a Teams incoming webhook by the job worker
+TEAMS_WEBHOOK_URL = os.getenv("TEAMS_WEBHOOK_URL", "")
+# Messages for one recipient within this window go out as a single post
+NOTIFICATION_BATCH_SECONDS = float(os.getenv("NOTIFICATION_BATCH_SECONDS", "30"))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+
+NOTIFY_JOB = "notify"
+
+# Queue messages for a user in the caller's transaction
+async def notify(db, recipient_id: int, *messages: str):
+    await enqueue_coalesced(db, NOTIFY_JOB, str(recipient_id), list(messages), delay=NOTIFICATION_BATCH_SECONDS)
+
+def format_notification(recipient_id: str, messages) -> str:
+    if len(messages) == 1:
+        return f"User #{recipient_id}: {messages[0]}"
+    lines = "\n".join(f"- {message}" for message in messages)
+    return f"User #{recipient_id}: {len(messages)} updates\n\n{lines}"
+
+@job_handler(NOTIFY_JOB)
+async def send_notifications(payload: dict):
+    if not TEAMS_WEBHOOK_URL.startswith(("http://", "https://")):
+        logger.info("TEAMS_WEBHOOK_URL is not set; dropping %s notification(s)", len(payload["items"]))
+        return
+    # Imported here so only the job worker loads the HTTP client, not every web worker
+    import httpx
+
+    async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS) as client:
+        response = await client.post(
+            TEAMS_WEBHOOK_URL, json={"text": format_notification(payload["key"], payload["items"])}
+        )
+    # Other client errors mean the request itself is wrong; retrying won't help
+    if response.is_client_error and response.status_code not in (408, 429):
+        raise PermanentJobError(f"Webhook rejected the message: {response.status_code} {response.text[:200]}")
+    response.raise_for_status()
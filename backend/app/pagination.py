@@ -0,0 +1,68 @@
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from datetime import datetime
+import base64
+import binascii
+import json
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Cursors are opaque to clients: base64 of the (created_at, id) of the last row served
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+# Order a query or select() by (created_at, id) and restrict it to one page.
+# With a cursor the page starts right after the cursor row (keyset pagination),
+# otherwise the legacy skip/limit offset is applied. One extra row is fetched so
+# page_rows can tell whether another page exists.
+def page_statement(stmt, model, skip: int = 0, limit: int = 100, cursor: str = None):
+    stmt = stmt.order_by(model.created_at, model.id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # The redundant >= gives the planner a range bound on the (created_at, id) index
+        stmt = stmt.filter(and_(
+            model.created_at >= created_at,
+            or_(model.created_at > created_at, model.id > row_id),
+        ))
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit + 1)
+
+# Trim the extra row and build the next cursor. It is returned whenever more rows
+# follow, so offset clients can switch to cursors at any page.
+def page_rows(rows, limit: int):
+    has_more = len(rows) > limit
+    rows = rows[:max(limit, 0)]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+# Page a sync Session query
+def paginate(query, model, skip: int = 0, limit: int = 100, cursor: str = None):
+    rows = page_statement(query, model, skip=skip, limit=limit, cursor=cursor).all()
+    return page_rows(rows, limit)
+
+# Page a select() on an AsyncSession
+async def paginate_async(db, stmt, model, skip: int = 0, limit: int = 100, cursor: str = None):
+    result = await db.execute(page_statement(stmt, model, skip=skip, limit=limit, cursor=cursor))
+    return page_rows(result.scalars().all(), limit)
+
+# Page a select() of columns on an AsyncSession, returning rows instead of ORM objects.
+# The select must include the model's created_at and id for the cursor.
+async def paginate_rows_async(db, stmt, model, skip: int = 0, limit: int = 100, cursor: str = None):
+    result = await db.execute(page_statement(stmt, model, skip=skip, limit=limit, cursor=cursor))
+    return page_rows(result.all(), limit)
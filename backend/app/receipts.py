@@ -0,0 +1,215 @@
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import shlex
+import uuid
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Upload limits and post-processing settings
+RECEIPT_MAX_BYTES = int(os.getenv("RECEIPT_MAX_BYTES", str(10 * 1024 * 1024)))
+RECEIPT_CHUNK_SIZE = int(os.getenv("RECEIPT_CHUNK_SIZE", str(256 * 1024)))
+RECEIPT_THUMBNAIL_SIZE = int(os.getenv("RECEIPT_THUMBNAIL_SIZE", "256"))
+# Optional virus scanner reading the file on stdin, e.g. "clamdscan --no-summary -".
+# A non-zero exit status rejects the receipt.
+RECEIPT_SCAN_COMMAND = os.getenv("RECEIPT_SCAN_COMMAND")
+
+# Accepted receipt formats, recognised by their leading bytes rather than the
+# client-supplied content type
+RECEIPT_SIGNATURES = {
+    b"%PDF-": "application/pdf",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+}
+
+RECEIPT_EXTENSIONS = {
+    "application/pdf": ".pdf",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+}
+
+# Rejections worth retrying when the same file is uploaded again
+RETRYABLE_REJECTIONS = {"Processing failed"}
+
+def sniff_content_type(head: bytes):
+    for signature, content_type in RECEIPT_SIGNATURES.items():
+        if head.startswith(signature):
+            return content_type
+    return None
+
+class ReceiptTooLarge(Exception):
+    pass
+
+# Read the upload in fixed-size chunks, hashing and counting as they pass
+# through, so the file is never held in memory as a whole. The first chunk is
+# read up front so the file type is known before anything is stored.
+class _HashingReader:
+    def __init__(self, upload: UploadFile, max_bytes: int):
+        self.upload = upload
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+
+    async def read_head(self):
+        self.head = await self.upload.read(RECEIPT_CHUNK_SIZE)
+        return self.head
+
+    async def chunks(self):
+        chunk = self.head
+        while chunk:
+            self.size += len(chunk)
+            if self.size > self.max_bytes:
+                raise ReceiptTooLarge()
+            self.digest.update(chunk)
+            yield chunk
+            chunk = await self.upload.read(RECEIPT_CHUNK_SIZE)
+
+# Uploads are only deduplicated against the same user's receipts, so an upload
+# never hands back a receipt somebody else owns
+async def _find_by_hash(db, sha256: str, user_id: int):
+    result = await db.execute(
+        select(models.Receipt).where(models.Receipt.uploaded_by == user_id, models.Receipt.sha256 == sha256)
+    )
+    return result.scalar_one_or_none()
+
+# Point a receipt rejected for a transient reason at a fresh copy of the file and
+# queue it again. Returns False if another upload already did so.
+async def _retry_rejected(db, receipt, key: str):
+    result = await db.execute(
+        update(models.Receipt)
+        .where(
+            models.Receipt.id == receipt.id,
+            models.Receipt.status == "rejected",
+            models.Receipt.rejection_reason.in_(RETRYABLE_REJECTIONS),
+        )
+        .values(storage_key=key, status="processing", rejection_reason=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        return False
+    await db.refresh(receipt)
+    return True
+
+# Stream an upload into storage and record it. Returns (receipt, deduplicated);
+# a file whose content the user uploaded before reuses their existing receipt.
+# The stored name and content type follow the file's leading bytes, never the
+# client-supplied filename or content type.
+async def store_receipt(db, storage, upload: UploadFile, user_id: int, max_bytes: int = None):
+    if max_bytes is None:
+        max_bytes = RECEIPT_MAX_BYTES
+    reader = _HashingReader(upload, max_bytes)
+    content_type = sniff_content_type((await reader.read_head())[:16])
+    if content_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Receipts must be PDF, JPEG or PNG files"
+        )
+    key = f"receipts/{uuid.uuid4().hex}{RECEIPT_EXTENSIONS[content_type]}"
+    try:
+        await storage.put_stream(key, reader.chunks(), content_type)
+    except ReceiptTooLarge:
+        await storage.delete(key)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Receipt exceeds {max_bytes} bytes"
+        )
+
+    sha256 = reader.digest.hexdigest()
+    existing = await _find_by_hash(db, sha256, user_id)
+    if existing is not None:
+        if existing.status == "rejected" and existing.rejection_reason in RETRYABLE_REJECTIONS:
+            if await _retry_rejected(db, existing, key):
+                return existing, False
+            await db.refresh(existing)
+        await storage.delete(key)
+        return existing, True
+
+    receipt = models.Receipt(
+        sha256=sha256,
+        storage_key=key,
+        filename=upload.filename,
+        content_type=content_type,
+        size=reader.size,
+        status="processing",
+        uploaded_by=user_id,
+    )
+    db.add(receipt)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # The same file was stored concurrently; keep the row that won
+        await db.rollback()
+        await storage.delete(key)
+        existing = await _find_by_hash(db, sha256, user_id)
+        if existing is None:
+            raise
+        return existing, True
+    return receipt, False
+
+def _make_thumbnail(data: bytes, size: int):
+    # Pillow is optional; without it receipts are stored without thumbnails
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=80)
+        return output.getvalue()
+
+async def _scan(data: bytes, command: str):
+    process = await asyncio.create_subprocess_exec(
+        *shlex.split(command),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    await process.communicate(data)
+    return process.returncode == 0
+
+# Validate, scan and thumbnail a stored receipt. Runs as a background task after
+# the upload response has been sent, so it opens its own session on the engine.
+# The stored file of a rejected receipt is deleted; only ready receipts keep one.
+async def process_receipt(receipt_id: int, storage, bind, scan_command: str = None):
+    if scan_command is None:
+        scan_command = RECEIPT_SCAN_COMMAND
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        receipt = await db.get(models.Receipt, receipt_id)
+        if receipt is None or receipt.status != "processing":
+            return
+        try:
+            data = await storage.read(receipt.storage_key)
+            content_type = sniff_content_type(data[:16])
+            if content_type is None:
+                receipt.status = "rejected"
+                receipt.rejection_reason = "Unsupported file type"
+            elif scan_command and not await _scan(data, scan_command):
+                receipt.status = "rejected"
+                receipt.rejection_reason = "Failed virus scan"
+            else:
+                receipt.content_type = content_type
+                if content_type != "application/pdf":
+                    thumbnail = await asyncio.to_thread(_make_thumbnail, data, RECEIPT_THUMBNAIL_SIZE)
+                    if thumbnail is not None:
+                        thumbnail_key = f"thumbnails/{receipt.sha256}.jpg"
+                        await storage.put_bytes(thumbnail_key, thumbnail, "image/jpeg")
+                        receipt.thumbnail_key = thumbnail_key
+                receipt.status = "ready"
+        except Exception:
+            logger.exception("Processing receipt %s failed", receipt_id)
+            receipt.status = "rejected"
+            receipt.rejection_reason = "Processing failed"
+        await db.commit()
+        if receipt.status == "rejected":
+            await storage.delete(receipt.storage_key)
@@ -0,0 +1,185 @@
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+from . import models
+
+REGISTERED = models.RegistrationStatus.REGISTERED.value
+WAITLISTED = models.RegistrationStatus.WAITLISTED.value
+CANCELLED = models.RegistrationStatus.CANCELLED.value
+
+# Seats are handed out by one conditional UPDATE on the activity row, never by
+# counting registrations: the decrement only applies while a seat is left, and
+# the row lock it takes (the write lock on SQLite) is held just until commit.
+async def take_seat(db, activity_id: int):
+    result = await db.execute(
+        update(models.EducationActivity)
+        .where(models.EducationActivity.id == activity_id, models.EducationActivity.seats_remaining > 0)
+        .values(seats_remaining=models.EducationActivity.seats_remaining - 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+# Lock the activity row and return its seat counter, so seat changes of one
+# activity are serialized with registrations
+async def lock_activity(db, activity_id: int, seat_change: int = 0):
+    result = await db.execute(
+        update(models.EducationActivity)
+        .where(models.EducationActivity.id == activity_id)
+        .values(
+            seats_remaining=models.EducationActivity.seats_remaining + seat_change,
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Activity not found"
+        )
+    return (await db.execute(
+        select(models.EducationActivity.capacity, models.EducationActivity.seats_remaining)
+        .where(models.EducationActivity.id == activity_id)
+    )).one()
+
+# Move people from the head of the waitlist onto free seats. Call with the
+# activity locked. Returns the promoted registration ids.
+async def promote_waitlisted(db, activity_id: int, seats_remaining):
+    if seats_remaining is not None and seats_remaining <= 0:
+        return []
+    query = (
+        select(models.ActivityRegistration.id)
+        .where(
+            models.ActivityRegistration.activity_id == activity_id,
+            models.ActivityRegistration.status == WAITLISTED,
+        )
+        .order_by(models.ActivityRegistration.id)
+        .with_for_update()
+    )
+    if seats_remaining is not None:
+        query = query.limit(seats_remaining)
+    promoted = (await db.execute(query)).scalars().all()
+    if promoted:
+        await db.execute(
+            update(models.ActivityRegistration)
+            .where(models.ActivityRegistration.id.in_(promoted))
+            .values(status=REGISTERED)
+            .execution_options(synchronize_session=False)
+        )
+        if seats_remaining is not None:
+            await db.execute(
+                update(models.EducationActivity)
+                .where(models.EducationActivity.id == activity_id)
+                .values(seats_remaining=models.EducationActivity.seats_remaining - len(promoted))
+                .execution_options(synchronize_session=False)
+            )
+    return promoted
+
+# Register a user: a seat if one is left (or capacity is unlimited), otherwise
+# a place on the waitlist. A user has at most one registration per activity.
+async def register(db, activity_id: int, user_id: int):
+    existing = (await db.execute(
+        select(models.ActivityRegistration)
+        .where(
+            models.ActivityRegistration.activity_id == activity_id,
+            models.ActivityRegistration.user_id == user_id,
+        )
+    )).scalar_one_or_none()
+    if existing is not None and existing.status != CANCELLED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Already registered for this activity"
+        )
+
+    if await take_seat(db, activity_id):
+        registration_status = REGISTERED
+    else:
+        activity = (await db.execute(
+            select(models.EducationActivity.capacity).where(models.EducationActivity.id == activity_id)
+        )).one_or_none()
+        if activity is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Activity not found"
+            )
+        registration_status = REGISTERED if activity.capacity is None else WAITLISTED
+
+    # Registering again after cancelling joins the back of the waitlist
+    if existing is not None:
+        await db.execute(delete(models.ActivityRegistration).where(models.ActivityRegistration.id == existing.id))
+    registration = models.ActivityRegistration(activity_id=activity_id, user_id=user_id, status=registration_status)
+    db.add(registration)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request of the same user won; the rollback returns the seat
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Already registered for this activity"
+        )
+    return registration
+
+# Cancel a registration. A freed seat goes to the head of the waitlist.
+# Every status change of an activity's registrations happens under the
+# activity lock, so the status is read again (as a locking read) once held.
+async def cancel(db, registration_id: int, activity_id: int):
+    await lock_activity(db, activity_id)
+    current_status = (await db.execute(
+        select(models.ActivityRegistration.status)
+        .where(models.ActivityRegistration.id == registration_id)
+        .with_for_update()
+    )).scalar_one()
+    if current_status == CANCELLED:
+        await db.rollback()
+        return
+    await db.execute(
+        update(models.ActivityRegistration)
+        .where(models.ActivityRegistration.id == registration_id)
+        .values(status=CANCELLED)
+        .execution_options(synchronize_session=False)
+    )
+    if current_status == REGISTERED:
+        _, seats_remaining = await lock_activity(db, activity_id, seat_change=1)
+        await promote_waitlisted(db, activity_id, seats_remaining)
+    await db.commit()
+
+# Recompute the seat counter after the capacity changed, and fill new seats
+# from the waitlist
+async def apply_capacity(db, activity_id: int, capacity):
+    await lock_activity(db, activity_id)
+    registered = (await db.execute(
+        select(func.count())
+        .select_from(models.ActivityRegistration)
+        .where(
+            models.ActivityRegistration.activity_id == activity_id,
+            models.ActivityRegistration.status == REGISTERED,
+        )
+        .with_for_update()
+    )).scalar()
+    if capacity is not None and capacity < registered:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Capacity cannot be below the {registered} registered participants"
+        )
+    seats_remaining = None if capacity is None else capacity - registered
+    await db.execute(
+        update(models.EducationActivity)
+        .where(models.EducationActivity.id == activity_id)
+        .values(capacity=capacity, seats_remaining=seats_remaining)
+        .execution_options(synchronize_session=False)
+    )
+    await promote_waitlisted(db, activity_id, seats_remaining)
+
+# 1-based place of a waitlisted registration
+async def waitlist_position(db, registration):
+    return (await db.execute(
+        select(func.count())
+        .select_from(models.ActivityRegistration)
+        .where(
+            models.ActivityRegistration.activity_id == registration.activity_id,
+            models.ActivityRegistration.status == WAITLISTED,
+            models.ActivityRegistration.id <= registration.id,
+        )
+    )).scalar()
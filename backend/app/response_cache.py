@@ -0,0 +1,180 @@
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Read-mostly responses (the user, asset and activity catalogs) are cached per
+# route, query string and caller role. Writes call invalidate(namespace), which
+# bumps the namespace's version so every cached entry of it is skipped at once.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() in ("1", "true", "yes")
+# "memory" keeps entries per worker; "redis" shares them (and invalidations) between workers
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Worker processes serving the app; gunicorn.conf.py exports the count it starts
+WORKERS = int(os.getenv("WEB_CONCURRENCY") or "1")
+
+# Clients must revalidate with If-None-Match; shared proxies must not store per-user responses
+CACHE_CONTROL = "private, no-cache"
+
+class CacheStore:
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    # Current value of a counter, 0 if it was never incremented
+    async def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+# Per-process store, also the stand-in for a shared store in tests
+class MemoryStore(CacheStore):
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl):
+        self.entries.set(key, value, ttl)
+
+    async def counter(self, key):
+        return self.counters.get(key, 0)
+
+    async def incr(self, key):
+        with self._lock:
+            self.counters[key] = value = self.counters.get(key, 0) + 1
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        with self._lock:
+            self.counters.clear()
+
+class RedisStore(CacheStore):
+    def __init__(self, url: str = RESPONSE_CACHE_REDIS_URL, prefix: str = "response-cache:"):
+        # Imported here so the client is only needed when Redis is configured
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key):
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key, value, ttl):
+        await self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    async def counter(self, key):
+        return int(await self.client.get(self.prefix + key) or 0)
+
+    async def incr(self, key):
+        return await self.client.incr(self.prefix + key)
+
+@lru_cache(maxsize=None)
+def _adapter(response_model):
+    return TypeAdapter(response_model)
+
+# Strong ETag from the namespace version, the cache key and the (id, updated_at)
+# of every object in the response. The version covers writes within the
+# resolution of updated_at (whole seconds on MySQL).
+def make_etag(key: str, objects) -> str:
+    digest = hashlib.sha1(key.encode())
+    for obj in objects:
+        updated_at = obj.updated_at.isoformat() if obj.updated_at else ""
+        digest.update(f"|{obj.id}:{updated_at}".encode())
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+# An entry is a JSON header line (etag and response headers) followed by the body
+def _encode_entry(etag: str, headers: dict, body: bytes) -> bytes:
+    return json.dumps({"etag": etag, "headers": headers}).encode() + b"\n" + body
+
+def _decode_entry(entry: bytes):
+    meta, body = entry.split(b"\n", 1)
+    meta = json.loads(meta)
+    return meta["etag"], meta["headers"], body
+
+def _response(request: Request, etag: str, headers: dict, body: bytes) -> Response:
+    headers = {**headers, "ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+class ResponseCache:
+    def __init__(self, store: CacheStore, ttl: float = RESPONSE_CACHE_TTL_SECONDS, enabled: bool = True):
+        self.store = store
+        self.ttl = ttl
+        self.enabled = enabled
+
+    async def _key(self, namespace: str, request: Request, role: str) -> str:
+        version = await self.store.counter(f"version:{namespace}")
+        query = "&".join(sorted(f"{name}={value}" for name, value in request.query_params.multi_items()))
+        return f"{namespace}:{version}:{role}:{request.url.path}?{query}"
+
+    # Serve the cached response for this request, or build it with load() and
+    # cache it. load returns (data, headers); data is an ORM object or a list of
+    # them, serialized with response_model. Errors raised by load are not cached.
+    # The key is computed before loading, so a response built from data read
+    # before a concurrent invalidation is stored under the old version only.
+    async def respond(self, request: Request, namespace: str, role: str, response_model, load) -> Response:
+        key = await self._key(namespace, request, role)
+        entry = await self.store.get(key) if self.enabled else None
+        if entry is not None:
+            return _response(request, *_decode_entry(entry))
+
+        data, headers = await load()
+        adapter = _adapter(response_model)
+        body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+        etag = make_etag(key, data if isinstance(data, list) else [data])
+        if self.enabled:
+            await self.store.set(key, _encode_entry(etag, headers, body), self.ttl)
+        return _response(request, etag, headers, body)
+
+    # Call after committing a change to anything served from these namespaces
+    async def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            await self.store.incr(f"version:{namespace}")
+
+def _build_store() -> CacheStore:
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return RedisStore()
+    return MemoryStore()
+
+# A per-worker cache would keep serving entries another worker has invalidated,
+# so with several workers only a shared (Redis) store may be used
+def _cache_enabled(enabled: bool = RESPONSE_CACHE_ENABLED, backend: str = RESPONSE_CACHE_BACKEND, workers: int = WORKERS) -> bool:
+    if not enabled:
+        return False
+    if backend != "redis" and workers > 1:
+        logger.warning(
+            "Response cache disabled: RESPONSE_CACHE_BACKEND=%s is per worker and %d workers are running; "
+            "use RESPONSE_CACHE_BACKEND=redis", backend, workers
+        )
+        return False
+    return True
+
+response_cache = ResponseCache(_build_store(), enabled=_cache_enabled())
@@ -0,0 +1,102 @@
+from sqlalchemy import delete, select
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import time
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Revoked token ids live in the revoked_tokens table and in a per-worker
+# mirror, so get_current_user checks revocation with a dict lookup instead of
+# a query. Each worker adds its own revocations at once and picks up those of
+# other workers every REVOCATION_SYNC_SECONDS.
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+# Each sync reads again the rows created this long before the newest one it
+# has seen, so rows committed late (by a slow transaction, or a worker with a
+# lagging clock) are not skipped
+REVOCATION_SYNC_OVERLAP_SECONDS = float(os.getenv("REVOCATION_SYNC_OVERLAP_SECONDS", "60"))
+# How often each worker deletes revocations and refresh tokens that have expired
+REVOCATION_PRUNE_SECONDS = float(os.getenv("REVOCATION_PRUNE_SECONDS", "3600"))
+
+class RevocationList:
+    def __init__(self):
+        # token id -> expires_at; entries are useless once the token has expired
+        self._revoked = {}
+        # created_at of the newest row read from the database
+        self._cursor = None
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def is_revoked(self, *token_ids) -> bool:
+        return any(token_id in self._revoked for token_id in token_ids if token_id)
+
+    def add(self, token_id: str, expires_at: datetime):
+        self._revoked[token_id] = max(expires_at, self._revoked.get(token_id, expires_at))
+
+    def prune(self, now: datetime = None):
+        now = now or datetime.utcnow()
+        for token_id in [t for t, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[token_id]
+
+    def clear(self):
+        self._revoked.clear()
+        self._cursor = None
+
+    # Read revocations made since the last sync (all unexpired ones the first time)
+    async def sync(self, db) -> int:
+        now = datetime.utcnow()
+        query = select(models.RevokedToken.token_id, models.RevokedToken.expires_at, models.RevokedToken.created_at)
+        if self._cursor is None:
+            query = query.where(models.RevokedToken.expires_at > now)
+        else:
+            query = query.where(
+                models.RevokedToken.created_at >= self._cursor - timedelta(seconds=REVOCATION_SYNC_OVERLAP_SECONDS)
+            )
+        rows = (await db.execute(query)).all()
+        for row in rows:
+            self.add(row.token_id, row.expires_at)
+            if self._cursor is None or row.created_at > self._cursor:
+                self._cursor = row.created_at
+        if self._cursor is None:
+            self._cursor = now
+        self.prune(now)
+        return len(rows)
+
+revocation_list = RevocationList()
+
+# Revoke a token id until expires_at, in the caller's transaction and in this worker at once
+async def revoke(db, token_id: str, expires_at: datetime):
+    db.add(models.RevokedToken(token_id=token_id, expires_at=expires_at))
+    revocation_list.add(token_id, expires_at)
+
+# Revocations and refresh tokens that have expired anyway
+async def delete_expired_tokens(db):
+    now = datetime.utcnow()
+    for model in (models.RevokedToken, models.RefreshToken):
+        await db.execute(
+            delete(model).where(model.expires_at <= now).execution_options(synchronize_session=False)
+        )
+    await db.commit()
+
+# Keep revocation_list in step with the database until stop is set, starting
+# one interval after the caller's own first sync
+async def run_sync(session_factory, stop: asyncio.Event, interval: float = REVOCATION_SYNC_SECONDS):
+    pruned_at = time.monotonic()
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            async with session_factory() as db:
+                await revocation_list.sync(db)
+                if time.monotonic() - pruned_at >= REVOCATION_PRUNE_SECONDS:
+                    await delete_expired_tokens(db)
+                    pruned_at = time.monotonic()
+        except Exception:
+            logger.exception("Could not sync revoked tokens")
@@ -0,0 +1,316 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta
+from itertools import groupby
+import logging
+
+from .. import models, schemas, auth
+from ..bookings import (
+    ACTIVE_BOOKING_STATUSES,
+    ASSET_AVAILABILITY_MAX_DAYS,
+    ASSET_BOOKING_MAX_DURATION,
+    booking_seconds,
+    conflict_error,
+    find_conflict,
+    free_slots,
+    lock_asset,
+    longest_booking,
+    overlap_conditions,
+    to_naive_utc,
+    validate_interval,
+)
+from ..database import get_async_db
+from ..pagination import paginate_async, NEXT_CURSOR_HEADER
+from ..response_cache import response_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Create a new asset (for admin)
+@router.post("/", response_model=schemas.Asset, status_code=status.HTTP_201_CREATED)
+async def create_asset(
+    asset: schemas.AssetCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    db_asset = models.Asset(**asset.dict())
+    db.add(db_asset)
+    await db.commit()
+    await db.refresh(db_asset)
+    await response_cache.invalidate("assets")
+    return db_asset
+
+# Get all assets, cached and answered with 304 when unchanged
+@router.get("/", response_model=List[schemas.Asset])
+async def read_assets(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    async def load():
+        query = select(models.Asset)
+        if category:
+            query = query.where(models.Asset.category == category)
+        if location:
+            query = query.where(models.Asset.location == location)
+        assets, next_cursor = await paginate_async(db, query, models.Asset, skip=skip, limit=limit, cursor=cursor)
+        return assets, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+    return await response_cache.respond(request, "assets", current_user.role, List[schemas.Asset], load)
+
+# Free time slots of many assets within one window.
+# One query selects the matching assets and one the bookings overlapping the
+# window, ordered so the gaps of every asset are found in a single pass.
+@router.get("/availability", response_model=List[schemas.AssetAvailability])
+async def read_availability(
+    start: datetime,
+    end: datetime,
+    asset_ids: Optional[List[int]] = Query(None),
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    min_duration_minutes: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    validate_interval(start, end)
+    if end - start > timedelta(days=ASSET_AVAILABILITY_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Availability windows may span at most {ASSET_AVAILABILITY_MAX_DAYS} days"
+        )
+
+    conditions = [models.Asset.is_available.is_(True)]
+    if asset_ids:
+        conditions.append(models.Asset.id.in_(asset_ids))
+    if category:
+        conditions.append(models.Asset.category == category)
+    if location:
+        conditions.append(models.Asset.location == location)
+
+    assets = (await db.execute(
+        select(models.Asset.id, models.Asset.name, models.Asset.longest_booking_seconds)
+        .where(*conditions).order_by(models.Asset.id)
+    )).all()
+    longest = timedelta(seconds=max((asset.longest_booking_seconds or 0 for asset in assets), default=0))
+    bookings = (await db.execute(
+        select(models.AssetBooking.asset_id, models.AssetBooking.start_time, models.AssetBooking.end_time)
+        .where(
+            models.AssetBooking.asset_id.in_(select(models.Asset.id).where(*conditions)),
+            *overlap_conditions(start, end, longest),
+        )
+        .order_by(models.AssetBooking.asset_id, models.AssetBooking.start_time)
+    )).all()
+
+    booked = {
+        asset_id: [(row.start_time, row.end_time) for row in rows]
+        for asset_id, rows in groupby(bookings, key=lambda row: row.asset_id)
+    }
+    min_duration = timedelta(minutes=min_duration_minutes)
+    return [
+        schemas.AssetAvailability(
+            asset_id=asset.id,
+            name=asset.name,
+            free_slots=[
+                schemas.TimeSlot(start=slot_start, end=slot_end)
+                for slot_start, slot_end in free_slots(start, end, booked.get(asset.id, []), min_duration)
+            ],
+        )
+        for asset in assets
+    ]
+
+# Book an asset. The asset is locked before the overlap check, so concurrent
+# requests for the same slot cannot both succeed.
+@router.post("/bookings", response_model=schemas.AssetBooking, status_code=status.HTTP_201_CREATED)
+async def create_booking(
+    booking: schemas.AssetBookingCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    start, end = to_naive_utc(booking.start_time), to_naive_utc(booking.end_time)
+    validate_interval(start, end, ASSET_BOOKING_MAX_DURATION)
+
+    await lock_asset(db, booking.asset_id, booking_seconds(start, end))
+    asset = await db.get(models.Asset, booking.asset_id)
+    if not asset.is_available:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Asset is not available for booking"
+        )
+    conflict = await find_conflict(db, booking.asset_id, start, end)
+    if conflict is not None:
+        raise conflict_error(conflict)
+
+    db_booking = models.AssetBooking(
+        asset_id=booking.asset_id,
+        user_id=current_user.id,
+        start_time=start,
+        end_time=end,
+        purpose=booking.purpose,
+        status=models.RequestStatus.PENDING.value,
+    )
+    db.add(db_booking)
+    await db.commit()
+    await db.refresh(db_booking)
+    return db_booking
+
+# Get bookings for current user
+@router.get("/bookings/me", response_model=List[schemas.AssetBooking])
+async def read_my_bookings(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    query = select(models.AssetBooking).where(models.AssetBooking.user_id == current_user.id)
+    bookings, next_cursor = await paginate_async(db, query, models.AssetBooking, skip=skip, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return bookings
+
+async def _get_booking_for_user(db, booking_id: int, current_user):
+    db_booking = await db.get(models.AssetBooking, booking_id)
+    if db_booking is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking not found"
+        )
+    if current_user.role != "admin" and db_booking.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return db_booking
+
+# Get booking by ID
+@router.get("/bookings/{booking_id}", response_model=schemas.AssetBooking)
+async def read_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    return await _get_booking_for_user(db, booking_id, current_user)
+
+# Update booking. Changing its times, or reactivating it, re-runs the overlap
+# check under the asset lock. An approved booking its owner reschedules goes
+# back to pending, since the approval was for the old times.
+@router.put("/bookings/{booking_id}", response_model=schemas.AssetBooking)
+async def update_booking(
+    booking_id: int,
+    booking: schemas.AssetBookingUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_booking = await _get_booking_for_user(db, booking_id, current_user)
+
+    # Only admins can change status
+    booking_data = booking.dict(exclude_unset=True)
+    if current_user.role != "admin" and "status" in booking_data:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to change status"
+        )
+
+    start = to_naive_utc(booking_data.get("start_time") or db_booking.start_time)
+    end = to_naive_utc(booking_data.get("end_time") or db_booking.end_time)
+    new_status = booking_data.get("status", db_booking.status)
+    new_status = getattr(new_status, "value", new_status)
+    times_changed = (start, end) != (db_booking.start_time, db_booking.end_time)
+    reactivated = db_booking.status not in ACTIVE_BOOKING_STATUSES
+    if times_changed and current_user.role != "admin" and new_status == models.RequestStatus.APPROVED.value:
+        new_status = models.RequestStatus.PENDING.value
+    if new_status in ACTIVE_BOOKING_STATUSES and (times_changed or reactivated):
+        validate_interval(start, end, ASSET_BOOKING_MAX_DURATION)
+        await lock_asset(db, db_booking.asset_id, booking_seconds(start, end))
+        conflict = await find_conflict(db, db_booking.asset_id, start, end, exclude_id=db_booking.id)
+        if conflict is not None:
+            raise conflict_error(conflict)
+
+    db_booking.start_time = start
+    db_booking.end_time = end
+    db_booking.status = new_status
+    if "purpose" in booking_data:
+        db_booking.purpose = booking_data["purpose"]
+    await db.commit()
+    await db.refresh(db_booking)
+    return db_booking
+
+# Cancel booking, releasing its slot
+@router.delete("/bookings/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_booking = await _get_booking_for_user(db, booking_id, current_user)
+    db_booking.status = models.RequestStatus.CANCELLED.value
+    await db.commit()
+    return None
+
+# Get asset by ID, cached and answered with 304 when unchanged
+@router.get("/{asset_id}", response_model=schemas.Asset)
+async def read_asset(
+    asset_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    async def load():
+        db_asset = await db.get(models.Asset, asset_id)
+        if db_asset is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Asset not found"
+            )
+        return db_asset, {}
+
+    return await response_cache.respond(request, "assets", current_user.role, schemas.Asset, load)
+
+# Update asset (for admin)
+@router.put("/{asset_id}", response_model=schemas.Asset)
+async def update_asset(
+    asset_id: int,
+    asset: schemas.AssetUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    db_asset = await db.get(models.Asset, asset_id)
+    if db_asset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Asset not found"
+        )
+    for key, value in asset.dict(exclude_unset=True).items():
+        setattr(db_asset, key, value)
+    await db.commit()
+    await db.refresh(db_asset)
+    await response_cache.invalidate("assets")
+    return db_asset
+
+# Active bookings of one asset overlapping [start, end)
+@router.get("/{asset_id}/bookings", response_model=List[schemas.AssetBooking])
+async def read_asset_bookings(
+    asset_id: int,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    validate_interval(start, end)
+    longest = await longest_booking(db, models.Asset.id == asset_id)
+    result = await db.execute(
+        select(models.AssetBooking)
+        .where(models.AssetBooking.asset_id == asset_id, *overlap_conditions(start, end, longest))
+        .order_by(models.AssetBooking.start_time)
+    )
+    return result.scalars().all()
@@ -0,0 +1,175 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import logging
+
+from .. import models, schemas, auth
+from ..database import get_async_db
+from ..pagination import paginate_async, NEXT_CURSOR_HEADER
+from ..registrations import (
+    WAITLISTED,
+    apply_capacity,
+    cancel,
+    register,
+    waitlist_position,
+)
+from ..response_cache import response_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Create a new activity (for admin)
+@router.post("/", response_model=schemas.EducationActivity, status_code=status.HTTP_201_CREATED)
+async def create_activity(
+    activity: schemas.EducationActivityCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    db_activity = models.EducationActivity(**activity.dict(), seats_remaining=activity.capacity)
+    db.add(db_activity)
+    await db.commit()
+    await db.refresh(db_activity)
+    await response_cache.invalidate("activities")
+    return db_activity
+
+# Get all activities, cached and answered with 304 when unchanged
+@router.get("/", response_model=List[schemas.EducationActivity])
+async def read_activities(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    async def load():
+        query = select(models.EducationActivity)
+        activities, next_cursor = await paginate_async(
+            db, query, models.EducationActivity, skip=skip, limit=limit, cursor=cursor
+        )
+        return activities, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+    return await response_cache.respond(
+        request, "activities", current_user.role, List[schemas.EducationActivity], load
+    )
+
+# Get registrations for current user
+@router.get("/registrations/me", response_model=List[schemas.ActivityRegistration])
+async def read_my_registrations(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    query = select(models.ActivityRegistration).where(models.ActivityRegistration.user_id == current_user.id)
+    registrations, next_cursor = await paginate_async(
+        db, query, models.ActivityRegistration, skip=skip, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return registrations
+
+async def _get_activity(db, activity_id: int):
+    db_activity = await db.get(models.EducationActivity, activity_id)
+    if db_activity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Activity not found"
+        )
+    return db_activity
+
+# Get activity by ID, cached and answered with 304 when unchanged
+@router.get("/{activity_id}", response_model=schemas.EducationActivity)
+async def read_activity(
+    activity_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    async def load():
+        return await _get_activity(db, activity_id), {}
+
+    return await response_cache.respond(request, "activities", current_user.role, schemas.EducationActivity, load)
+
+# Update activity (for admin). A capacity change recomputes the free seats and
+# promotes from the waitlist.
+@router.put("/{activity_id}", response_model=schemas.EducationActivity)
+async def update_activity(
+    activity_id: int,
+    activity: schemas.EducationActivityUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    db_activity = await _get_activity(db, activity_id)
+    activity_data = activity.dict(exclude_unset=True)
+    if "capacity" in activity_data:
+        await apply_capacity(db, activity_id, activity_data.pop("capacity"))
+    for key, value in activity_data.items():
+        setattr(db_activity, key, value)
+    await db.commit()
+    await db.refresh(db_activity)
+    await response_cache.invalidate("activities")
+    return db_activity
+
+# Register the current user for an activity, or put them on its waitlist
+@router.post(
+    "/{activity_id}/registrations",
+    response_model=schemas.ActivityRegistration,
+    status_code=status.HTTP_201_CREATED,
+)
+async def register_for_activity(
+    activity_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    registration = await register(db, activity_id, current_user.id)
+    if registration.status == WAITLISTED:
+        registration.waitlist_position = await waitlist_position(db, registration)
+    else:
+        # A seat was taken, so the cached seats_remaining is stale
+        await response_cache.invalidate("activities")
+    return registration
+
+# Get registrations of an activity (for admin), in waitlist order
+@router.get("/{activity_id}/registrations", response_model=List[schemas.ActivityRegistration])
+async def read_activity_registrations(
+    activity_id: int,
+    status: Optional[schemas.RegistrationStatus] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    query = (
+        select(models.ActivityRegistration)
+        .where(models.ActivityRegistration.activity_id == activity_id)
+        .order_by(models.ActivityRegistration.id)
+    )
+    if status:
+        query = query.where(models.ActivityRegistration.status == status.value)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+# Cancel the current user's registration; admins may cancel anyone's
+@router.delete("/{activity_id}/registrations/{registration_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_registration(
+    activity_id: int,
+    registration_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    registration = await db.get(models.ActivityRegistration, registration_id)
+    if registration is None or registration.activity_id != activity_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Registration not found"
+        )
+    if current_user.role != "admin" and registration.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    await cancel(db, registration_id, activity_id)
+    await response_cache.invalidate("activities")
+    return None
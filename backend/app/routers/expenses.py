@@ -1,21 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status, File, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime
+from urllib.parse import urlsplit
 import logging
+import os
+import re
 
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_async_db
+from ..export import stream_export, EXPORT_MEDIA_TYPES
+from ..pagination import paginate_async, paginate_rows_async, NEXT_CURSOR_HEADER
+from ..notifications import notify
+from ..receipts import process_receipt, store_receipt
+from ..serialization import fast_serializer, rows_response, schema_columns
+from ..storage import get_storage
+from ..summaries import ExpenseSummaryDelta, apply_expense_summary_delta
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MANAGER_ROLES = ("admin", "manager")
+RECEIPT_PATH = re.compile(r"/receipts/(\d+)/?$")
+
+# A receipt_url naming one of our receipt downloads must name a receipt the
+# caller uploaded; the download route itself only checks the uploader
+async def _check_receipt_urls(request: Request, db, user_id: int, urls):
+    receipt_ids = set()
+    for url in urls:
+        path = urlsplit(url or "").path
+        match = RECEIPT_PATH.search(path)
+        if match and path.rstrip("/") == request.app.url_path_for("download_receipt", receipt_id=int(match.group(1))):
+            receipt_ids.add(int(match.group(1)))
+    if not receipt_ids:
+        return
+    owned = await db.scalars(
+        select(models.Receipt.id).where(models.Receipt.id.in_(receipt_ids), models.Receipt.uploaded_by == user_id)
+    )
+    if receipt_ids - set(owned.all()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="receipt_url must point at a receipt you uploaded"
+        )
+
 # Create a new expense
 @router.post("/", response_model=schemas.Expense, status_code=status.HTTP_201_CREATED)
 async def create_expense(
     expense: schemas.ExpenseCreate,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_user)
 ):
+    await _check_receipt_urls(request, db, current_user.id, [expense.receipt_url])
     # Create new expense
     db_expense = models.Expense(
         user_id=current_user.id,  # In a real app, this would be the current user's ID
@@ -25,55 +63,315 @@ async def create_expense(
         receipt_url=expense.receipt_url
     )
     db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+    delta = ExpenseSummaryDelta()
+    delta.add(current_user.id, models.RequestStatus.PENDING, expense.amount)
+    await apply_expense_summary_delta(db, delta)
+    await db.commit()
+    await db.refresh(db_expense)
     return db_expense
 
+# Statuses a batch transition may move an expense to, and the statuses it may come from
+BATCH_TRANSITIONS = {
+    schemas.RequestStatus.APPROVED: {schemas.RequestStatus.PENDING.value},
+    schemas.RequestStatus.REJECTED: {schemas.RequestStatus.PENDING.value},
+    schemas.RequestStatus.CANCELLED: {schemas.RequestStatus.PENDING.value},
+}
+
+# Create many expenses in one transaction
+@router.post("/batch", response_model=List[schemas.ExpenseBatchItemResult], status_code=status.HTTP_201_CREATED)
+async def create_expenses_batch(
+    batch: schemas.ExpenseBatchCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    await _check_receipt_urls(request, db, current_user.id, [item.receipt_url for item in batch.items])
+    # Every item was validated with the request body, so the whole batch is written or none of it.
+    # A single flush sends the rows as batched multi-row INSERTs where the driver supports it.
+    db_expenses = [
+        models.Expense(
+            user_id=current_user.id,
+            amount=item.amount,
+            category=item.category,
+            description=item.description,
+            receipt_url=item.receipt_url
+        )
+        for item in batch.items
+    ]
+    db.add_all(db_expenses)
+    delta = ExpenseSummaryDelta()
+    for item in batch.items:
+        delta.add(current_user.id, models.RequestStatus.PENDING, item.amount)
+    await apply_expense_summary_delta(db, delta)
+    await db.flush()
+    results = [
+        schemas.ExpenseBatchItemResult(index=index, id=db_expense.id, ok=True)
+        for index, db_expense in enumerate(db_expenses)
+    ]
+    await db.commit()
+    return results
+
+# Move many expenses to a new status in one transaction (for admin)
+@router.post("/batch/status", response_model=List[schemas.ExpenseBatchItemResult])
+async def transition_expenses_batch(
+    transition: schemas.ExpenseStatusTransition,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    allowed_from = BATCH_TRANSITIONS.get(transition.status, set())
+    ids = list(dict.fromkeys(transition.ids))
+
+    # Lock the rows (on databases that support it) and check every item up front
+    current = await db.execute(
+        select(models.Expense.id, models.Expense.user_id, models.Expense.status, models.Expense.amount)
+        .where(models.Expense.id.in_(ids))
+        .with_for_update()
+    )
+    current_rows = {row.id: row for row in current.all()}
+    current_status = {expense_id: row.status for expense_id, row in current_rows.items()}
+
+    errors = {}
+    movable = {}
+    for index, expense_id in enumerate(transition.ids):
+        if expense_id not in current_status:
+            errors[index] = "Expense not found"
+        elif current_status[expense_id] not in allowed_from:
+            errors[index] = f"Cannot change status from {current_status[expense_id]} to {transition.status.value}"
+        elif expense_id in movable:
+            errors[index] = "Duplicate id"
+        else:
+            movable[expense_id] = index
+
+    # One set-based UPDATE per status read above, guarded on that status. Without
+    # row locks (SQLite) another request may move a row in between, so only the
+    # rows the UPDATE returns count as moved; with locks every row is moved.
+    by_status = {}
+    for expense_id in movable:
+        by_status.setdefault(current_status[expense_id], []).append(expense_id)
+    returning = db.get_bind().dialect.update_returning
+    moved = {}
+    for old_status, group in by_status.items():
+        statement = (
+            update(models.Expense)
+            .where(models.Expense.id.in_(group), models.Expense.status == old_status)
+            .values(status=transition.status.value)
+            .execution_options(synchronize_session=False)
+        )
+        if returning:
+            result = await db.execute(
+                statement.returning(models.Expense.id, models.Expense.user_id, models.Expense.amount)
+            )
+            moved.update((row.id, (row.user_id, old_status, row.amount)) for row in result.all())
+        else:
+            result = await db.execute(statement)
+            if result.rowcount != len(group):
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Expenses changed while the batch was applied, please retry"
+                )
+            moved.update(
+                (expense_id, (current_rows[expense_id].user_id, old_status, current_rows[expense_id].amount))
+                for expense_id in group
+            )
+    for expense_id, index in movable.items():
+        if expense_id not in moved:
+            errors[index] = "Status was changed by another request"
+
+    if moved:
+        delta = ExpenseSummaryDelta()
+        messages = {}
+        for expense_id, (user_id, old_status, amount) in moved.items():
+            delta.remove(user_id, old_status, amount)
+            delta.add(user_id, transition.status, amount)
+            messages.setdefault(user_id, []).append(
+                f"Expense #{expense_id} ({amount:.2f}) is now {transition.status.value}"
+            )
+        await apply_expense_summary_delta(db, delta)
+        # One queued notification per owner, however many of their expenses moved
+        for user_id, user_messages in messages.items():
+            await notify(db, user_id, *user_messages)
+    await db.commit()
+    return [
+        schemas.ExpenseBatchItemResult(index=index, id=expense_id, ok=index not in errors, error=errors.get(index))
+        for index, expense_id in enumerate(transition.ids)
+    ]
+
 # Upload receipt
-@router.post("/upload-receipt")
-async def upload_receipt(file: UploadFile = File(...)):
-    # In a real app, this would upload to Azure Blob Storage
-    # For now, just return a dummy URL
-    return {"receipt_url": f"https://storage.example.com/receipts/{file.filename}"}
+# The file is streamed to storage in chunks; type checks, virus scanning and
+# thumbnails run in the background after the response is sent
+@router.post("/upload-receipt", response_model=schemas.ReceiptUpload)
+async def upload_receipt(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    storage = Depends(get_storage),
+    current_user = Depends(auth.get_current_user)
+):
+    receipt, deduplicated = await store_receipt(db, storage, file, current_user.id)
+    if receipt.status == "processing" and not deduplicated:
+        background_tasks.add_task(process_receipt, receipt.id, storage, db.bind)
+    return {
+        "receipt_id": receipt.id,
+        "receipt_url": request.app.url_path_for("download_receipt", receipt_id=receipt.id),
+        "sha256": receipt.sha256,
+        "size": receipt.size,
+        "status": receipt.status,
+        "deduplicated": deduplicated,
+    }
+
+# Download a receipt that passed processing. Only its uploader, managers and
+# admins may fetch it, and it is always sent as an attachment so a browser
+# never renders it in the app's origin.
+@router.get("/receipts/{receipt_id}", name="download_receipt")
+async def download_receipt(
+    receipt_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    storage = Depends(get_storage),
+    current_user = Depends(auth.get_current_user)
+):
+    receipt = await db.get(models.Receipt, receipt_id)
+    if (
+        receipt is None
+        or receipt.status != "ready"
+        or (receipt.uploaded_by != current_user.id and current_user.role not in MANAGER_ROLES)
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt not found")
+    data = await storage.read(receipt.storage_key)
+    extension = os.path.splitext(receipt.storage_key)[1]
+    return Response(
+        content=data,
+        media_type=receipt.content_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="receipt-{receipt.id}{extension}"',
+            "X-Content-Type-Options": "nosniff",
+        },
+    )
+
+# Expense pages are ORM objects validated by the response_model, or, with
+# FAST_SERIALIZER set, rows encoded in one pass (see serialization.py)
+EXPENSE_COLUMNS = schema_columns(models.Expense, schemas.Expense)
+
+async def _expense_page(db, response, conditions, skip, limit, cursor):
+    serializer = fast_serializer()
+    if serializer is None:
+        query = select(models.Expense).where(*conditions)
+        expenses, next_cursor = await paginate_async(db, query, models.Expense, skip=skip, limit=limit, cursor=cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return expenses
+    query = select(*EXPENSE_COLUMNS).where(*conditions)
+    rows, next_cursor = await paginate_rows_async(db, query, models.Expense, skip=skip, limit=limit, cursor=cursor)
+    return rows_response(
+        rows, schemas.Expense, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None, serializer=serializer
+    )
 
 # Get all expenses (for admin)
 @router.get("/", response_model=List[schemas.Expense])
 async def read_expenses(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_admin)
 ):
-    query = db.query(models.Expense)
+    conditions = []
     if status:
-        query = query.filter(models.Expense.status == status)
-    expenses = query.offset(skip).limit(limit).all()
-    return expenses
+        conditions.append(models.Expense.status == status)
+    return await _expense_page(db, response, conditions, skip, limit, cursor)
 
 # Get expenses for current user
 @router.get("/me", response_model=List[schemas.Expense])
 async def read_my_expenses(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    conditions = [models.Expense.user_id == current_user.id]
+    if status:
+        conditions.append(models.Expense.status == status)
+    return await _expense_page(db, response, conditions, skip, limit, cursor)
+
+# Expense counts and totals per status for the dashboard.
+# Admins may ask for another user's summary.
+@router.get("/summary", response_model=List[schemas.ExpenseSummary])
+async def read_expense_summary(
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_user)
 ):
-    query = db.query(models.Expense).filter(models.Expense.user_id == current_user.id)
+    if user_id is None:
+        user_id = current_user.id
+    elif user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    result = await db.execute(
+        select(models.ExpenseSummary)
+        .where(models.ExpenseSummary.user_id == user_id, models.ExpenseSummary.count > 0)
+        .order_by(models.ExpenseSummary.status)
+    )
+    return result.scalars().all()
+
+# Export expenses as CSV or NDJSON (for admin)
+# Declared before /{expense_id} so "export" is not taken for an id
+@router.get("/export")
+async def export_expenses(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    query = select(
+        models.Expense.id,
+        models.Expense.user_id,
+        models.Expense.amount,
+        models.Expense.category,
+        models.Expense.description,
+        models.Expense.status,
+        models.Expense.receipt_url,
+        models.Expense.created_at,
+        models.Expense.updated_at,
+    )
     if status:
-        query = query.filter(models.Expense.status == status)
-    expenses = query.offset(skip).limit(limit).all()
-    return expenses
+        query = query.where(models.Expense.status == status)
+    if user_id is not None:
+        query = query.where(models.Expense.user_id == user_id)
+    if category:
+        query = query.where(models.Expense.category == category)
+    if created_from:
+        query = query.where(models.Expense.created_at >= created_from)
+    if created_to:
+        query = query.where(models.Expense.created_at < created_to)
+    query = query.order_by(models.Expense.created_at, models.Expense.id)
+
+    return StreamingResponse(
+        stream_export(db, query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{format}"'},
+    )
 
 # Get expense by ID
 @router.get("/{expense_id}", response_model=schemas.Expense)
 async def read_expense(
     expense_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_user)
 ):
-    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    db_expense = await db.get(models.Expense, expense_id)
     if db_expense is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,10 +392,11 @@ async def read_expense(
 async def update_expense(
     expense_id: int,
     expense: schemas.ExpenseUpdate,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_user)
 ):
-    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    db_expense = await db.get(models.Expense, expense_id, with_for_update=True)
     if db_expense is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -111,29 +410,49 @@ async def update_expense(
             detail="Not enough permissions"
         )
     
+    # Only receipt_url may be cleared; null leaves the other fields as they are
+    expense_data = {
+        key: value for key, value in expense.dict(exclude_unset=True).items()
+        if value is not None or key == "receipt_url"
+    }
+
     # Only admins can change status
-    expense_data = expense.dict(exclude_unset=True)
     if current_user.role != "admin" and "status" in expense_data:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to change status"
         )
+    if expense_data.get("receipt_url") not in (None, db_expense.receipt_url):
+        await _check_receipt_urls(request, db, current_user.id, [expense_data["receipt_url"]])
     
+    old_status = db_expense.status
+    delta = ExpenseSummaryDelta()
+    delta.remove(db_expense.user_id, db_expense.status, db_expense.amount)
     for key, value in expense_data.items():
         setattr(db_expense, key, value)
+    delta.add(db_expense.user_id, db_expense.status, db_expense.amount)
+    await apply_expense_summary_delta(db, delta)
+
+    # Tell the owner about decisions; the notification commits with the change
+    new_status = schemas.RequestStatus(db_expense.status).value
+    if new_status != old_status:
+        await notify(
+            db, db_expense.user_id,
+            f"Expense #{db_expense.id} ({db_expense.category}, {db_expense.amount:.2f}) is now {new_status}",
+        )
     
-    db.commit()
-    db.refresh(db_expense)
+    await db.commit()
+    await db.refresh(db_expense)
     return db_expense
 
 # Delete expense
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_expense(
     expense_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_user)
 ):
-    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id).first()
+    db_expense = await db.get(models.Expense, expense_id, with_for_update=True)
     if db_expense is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -147,6 +466,9 @@ async def delete_expense(
             detail="Not enough permissions"
         )
     
-    db.delete(db_expense)
-    db.commit()
+    delta = ExpenseSummaryDelta()
+    delta.remove(db_expense.user_id, db_expense.status, db_expense.amount)
+    await apply_expense_summary_delta(db, delta)
+    await db.delete(db_expense)
+    await db.commit()
     return None
\ No newline at end of file
@@ -0,0 +1,221 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+import logging
+
+from .. import models, schemas, auth
+from ..database import get_async_db
+from ..notifications import notify
+from ..pagination import paginate_async, NEXT_CURSOR_HEADER
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Roles that triage and work on maintenance issues
+MANAGER_ROLES = ("admin", "manager")
+
+# Open issues in the order they are worked on, served by
+# ix_maintenance_issues_status_rank_created
+def _queue(entity=models.MaintenanceIssue.id):
+    return (
+        select(entity)
+        .where(models.MaintenanceIssue.status == models.IssueStatus.OPEN.value)
+        .order_by(models.MaintenanceIssue.priority_rank, models.MaintenanceIssue.created_at, models.MaintenanceIssue.id)
+    )
+
+# Assign the next open issue to user_id and return its id, or None when the
+# queue is empty. MySQL locks the head of the queue with SKIP LOCKED, so
+# concurrent claims take the next issues instead of waiting for this one. SQLite
+# serializes writes, so one UPDATE that picks and claims the head is atomic.
+async def _claim_next_issue(db, user_id: int):
+    claim = {
+        "status": models.IssueStatus.IN_PROGRESS.value,
+        "assignee_id": user_id,
+        "claimed_at": datetime.utcnow(),
+    }
+    if db.bind.dialect.name == "sqlite":
+        result = await db.execute(
+            update(models.MaintenanceIssue)
+            .where(
+                models.MaintenanceIssue.id == _queue().limit(1).scalar_subquery(),
+                models.MaintenanceIssue.status == models.IssueStatus.OPEN.value,
+            )
+            .values(**claim)
+            .returning(models.MaintenanceIssue.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none()
+
+    issue_id = (await db.execute(_queue().limit(1).with_for_update(skip_locked=True))).scalar_one_or_none()
+    if issue_id is not None:
+        await db.execute(
+            update(models.MaintenanceIssue)
+            .where(models.MaintenanceIssue.id == issue_id)
+            .values(**claim)
+            .execution_options(synchronize_session=False)
+        )
+    return issue_id
+
+async def _get_issue(db, issue_id: int):
+    db_issue = await db.get(models.MaintenanceIssue, issue_id, populate_existing=True)
+    if db_issue is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Maintenance issue not found"
+        )
+    return db_issue
+
+# Reporters see their own issues, assignees the ones they work on, managers all
+async def _get_issue_for_user(db, issue_id: int, current_user):
+    db_issue = await _get_issue(db, issue_id)
+    if current_user.role not in MANAGER_ROLES and current_user.id not in (db_issue.reporter_id, db_issue.assignee_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return db_issue
+
+# Report a new maintenance issue
+@router.post("/", response_model=schemas.MaintenanceIssue, status_code=status.HTTP_201_CREATED)
+async def create_issue(
+    issue: schemas.MaintenanceIssueCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_issue = models.MaintenanceIssue(
+        **issue.dict(), reporter_id=current_user.id, status=models.IssueStatus.OPEN.value
+    )
+    db.add(db_issue)
+    await db.commit()
+    await db.refresh(db_issue)
+    return db_issue
+
+# Get all maintenance issues (for managers)
+@router.get("/", response_model=List[schemas.MaintenanceIssue])
+async def read_issues(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[schemas.IssueStatus] = None,
+    priority: Optional[schemas.IssuePriority] = None,
+    assignee_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_manager)
+):
+    query = select(models.MaintenanceIssue)
+    if status:
+        query = query.where(models.MaintenanceIssue.status == status.value)
+    if priority:
+        query = query.where(models.MaintenanceIssue.priority_rank == models.PRIORITY_RANKS[priority.value])
+    if assignee_id is not None:
+        query = query.where(models.MaintenanceIssue.assignee_id == assignee_id)
+    issues, next_cursor = await paginate_async(
+        db, query, models.MaintenanceIssue, skip=skip, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return issues
+
+# Get issues reported by the current user
+@router.get("/me", response_model=List[schemas.MaintenanceIssue])
+async def read_my_issues(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    query = select(models.MaintenanceIssue).where(models.MaintenanceIssue.reporter_id == current_user.id)
+    issues, next_cursor = await paginate_async(
+        db, query, models.MaintenanceIssue, skip=skip, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return issues
+
+# Open issues in triage order, most urgent then oldest first (for managers)
+@router.get("/queue", response_model=List[schemas.MaintenanceIssue])
+async def read_queue(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_manager)
+):
+    result = await db.execute(_queue(models.MaintenanceIssue).limit(limit))
+    return result.scalars().all()
+
+# Take the next issue off the queue; 204 when there is nothing to do.
+# Concurrent claims never get the same issue.
+@router.post("/queue/claim", response_model=schemas.MaintenanceIssue, responses={204: {"description": "Queue is empty"}})
+async def claim_issue(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_manager)
+):
+    issue_id = await _claim_next_issue(db, current_user.id)
+    if issue_id is None:
+        await db.commit()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    db_issue = await _get_issue(db, issue_id)
+    await notify(db, db_issue.reporter_id, f"Maintenance issue #{db_issue.id} ({db_issue.title}) is now in_progress")
+    await db.commit()
+    return db_issue
+
+# Get maintenance issue by ID
+@router.get("/{issue_id}", response_model=schemas.MaintenanceIssue)
+async def read_issue(
+    issue_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    return await _get_issue_for_user(db, issue_id, current_user)
+
+# Update maintenance issue
+@router.put("/{issue_id}", response_model=schemas.MaintenanceIssue)
+async def update_issue(
+    issue_id: int,
+    issue: schemas.MaintenanceIssueUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_issue = await _get_issue_for_user(db, issue_id, current_user)
+
+    # Only managers and the assignee can change status
+    issue_data = issue.dict(exclude_unset=True)
+    if "status" in issue_data and current_user.role not in MANAGER_ROLES and current_user.id != db_issue.assignee_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to change status"
+        )
+
+    old_status = db_issue.status
+    for key, value in issue_data.items():
+        if key in ("status", "priority"):
+            # Every issue keeps a status and a priority; null leaves them as they are
+            if value is None:
+                continue
+            value = value.value
+        setattr(db_issue, key, value)
+    # Back in the queue, for anyone to claim
+    if db_issue.status == models.IssueStatus.OPEN.value:
+        db_issue.assignee_id = None
+        db_issue.claimed_at = None
+    if db_issue.status != old_status:
+        await notify(db, db_issue.reporter_id, f"Maintenance issue #{db_issue.id} ({db_issue.title}) is now {db_issue.status}")
+    await db.commit()
+    await db.refresh(db_issue)
+    return db_issue
+
+# Delete maintenance issue (for admin)
+@router.delete("/{issue_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_issue(
+    issue_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    db_issue = await _get_issue(db, issue_id)
+    await db.delete(db_issue)
+    await db.commit()
+    return None
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+
+from .. import schemas, auth
+from ..database import get_async_db
+from ..search import SEARCH_MAX_RESULTS, SEARCH_SOURCES, search
+
+router = APIRouter()
+
+# Ranked full-text search over expense descriptions, maintenance issues and
+# education activities. Employees only find their own expenses.
+@router.get("/", response_model=List[schemas.SearchResult])
+async def search_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[List[str]] = Query(None, alias="type"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    unknown = set(types or ()) - SEARCH_SOURCES.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown type: {', '.join(sorted(unknown))}; expected one of {', '.join(SEARCH_SOURCES)}"
+        )
+    if skip + limit > SEARCH_MAX_RESULTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search results are limited to the first {SEARCH_MAX_RESULTS}; refine the query"
+        )
+    rows = await search(
+        db, q, current_user, types=types, status=status_filter, date_from=date_from, date_to=date_to,
+        skip=skip, limit=limit,
+    )
+    return [schemas.SearchResult(**row._mapping) for row in rows]
@@ -0,0 +1,242 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date, timedelta
+import logging
+
+from .. import models, schemas, auth
+from ..absences import (
+    ABSENCE_HISTOGRAM_MAX_DAYS,
+    absence_histogram,
+    absence_intervals_query,
+    leave_overlap_conditions,
+)
+from ..database import get_async_db
+from ..pagination import paginate_async, NEXT_CURSOR_HEADER
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Roles that may see and approve other people's sick leave
+MANAGER_ROLES = ("admin", "manager")
+
+def _validate_dates(start_date, end_date):
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date"
+        )
+
+# Managers only see their own department, and nothing without one; admins
+# see any department, or all
+def _team_department(current_user, department: Optional[str]):
+    if current_user.role == "admin":
+        return department
+    own_department = getattr(current_user, "department", None)
+    if own_department is None or (department is not None and department != own_department):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions for this department"
+        )
+    return own_department
+
+# Default calendar window: the current week, Monday to Sunday
+def _window(start: Optional[date], end: Optional[date]):
+    if start is None:
+        today = date.today()
+        start = today - timedelta(days=today.weekday())
+    if end is None:
+        end = start + timedelta(days=6)
+    _validate_dates(start, end)
+    return start, end
+
+# Create a new sick leave
+@router.post("/", response_model=schemas.SickLeave, status_code=status.HTTP_201_CREATED)
+async def create_sick_leave(
+    sick_leave: schemas.SickLeaveCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    _validate_dates(sick_leave.start_date, sick_leave.end_date)
+    db_sick_leave = models.SickLeave(
+        user_id=current_user.id,
+        start_date=sick_leave.start_date,
+        end_date=sick_leave.end_date,
+        reason=sick_leave.reason,
+        document_url=sick_leave.document_url,
+        status=models.RequestStatus.PENDING.value,
+    )
+    db.add(db_sick_leave)
+    await db.commit()
+    await db.refresh(db_sick_leave)
+    return db_sick_leave
+
+# Get all sick leaves (for admin)
+@router.get("/", response_model=List[schemas.SickLeave])
+async def read_sick_leaves(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    query = select(models.SickLeave)
+    if status:
+        query = query.where(models.SickLeave.status == status)
+    sick_leaves, next_cursor = await paginate_async(db, query, models.SickLeave, skip=skip, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return sick_leaves
+
+# Get sick leaves for current user
+@router.get("/me", response_model=List[schemas.SickLeave])
+async def read_my_sick_leaves(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    query = select(models.SickLeave).where(models.SickLeave.user_id == current_user.id)
+    sick_leaves, next_cursor = await paginate_async(db, query, models.SickLeave, skip=skip, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return sick_leaves
+
+# Who is out between start and end (inclusive days, default this week)
+@router.get("/calendar", response_model=List[schemas.SickLeaveCalendarEntry])
+async def read_calendar(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    department: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_manager)
+):
+    start, end = _window(start, end)
+    department = _team_department(current_user, department)
+    query = (
+        select(
+            models.SickLeave.id,
+            models.SickLeave.user_id,
+            models.User.first_name,
+            models.User.last_name,
+            models.User.department,
+            models.SickLeave.start_date,
+            models.SickLeave.end_date,
+            models.SickLeave.status,
+        )
+        .join(models.User, models.User.id == models.SickLeave.user_id)
+        .where(*leave_overlap_conditions(start, end))
+        .order_by(models.SickLeave.start_date, models.SickLeave.id)
+    )
+    if department is not None:
+        query = query.where(models.User.department == department)
+    result = await db.execute(query)
+    return [schemas.SickLeaveCalendarEntry(**row._mapping) for row in result.all()]
+
+# People absent per day between start and end, e.g. for a team over a quarter.
+# One query fetches the overlapping leaves and a sweep line counts them per day.
+@router.get("/histogram", response_model=List[schemas.AbsenceDay])
+async def read_absence_histogram(
+    start: date,
+    end: date,
+    department: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_manager)
+):
+    _validate_dates(start, end)
+    if (end - start).days + 1 > ABSENCE_HISTOGRAM_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Histograms may span at most {ABSENCE_HISTOGRAM_MAX_DAYS} days"
+        )
+    department = _team_department(current_user, department)
+    result = await db.execute(absence_intervals_query(start, end, department))
+    return [
+        schemas.AbsenceDay(date=day, absent=absent)
+        for day, absent in absence_histogram(result.all(), start, end)
+    ]
+
+async def _get_sick_leave_for_user(db, sick_leave_id: int, current_user):
+    db_sick_leave = await db.get(models.SickLeave, sick_leave_id)
+    if db_sick_leave is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sick leave not found"
+        )
+    if db_sick_leave.user_id == current_user.id or current_user.role == "admin":
+        return db_sick_leave
+    # Managers only handle leave of people in their own department
+    if current_user.role in MANAGER_ROLES:
+        owner = await db.get(models.User, db_sick_leave.user_id)
+        department = getattr(current_user, "department", None)
+        if owner is not None and department is not None and owner.department == department:
+            return db_sick_leave
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Not enough permissions"
+    )
+
+# Get sick leave by ID
+@router.get("/{sick_leave_id}", response_model=schemas.SickLeave)
+async def read_sick_leave(
+    sick_leave_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    return await _get_sick_leave_for_user(db, sick_leave_id, current_user)
+
+# Update sick leave
+@router.put("/{sick_leave_id}", response_model=schemas.SickLeave)
+async def update_sick_leave(
+    sick_leave_id: int,
+    sick_leave: schemas.SickLeaveUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_sick_leave = await _get_sick_leave_for_user(db, sick_leave_id, current_user)
+
+    # Dates and status are never cleared; null leaves them as they are
+    sick_leave_data = {
+        key: value for key, value in sick_leave.dict(exclude_unset=True).items()
+        if value is not None or key not in ("start_date", "end_date", "status")
+    }
+
+    # Only managers and admins can change status
+    if current_user.role not in MANAGER_ROLES and "status" in sick_leave_data:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to change status"
+        )
+    # ...and managers not on their own leave
+    if "status" in sick_leave_data and db_sick_leave.user_id == current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to change the status of your own sick leave"
+        )
+    _validate_dates(
+        sick_leave_data.get("start_date", db_sick_leave.start_date),
+        sick_leave_data.get("end_date", db_sick_leave.end_date),
+    )
+
+    for key, value in sick_leave_data.items():
+        setattr(db_sick_leave, key, value)
+    await db.commit()
+    await db.refresh(db_sick_leave)
+    return db_sick_leave
+
+# Delete sick leave
+@router.delete("/{sick_leave_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_sick_leave(
+    sick_leave_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_sick_leave = await _get_sick_leave_for_user(db, sick_leave_id, current_user)
+    await db.delete(db_sick_leave)
+    await db.commit()
+    return None
@@ -0,0 +1,269 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from datetime import datetime
+import logging
+
+from .. import models, schemas, auth
+from ..database import get_async_db
+from ..notifications import notify
+from ..pagination import paginate_async, NEXT_CURSOR_HEADER
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Travel requests that no longer count towards the budget
+CLOSED_STATUSES = (models.RequestStatus.REJECTED.value, models.RequestStatus.CANCELLED.value)
+
+# Requests are always returned with their bookings. selectinload fetches the
+# bookings of a whole page in one extra query instead of one per request.
+def _travel_requests():
+    return select(models.TravelRequest).options(selectinload(models.TravelRequest.bookings))
+
+# 'YYYY-MM' of a datetime column, in the dialect's own function
+def _month(column, dialect_name: str):
+    if dialect_name in ("mysql", "mariadb"):
+        return func.date_format(column, "%Y-%m")
+    return func.strftime("%Y-%m", column)
+
+async def _get_travel_request_for_user(db, travel_request_id: int, current_user):
+    result = await db.execute(_travel_requests().where(models.TravelRequest.id == travel_request_id))
+    db_travel_request = result.scalar_one_or_none()
+    if db_travel_request is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Travel request not found"
+        )
+    if current_user.role != "admin" and db_travel_request.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return db_travel_request
+
+# Create a new travel request
+@router.post("/", response_model=schemas.TravelRequestDetail, status_code=status.HTTP_201_CREATED)
+async def create_travel_request(
+    travel_request: schemas.TravelRequestCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    if travel_request.return_date < travel_request.departure_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="return_date must not be before departure_date"
+        )
+    db_travel_request = models.TravelRequest(
+        **travel_request.dict(), user_id=current_user.id, status=models.RequestStatus.PENDING.value
+    )
+    db.add(db_travel_request)
+    await db.commit()
+    return await _get_travel_request_for_user(db, db_travel_request.id, current_user)
+
+# Get all travel requests (for admin)
+@router.get("/", response_model=List[schemas.TravelRequestDetail])
+async def read_travel_requests(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    destination: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    query = _travel_requests()
+    if status:
+        query = query.where(models.TravelRequest.status == status)
+    if destination:
+        query = query.where(models.TravelRequest.destination == destination)
+    travel_requests, next_cursor = await paginate_async(
+        db, query, models.TravelRequest, skip=skip, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return travel_requests
+
+# Get travel requests for current user
+@router.get("/me", response_model=List[schemas.TravelRequestDetail])
+async def read_my_travel_requests(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    query = _travel_requests().where(models.TravelRequest.user_id == current_user.id)
+    if status:
+        query = query.where(models.TravelRequest.status == status)
+    travel_requests, next_cursor = await paginate_async(
+        db, query, models.TravelRequest, skip=skip, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return travel_requests
+
+# Budget (estimated cost) against actual booking spend per destination and
+# departure month (for admin). Booking costs are summed per request in a
+# subquery first, so a request with several bookings counts its estimate once.
+@router.get("/budget", response_model=List[schemas.TravelBudgetRow])
+async def read_travel_budget(
+    departure_from: Optional[datetime] = None,
+    departure_to: Optional[datetime] = None,
+    destination: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_admin)
+):
+    booking_costs = (
+        select(
+            models.TravelBooking.travel_request_id,
+            func.sum(models.TravelBooking.cost).label("cost"),
+        )
+        .group_by(models.TravelBooking.travel_request_id)
+        .subquery()
+    )
+    month = _month(models.TravelRequest.departure_date, db.bind.dialect.name).label("month")
+    estimated = func.coalesce(func.sum(models.TravelRequest.estimated_cost), 0.0)
+    actual = func.coalesce(func.sum(booking_costs.c.cost), 0.0)
+    query = (
+        select(
+            models.TravelRequest.destination,
+            month,
+            func.count().label("request_count"),
+            estimated.label("estimated_cost"),
+            actual.label("actual_cost"),
+            (actual - estimated).label("variance"),
+        )
+        .outerjoin(booking_costs, booking_costs.c.travel_request_id == models.TravelRequest.id)
+        .where(models.TravelRequest.status.notin_(CLOSED_STATUSES))
+        .group_by(models.TravelRequest.destination, month)
+        .order_by(month, models.TravelRequest.destination)
+    )
+    if departure_from:
+        query = query.where(models.TravelRequest.departure_date >= departure_from)
+    if departure_to:
+        query = query.where(models.TravelRequest.departure_date < departure_to)
+    if destination:
+        query = query.where(models.TravelRequest.destination == destination)
+    result = await db.execute(query)
+    return [schemas.TravelBudgetRow(**row._mapping) for row in result.all()]
+
+# Add a booking to a travel request
+@router.post("/bookings", response_model=schemas.TravelBooking, status_code=status.HTTP_201_CREATED)
+async def create_travel_booking(
+    booking: schemas.TravelBookingCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    await _get_travel_request_for_user(db, booking.travel_request_id, current_user)
+    db_booking = models.TravelBooking(**booking.dict())
+    db.add(db_booking)
+    await db.commit()
+    await db.refresh(db_booking)
+    return db_booking
+
+async def _get_booking_for_user(db, booking_id: int, current_user):
+    result = await db.execute(
+        select(models.TravelBooking)
+        .options(selectinload(models.TravelBooking.travel_request))
+        .where(models.TravelBooking.id == booking_id)
+    )
+    db_booking = result.scalar_one_or_none()
+    if db_booking is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking not found"
+        )
+    if current_user.role != "admin" and db_booking.travel_request.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return db_booking
+
+# Update booking
+@router.put("/bookings/{booking_id}", response_model=schemas.TravelBooking)
+async def update_travel_booking(
+    booking_id: int,
+    booking: schemas.TravelBookingUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_booking = await _get_booking_for_user(db, booking_id, current_user)
+    for key, value in booking.dict(exclude_unset=True).items():
+        setattr(db_booking, key, value)
+    await db.commit()
+    await db.refresh(db_booking)
+    return db_booking
+
+# Delete booking
+@router.delete("/bookings/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_travel_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_booking = await _get_booking_for_user(db, booking_id, current_user)
+    await db.delete(db_booking)
+    await db.commit()
+    return None
+
+# Get travel request by ID
+@router.get("/{travel_request_id}", response_model=schemas.TravelRequestDetail)
+async def read_travel_request(
+    travel_request_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    return await _get_travel_request_for_user(db, travel_request_id, current_user)
+
+# Update travel request
+@router.put("/{travel_request_id}", response_model=schemas.TravelRequestDetail)
+async def update_travel_request(
+    travel_request_id: int,
+    travel_request: schemas.TravelRequestUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_travel_request = await _get_travel_request_for_user(db, travel_request_id, current_user)
+
+    # Only admins can change status
+    travel_request_data = travel_request.dict(exclude_unset=True)
+    if current_user.role != "admin" and "status" in travel_request_data:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to change status"
+        )
+
+    old_status = db_travel_request.status
+    for key, value in travel_request_data.items():
+        # Every request keeps a status; null leaves it as it is
+        if key == "status" and value is None:
+            continue
+        setattr(db_travel_request, key, value)
+    new_status = schemas.RequestStatus(db_travel_request.status).value
+    if new_status != old_status:
+        await notify(
+            db, db_travel_request.user_id,
+            f"Travel request #{db_travel_request.id} to {db_travel_request.destination} is now {new_status}",
+        )
+    await db.commit()
+    return await _get_travel_request_for_user(db, travel_request_id, current_user)
+
+# Delete travel request together with its bookings
+@router.delete("/{travel_request_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_travel_request(
+    travel_request_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    db_travel_request = await _get_travel_request_for_user(db, travel_request_id, current_user)
+    for db_booking in db_travel_request.bookings:
+        await db.delete(db_booking)
+    await db.delete(db_travel_request)
+    await db.commit()
+    return None
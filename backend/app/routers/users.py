@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_async_db
+from ..pagination import paginate_async, NEXT_CURSOR_HEADER
+from ..response_cache import response_cache
 
 router = APIRouter()
 
 # Create a new user
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user with this email already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -20,7 +24,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username is already taken
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+    db_user = await db.scalar(select(models.User).where(models.User.username == user.username))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,7 +32,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await auth.get_password_hash_async(user.password)
     db_user = models.User(
         email=user.email,
         username=user.username,
@@ -36,107 +40,169 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         first_name=user.first_name,
         last_name=user.last_name,
         role=user.role,
+        department=user.department,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    await response_cache.invalidate("users")
     return db_user
 
 # Token authentication
 @router.post("/token", response_model=auth.Token)
-async def login_for_access_token(form_data: auth.OAuth2PasswordBearer = Depends()):
-    # In a real app, authenticate the user against the database
-    # For now, just return a dummy token
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": "user@example.com", "role": "admin"}, 
-        expires_delta=access_token_expires
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect username or password",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Users may sign in with either their username or their email
+    db_user = await db.scalar(select(models.User).where(
+        or_(models.User.username == form_data.username, models.User.email == form_data.username)
+    ))
+    if db_user is None or not db_user.is_active:
+        raise credentials_exception
+
+    valid, new_hash = await auth.verify_and_update_password(form_data.password, db_user.hashed_password)
+    if not valid:
+        raise credentials_exception
+
+    # Upgrade hashes made with an old bcrypt cost while we have the plain password
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+
+    return await auth.create_tokens(db, db_user)
+
+# Exchange a refresh token for a new access and refresh token pair
+@router.post("/token/refresh", response_model=auth.Token)
+async def refresh_access_token(body: auth.RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    return await auth.rotate_refresh_token(db, body.refresh_token)
+
+# Log out: revoke this access token and the login it came from, in every worker
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(auth.oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    payload = auth.decode_token(token)
+    if payload.get("jti"):
+        await auth.revoke(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    if payload.get("fam"):
+        await auth.revoke_family(db, payload["fam"])
+    await db.commit()
+    return None
 
 # Get current user
 @router.get("/me", response_model=schemas.User)
-async def read_users_me(current_user = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    # In a real app, fetch the user from the database
-    # For now, return dummy data
-    return {
-        "id": 1,
-        "email": "user@example.com",
-        "username": "testuser",
-        "first_name": "Test",
-        "last_name": "User",
-        "role": "admin",
-        "is_active": True,
-        "created_at": "2023-01-01T00:00:00",
-        "updated_at": "2023-01-01T00:00:00"
-    }
-
-# Get all users (admin only)
+async def read_users_me(current_user = Depends(auth.get_current_user), db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.get(models.User, current_user.id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return db_user
+
+# Get all users (admin only), cached and answered with 304 when unchanged
 @router.get("/", response_model=List[schemas.User])
 async def read_users(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_admin)
 ):
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+    async def load():
+        users, next_cursor = await paginate_async(db, select(models.User), models.User, skip=skip, limit=limit, cursor=cursor)
+        return users, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
 
-# Get user by ID
+    return await response_cache.respond(request, "users", current_user.role, List[schemas.User], load)
+
+# Get user by ID, cached and answered with 304 when unchanged
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db), current_user = Depends(auth.get_current_user)):
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
-    if db_user is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return db_user
+async def read_user(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(auth.get_current_user)
+):
+    async def load():
+        db_user = await db.get(models.User, user_id)
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return db_user, {}
+
+    return await response_cache.respond(request, "users", current_user.role, schemas.User, load)
 
 # Update user
 @router.put("/{user_id}", response_model=schemas.User)
-def update_user(
+async def update_user(
     user_id: int, 
     user: schemas.UserUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_user)
 ):
     # Only admins can update other users
-    if current_user.role != "admin" and current_user.username != user_id:
+    if current_user.role != "admin" and current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = await db.get(models.User, user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
+    # Only admins can change roles, departments or (de)activate accounts
     user_data = user.dict(exclude_unset=True)
+    if current_user.role != "admin" and ({"role", "department", "is_active"} & user_data.keys()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to change role, department or status"
+        )
+
     for key, value in user_data.items():
         setattr(db_user, key, value)
+    # A deactivated user is logged out everywhere at once
+    if user_data.get("is_active") is False:
+        await auth.revoke_user_tokens(db, db_user.id)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    auth.invalidate_user(db_user.username)
+    await response_cache.invalidate("users")
     return db_user
 
 # Delete user (admin only)
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(auth.get_current_admin)
 ):
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = await db.get(models.User, user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    db.delete(db_user)
-    db.commit()
+    await auth.revoke_user_tokens(db, db_user.id)
+    await db.execute(delete(models.RefreshToken).where(models.RefreshToken.user_id == db_user.id))
+    await db.delete(db_user)
+    await db.commit()
+    auth.invalidate_user(db_user.username)
+    await response_cache.invalidate("users")
     return None
\ No newline at end of file
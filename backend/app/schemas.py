@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 import enum
 
 # Enums
@@ -15,6 +15,23 @@ class RequestStatus(str, enum.Enum):
     REJECTED = "rejected"
     CANCELLED = "cancelled"
 
+class RegistrationStatus(str, enum.Enum):
+    REGISTERED = "registered"
+    WAITLISTED = "waitlisted"
+    CANCELLED = "cancelled"
+
+class IssuePriority(str, enum.Enum):
+    CRITICAL = "critical"
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+
+class IssueStatus(str, enum.Enum):
+    OPEN = "open"
+    IN_PROGRESS = "in_progress"
+    RESOLVED = "resolved"
+    CLOSED = "closed"
+
 # User schemas
 class UserBase(BaseModel):
     email: EmailStr
@@ -22,6 +39,7 @@ class UserBase(BaseModel):
     first_name: str
     last_name: str
     role: UserRole = UserRole.EMPLOYEE
+    department: Optional[str] = None
 
 class UserCreate(UserBase):
     password: str
@@ -31,6 +49,7 @@ class UserUpdate(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     role: Optional[UserRole] = None
+    department: Optional[str] = None
     is_active: Optional[bool] = None
 
 class User(UserBase):
@@ -69,6 +88,36 @@ class Expense(ExpenseBase):
     class Config:
         orm_mode = True
 
+class ExpenseSummary(BaseModel):
+    status: str
+    count: int
+    total_amount: float
+
+    class Config:
+        orm_mode = True
+
+# Batch expense schemas
+class ExpenseBatchCreate(BaseModel):
+    items: List[ExpenseCreate] = Field(..., min_length=1, max_length=1000)
+
+class ExpenseStatusTransition(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=5000)
+    status: RequestStatus
+
+class ExpenseBatchItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class ReceiptUpload(BaseModel):
+    receipt_id: int
+    receipt_url: str
+    sha256: str
+    size: int
+    status: str
+    deduplicated: bool
+
 # Sick Leave schemas
 class SickLeaveBase(BaseModel):
     start_date: datetime
@@ -96,6 +145,20 @@ class SickLeave(SickLeaveBase):
     class Config:
         orm_mode = True
 
+class SickLeaveCalendarEntry(BaseModel):
+    id: int
+    user_id: int
+    first_name: str
+    last_name: str
+    department: Optional[str] = None
+    start_date: datetime
+    end_date: datetime
+    status: RequestStatus
+
+class AbsenceDay(BaseModel):
+    date: date
+    absent: int
+
 # Education Activity schemas
 class EducationActivityBase(BaseModel):
     title: str
@@ -103,7 +166,7 @@ class EducationActivityBase(BaseModel):
     start_date: datetime
     end_date: datetime
     location: str
-    capacity: Optional[int] = None
+    capacity: Optional[int] = Field(None, ge=0)
 
 class EducationActivityCreate(EducationActivityBase):
     pass
@@ -114,10 +177,11 @@ class EducationActivityUpdate(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     location: Optional[str] = None
-    capacity: Optional[int] = None
+    capacity: Optional[int] = Field(None, ge=0)
 
 class EducationActivity(EducationActivityBase):
     id: int
+    seats_remaining: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -134,8 +198,10 @@ class ActivityRegistrationCreate(ActivityRegistrationBase):
 
 class ActivityRegistration(ActivityRegistrationBase):
     id: int
-    status: RequestStatus
+    status: RegistrationStatus
     created_at: datetime
+    # Place in the waitlist, 1 being next in line
+    waitlist_position: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -192,12 +258,21 @@ class AssetBooking(AssetBookingBase):
     class Config:
         orm_mode = True
 
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+class AssetAvailability(BaseModel):
+    asset_id: int
+    name: str
+    free_slots: List[TimeSlot]
+
 # Maintenance Issue schemas
 class MaintenanceIssueBase(BaseModel):
     title: str
     description: str
     location: str
-    priority: str
+    priority: IssuePriority = IssuePriority.MEDIUM
 
 class MaintenanceIssueCreate(MaintenanceIssueBase):
     image_url: Optional[str] = None
@@ -206,14 +281,16 @@ class MaintenanceIssueUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     location: Optional[str] = None
-    priority: Optional[str] = None
-    status: Optional[str] = None
+    priority: Optional[IssuePriority] = None
+    status: Optional[IssueStatus] = None
     image_url: Optional[str] = None
 
 class MaintenanceIssue(MaintenanceIssueBase):
     id: int
     reporter_id: int
-    status: str
+    status: IssueStatus
+    assignee_id: Optional[int] = None
+    claimed_at: Optional[datetime] = None
     image_url: Optional[str] = None
     created_at: datetime
     updated_at: datetime
@@ -275,4 +352,27 @@ class TravelBooking(TravelBookingBase):
     updated_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# Travel request with its bookings and what they actually cost
+class TravelRequestDetail(TravelRequest):
+    bookings: List[TravelBooking] = []
+    actual_cost: float
+
+class TravelBudgetRow(BaseModel):
+    destination: str
+    month: str
+    request_count: int
+    estimated_cost: float
+    actual_cost: float
+    variance: float
+
+# Full-text search hit; snippet marks the matched terms with [ and ]
+class SearchResult(BaseModel):
+    type: str
+    id: int
+    title: Optional[str] = None
+    snippet: Optional[str] = None
+    status: Optional[str] = None
+    date: Optional[datetime] = None
+    score: float
\ No newline at end of file
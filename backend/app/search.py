@@ -0,0 +1,178 @@
+from sqlalchemy import DDL, column, event, func, literal, literal_column, or_, select, table, union_all
+from sqlalchemy.dialects.mysql import match
+from datetime import datetime
+from typing import List, Optional
+import re
+
+from . import models
+
+# Full-text search over free-text columns. SQLite (development and tests) uses
+# external-content FTS5 tables kept in step with their source table by
+# triggers; MySQL uses FULLTEXT indexes, which InnoDB maintains itself. The
+# indexes live outside Base.metadata: they are created by the DDL events below
+# for create_all and by migration 0007 for migrated databases.
+#
+# SQLite batch migrations recreate tables, which drops their triggers; a
+# migration that batch-alters a searchable table must recreate them.
+
+# Deepest result (skip + limit) a search may ask for; ranking needs every
+# earlier result, so deep pages get slower
+SEARCH_MAX_RESULTS = 1000
+
+class SearchSource:
+    def __init__(self, name, model, columns, title, date, status=None, owners=(), see_all_roles=("admin",)):
+        self.name = name
+        self.model = model
+        self.table = model.__tablename__
+        self.fts_table = f"{self.table}_fts"
+        self.fulltext_index = f"ix_{self.table}_fulltext"
+        # Indexed column names, in FTS column order
+        self.columns = columns
+        self.title = title
+        self.date = date
+        self.status = status
+        # When set, users only find rows where one of these columns is their id,
+        # unless their role is in see_all_roles
+        self.owners = owners
+        self.see_all_roles = see_all_roles
+
+    def sqlite_ddl(self):
+        cols = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{c}" for c in self.columns)
+        old_values = ", ".join(f"old.{c}" for c in self.columns)
+        fts = self.fts_table
+        delete_old = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});"
+        insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+        return [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{self.table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {self.table} BEGIN {insert_new} END",
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {self.table} BEGIN {delete_old} END",
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {cols} ON {self.table} BEGIN {delete_old} {insert_new} END",
+        ]
+
+    def mysql_ddl(self):
+        return [f"CREATE FULLTEXT INDEX {self.fulltext_index} ON {self.table} ({', '.join(self.columns)})"]
+
+SEARCH_SOURCES = {
+    source.name: source
+    for source in (
+        SearchSource(
+            "expense", models.Expense, ["description"], title="category", date="created_at",
+            status="status", owners=("user_id",),
+        ),
+        # Scoped like the maintenance router: reporters, assignees and managers
+        SearchSource(
+            "maintenance", models.MaintenanceIssue, ["title", "description"], title="title", date="created_at",
+            status="status", owners=("reporter_id", "assignee_id"), see_all_roles=("admin", "manager"),
+        ),
+        SearchSource(
+            "activity", models.EducationActivity, ["title", "description"], title="title", date="start_date",
+        ),
+    )
+}
+
+# Tables and indexes that autogenerate must not compare against Base.metadata
+def is_search_object(name: str) -> bool:
+    return any(
+        name == source.fulltext_index or name == source.fts_table or name.startswith(source.fts_table + "_")
+        for source in SEARCH_SOURCES.values()
+    )
+
+def _create_search_index(source):
+    def create(table, connection, **kw):
+        if connection.dialect.name == "sqlite":
+            statements = source.sqlite_ddl()
+        elif connection.dialect.name in ("mysql", "mariadb"):
+            statements = source.mysql_ddl()
+        else:
+            return
+        for statement in statements:
+            connection.execute(DDL(statement))
+    return create
+
+for _source in SEARCH_SOURCES.values():
+    event.listen(_source.model.__table__, "after_create", _create_search_index(_source))
+
+# Search terms as words; anything else in the input is dropped so user input
+# can never be a syntax error in either engine's query language
+def search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q)
+
+# Every term must match; the last one also as a prefix, for search-as-you-type
+def fts5_query(terms: List[str]) -> str:
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+def mysql_boolean_query(terms: List[str]) -> str:
+    return " ".join(f"+{term}" for term in terms) + "*"
+
+# SELECT of one source's matches with a higher-is-better score, best first
+def source_query(source, dialect_name, terms, user, status=None, date_from=None, date_to=None, limit=20):
+    model = source.model
+    if dialect_name in ("mysql", "mariadb"):
+        score = match(*[getattr(model, c) for c in source.columns], against=mysql_boolean_query(terms)).in_boolean_mode()
+        snippet = func.left(getattr(model, source.columns[-1]), 200)
+        query = select(model.id).where(score)
+    else:
+        fts_table = table(source.fts_table, column("rowid"))
+        fts = literal_column(source.fts_table)
+        score = -func.bm25(fts)
+        snippet = func.snippet(fts, -1, "[", "]", "…", 12)
+        query = (
+            select(model.id)
+            .select_from(fts_table)
+            .join(model.__table__, model.id == fts_table.c.rowid)
+            .where(fts.op("MATCH")(fts5_query(terms)))
+        )
+
+    date = getattr(model, source.date)
+    query = query.add_columns(
+        literal(source.name).label("type"),
+        getattr(model, source.title).label("title"),
+        snippet.label("snippet"),
+        (getattr(model, source.status) if source.status else literal(None)).label("status"),
+        date.label("date"),
+        score.label("score"),
+    )
+    if source.owners and user.role not in source.see_all_roles:
+        query = query.where(or_(*(getattr(model, owner) == user.id for owner in source.owners)))
+    if status:
+        query = query.where(getattr(model, source.status) == status)
+    if date_from:
+        query = query.where(date >= date_from)
+    if date_to:
+        query = query.where(date < date_to)
+    return query.order_by(score.desc(), model.id).limit(limit)
+
+# Ranked matches across sources. Each source contributes its best skip + limit
+# rows and the page is cut from their merge, so scores are compared across
+# sources as the engine reports them.
+async def search(
+    db,
+    q: str,
+    user,
+    types: Optional[List[str]] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 20,
+):
+    terms = search_terms(q)
+    sources = [SEARCH_SOURCES[name] for name in (types or SEARCH_SOURCES)]
+    # Sources without a status column can't match a status filter
+    if status:
+        sources = [source for source in sources if source.status]
+    if not terms or not sources:
+        return []
+
+    depth = skip + limit
+    queries = [
+        source_query(source, db.bind.dialect.name, terms, user, status, date_from, date_to, depth).subquery().select()
+        for source in sources
+    ]
+    merged = union_all(*queries).subquery()
+    result = await db.execute(
+        select(merged).order_by(merged.c.score.desc(), merged.c.type, merged.c.id).offset(skip).limit(limit)
+    )
+    return result.all()
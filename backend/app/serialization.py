@@ -0,0 +1,62 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import List
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # Optional: the direct encoder falls back to json
+    orjson = None
+
+# Opt-in path for large list responses: select only the schema's columns as
+# rows and encode the whole page at once, instead of loading ORM objects and
+# letting the response_model validate them. "off" (the default) keeps the
+# response_model path. "adapter" validates the page in a single TypeAdapter
+# pass; "direct" trusts the column types and encodes the rows straight to JSON
+# (with orjson when it is installed).
+FAST_SERIALIZER = os.getenv("FAST_SERIALIZER", "off")
+
+# Serializer for row-based list responses, or None when the opt-in path is off
+def fast_serializer():
+    return FAST_SERIALIZER if FAST_SERIALIZER in ("adapter", "direct") else None
+
+@lru_cache(maxsize=None)
+def list_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+# Columns of model backing every field of schema, in field order. Schemas with
+# computed or nested fields can't be served from rows.
+def schema_columns(model, schema):
+    columns = model.__table__.columns
+    missing = [name for name in schema.model_fields if name not in columns]
+    if missing:
+        raise ValueError(f"{schema.__name__} fields without a {model.__name__} column: {', '.join(missing)}")
+    return [getattr(model, name) for name in schema.model_fields]
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# JSON array of rows selected with schema_columns
+def encode_rows(rows, schema, serializer: str = None) -> bytes:
+    serializer = serializer or fast_serializer()
+    data = [row._asdict() for row in rows]
+    if serializer == "direct":
+        if orjson is not None:
+            return orjson.dumps(data, default=_default)
+        return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(data))
+
+def rows_response(rows, schema, headers: dict = None, serializer: str = None) -> Response:
+    return Response(content=encode_rows(rows, schema, serializer), media_type="application/json", headers=headers)
@@ -0,0 +1,115 @@
+from jose import jwk
+from typing import Dict, Optional
+import os
+
+# Access tokens carry the id of the key that signed them in their "kid" header,
+# so keys can be rotated without logging everyone out: add the new key, make it
+# active, and keep the old one until the last token it signed has expired.
+#
+# HS256 (default) signs with shared secrets, listed in JWT_SECRET_KEYS as
+# "kid:secret,kid:secret"; without it SECRET_KEY is the only key, as "default".
+# RS256/ES256 sign with private keys read from JWT_KEYS_DIR: <kid>.pem is a
+# private key that can sign, <kid>.pub.pem a public key that only verifies.
+# Other services verify asymmetric tokens with the public keys served at
+# /.well-known/jwks.json. Secrets from JWT_SECRET_KEYS stay valid for
+# verification after moving to an asymmetric algorithm.
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_SECRET_KEYS = os.getenv("JWT_SECRET_KEYS", "")
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "")
+# Key that signs new tokens; defaults to the first secret, or the last private key by name
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")
+
+# Key id of tokens issued before they carried one
+LEGACY_KID = "default"
+
+class SigningKey:
+    def __init__(self, kid: str, algorithm: str, signing_key=None, verifying_key=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        # Key objects are built once; decoding with a PEM would parse it every time
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key if verifying_key is not None else signing_key
+
+    @property
+    def symmetric(self) -> bool:
+        return self.algorithm.startswith("HS")
+
+    @classmethod
+    def from_secret(cls, kid: str, secret: str, algorithm: str = "HS256"):
+        return cls(kid, algorithm, signing_key=secret)
+
+    # A private key signs and verifies; a public key only verifies
+    @classmethod
+    def from_pem(cls, kid: str, pem: str, algorithm: str):
+        key = jwk.construct(pem, algorithm)
+        if key.is_public():
+            return cls(kid, algorithm, verifying_key=key)
+        return cls(kid, algorithm, signing_key=key, verifying_key=key.public_key())
+
+    # Public JWK for other services; None for shared secrets, which must stay private
+    def public_jwk(self) -> Optional[dict]:
+        if self.symmetric:
+            return None
+        return {**self.verifying_key.to_dict(), "kid": self.kid, "use": "sig"}
+
+class KeyRing:
+    def __init__(self, keys, active_kid: str):
+        self.keys: Dict[str, SigningKey] = {key.kid: key for key in keys}
+        active = self.keys.get(active_kid)
+        if active is None or active.signing_key is None:
+            raise ValueError(f"No private key to sign with for kid {active_kid!r}")
+        self.active = active
+
+    def get(self, kid: Optional[str]) -> Optional[SigningKey]:
+        return self.keys.get(kid or LEGACY_KID)
+
+    def jwks(self) -> dict:
+        return {"keys": [jwk for jwk in (key.public_jwk() for key in self.keys.values()) if jwk]}
+
+def _parse_secrets(value: str):
+    secrets = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kid, _, secret = item.partition(":")
+        if not secret:
+            raise ValueError("JWT_SECRET_KEYS entries must be kid:secret")
+        secrets.append((kid, secret))
+    return secrets
+
+def load_key_ring(
+    algorithm: str = None,
+    secret_keys: str = None,
+    keys_dir: str = None,
+    active_kid: str = None,
+    default_secret: str = None,
+) -> KeyRing:
+    algorithm = algorithm or JWT_ALGORITHM
+    secret_keys = JWT_SECRET_KEYS if secret_keys is None else secret_keys
+    keys_dir = JWT_KEYS_DIR if keys_dir is None else keys_dir
+    active_kid = active_kid or JWT_ACTIVE_KID
+
+    secrets = _parse_secrets(secret_keys)
+    if algorithm.startswith("HS"):
+        if not secrets:
+            secrets = [(LEGACY_KID, default_secret)]
+        keys = [SigningKey.from_secret(kid, secret, algorithm) for kid, secret in secrets]
+        return KeyRing(keys, active_kid or keys[0].kid)
+
+    if not keys_dir:
+        raise ValueError(f"JWT_KEYS_DIR must be set for {algorithm}")
+    keys = {kid: SigningKey.from_secret(kid, secret) for kid, secret in secrets}
+    private_kids = []
+    for filename in sorted(os.listdir(keys_dir)):
+        if not filename.endswith(".pem"):
+            continue
+        kid = filename[:-len(".pub.pem")] if filename.endswith(".pub.pem") else filename[:-len(".pem")]
+        # The public half of a key we hold privately adds nothing
+        if kid in private_kids:
+            continue
+        with open(os.path.join(keys_dir, filename)) as f:
+            key = SigningKey.from_pem(kid, f.read(), algorithm)
+        if key.signing_key is not None:
+            private_kids.append(kid)
+        keys[kid] = key
+    if not private_kids and not active_kid:
+        raise ValueError(f"No private key in {keys_dir}")
+    return KeyRing(keys.values(), active_kid or private_kids[-1])
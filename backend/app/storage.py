@@ -0,0 +1,107 @@
+from typing import AsyncIterator
+import asyncio
+import os
+
+# Storage backend for uploaded files: local filesystem in development and
+# tests, Azure Blob Storage in production (RECEIPT_STORAGE_BACKEND=azure)
+STORAGE_BACKEND = os.getenv("RECEIPT_STORAGE_BACKEND", "local")
+STORAGE_DIR = os.getenv("RECEIPT_STORAGE_DIR", "./uploads")
+AZURE_STORAGE_CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+AZURE_STORAGE_CONTAINER = os.getenv("AZURE_STORAGE_CONTAINER")
+
+class StorageBackend:
+    # Write a stream of chunks to key without holding the whole file in memory
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str = None):
+        raise NotImplementedError
+
+    async def read(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str = None):
+        async def single_chunk():
+            yield data
+        await self.put_stream(key, single_chunk(), content_type)
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str = STORAGE_DIR):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def put_stream(self, key, chunks, content_type=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name so readers never see a partial file
+        partial = path + ".part"
+        handle = await asyncio.to_thread(open, partial, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            handle.close()
+            os.remove(partial)
+            raise
+        handle.close()
+        os.replace(partial, path)
+
+    async def read(self, key):
+        with open(self._path(key), "rb") as handle:
+            return await asyncio.to_thread(handle.read)
+
+    async def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+class AzureBlobStorage(StorageBackend):
+    def __init__(self, connection_string: str = AZURE_STORAGE_CONNECTION_STRING, container: str = AZURE_STORAGE_CONTAINER):
+        # Imported here so the SDK is only loaded when Azure storage is configured
+        from azure.storage.blob import BlobServiceClient
+
+        self.container = BlobServiceClient.from_connection_string(connection_string).get_container_client(container)
+
+    async def put_stream(self, key, chunks, content_type=None):
+        from azure.storage.blob import BlobBlock, ContentSettings
+
+        # Stage each chunk as a block and commit the list at the end, so the
+        # blob only appears once the whole upload has arrived
+        blob = self.container.get_blob_client(key)
+        block_ids = []
+        async for chunk in chunks:
+            block_id = f"{len(block_ids):08d}"
+            await asyncio.to_thread(blob.stage_block, block_id, chunk)
+            block_ids.append(BlobBlock(block_id=block_id))
+        await asyncio.to_thread(
+            blob.commit_block_list,
+            block_ids,
+            content_settings=ContentSettings(content_type=content_type) if content_type else None,
+        )
+
+    async def read(self, key):
+        downloader = await asyncio.to_thread(self.container.get_blob_client(key).download_blob)
+        return await asyncio.to_thread(downloader.readall)
+
+    async def delete(self, key):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            await asyncio.to_thread(self.container.get_blob_client(key).delete_blob)
+        except ResourceNotFoundError:
+            pass
+
+_storage = None
+
+# Dependency returning the configured storage backend
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = AzureBlobStorage() if STORAGE_BACKEND == "azure" else LocalStorage()
+    return _storage
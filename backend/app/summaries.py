@@ -0,0 +1,135 @@
+from collections import defaultdict
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import asyncio
+import enum
+import logging
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Totals are floats summed in a different order than a live SUM, so allow rounding noise
+AMOUNT_TOLERANCE = 0.005
+
+# Statuses may arrive as RequestStatus members or as the strings stored in the table
+def _status_key(status):
+    return status.value if isinstance(status, enum.Enum) else status
+
+# Accumulates summary changes for one transaction, keyed by (user_id, status)
+class ExpenseSummaryDelta:
+    def __init__(self):
+        self.changes = defaultdict(lambda: [0, 0.0])
+
+    def add(self, user_id, status, amount):
+        if user_id is None or status is None:
+            return
+        change = self.changes[(user_id, _status_key(status))]
+        change[0] += 1
+        change[1] += amount or 0.0
+
+    def remove(self, user_id, status, amount):
+        if user_id is None or status is None:
+            return
+        change = self.changes[(user_id, _status_key(status))]
+        change[0] -= 1
+        change[1] -= amount or 0.0
+
+# Upsert that adds to the counters, in the dialect's own syntax
+def _increment_statement(dialect_name, rows):
+    table = models.ExpenseSummary.__table__
+    if dialect_name == "mysql" or dialect_name == "mariadb":
+        stmt = mysql_insert(table).values(rows)
+        return stmt.on_duplicate_key_update(
+            count=table.c.count + stmt.inserted.count,
+            total_amount=table.c.total_amount + stmt.inserted.total_amount,
+        )
+    stmt = sqlite_insert(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.status],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+        },
+    )
+
+# Apply the accumulated changes in the caller's transaction. The counters are
+# incremented in place, so concurrent transactions never overwrite each other.
+async def apply_expense_summary_delta(db, delta: ExpenseSummaryDelta):
+    rows = [
+        {"user_id": user_id, "status": status, "count": count, "total_amount": amount}
+        for (user_id, status), (count, amount) in sorted(delta.changes.items())
+        if count or amount
+    ]
+    if rows:
+        await db.execute(_increment_statement(db.bind.dialect.name, rows))
+
+def _live_summary_query():
+    return (
+        select(
+            models.Expense.user_id,
+            models.Expense.status,
+            func.count().label("count"),
+            func.coalesce(func.sum(models.Expense.amount), 0.0).label("total_amount"),
+        )
+        .where(models.Expense.user_id.isnot(None), models.Expense.status.isnot(None))
+        .group_by(models.Expense.user_id, models.Expense.status)
+    )
+
+# Compare the aggregate table with a live GROUP BY over expenses.
+# Returns one entry per (user_id, status) that disagrees.
+async def find_expense_summary_drift(db):
+    live = {
+        (row.user_id, row.status): (row.count, row.total_amount)
+        for row in (await db.execute(_live_summary_query())).all()
+    }
+    stored = {
+        (row.user_id, row.status): (row.count, row.total_amount)
+        for row in (await db.execute(select(models.ExpenseSummary))).scalars().all()
+    }
+    drift = []
+    for key in sorted(live.keys() | stored.keys()):
+        expected = live.get(key, (0, 0.0))
+        actual = stored.get(key, (0, 0.0))
+        if expected[0] != actual[0] or abs(expected[1] - actual[1]) > AMOUNT_TOLERANCE:
+            drift.append({
+                "user_id": key[0],
+                "status": key[1],
+                "expected_count": expected[0],
+                "actual_count": actual[0],
+                "expected_total": expected[1],
+                "actual_total": actual[1],
+            })
+    return drift
+
+# Rebuild the aggregate table from scratch in one transaction
+async def rebuild_expense_summaries(db):
+    await db.execute(delete(models.ExpenseSummary))
+    await db.execute(
+        insert(models.ExpenseSummary).from_select(
+            ["user_id", "status", "count", "total_amount"], _live_summary_query()
+        )
+    )
+    await db.commit()
+
+# Reconciliation job: report any drift, then rebuild
+async def reconcile_expense_summaries(db):
+    drift = await find_expense_summary_drift(db)
+    for entry in drift:
+        logger.warning("Expense summary drift: %s", entry)
+    await rebuild_expense_summaries(db)
+    logger.info("Expense summaries rebuilt, %d drifted entries corrected", len(drift))
+    return drift
+
+async def _main():
+    from .database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as db:
+        await reconcile_expense_summaries(db)
+    await async_engine.dispose()
+
+# Run from the backend directory, e.g. nightly: python -m app.summaries
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(_main())
@@ -0,0 +1,87 @@
+"""Local stand-in for the Teams incoming webhook.
+
+Records every JSON post and answers 200, or an error status for the next
+posts after fail_next(n, status), so notifications can be exercised without Teams. Run it for
+development and point TEAMS_WEBHOOK_URL at it:
+
+    python -m app.webhook_stub --port 9000
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import threading
+
+class WebhookStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, echo: bool = False):
+        self.messages = []
+        self.echo = echo
+        self._failures = 0
+        self._failure_status = 500
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+    def fail_next(self, count: int = 1, status: int = 500):
+        with self._lock:
+            self._failures = count
+            self._failure_status = status
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    failing = stub._failures > 0
+                    if failing:
+                        stub._failures -= 1
+                    else:
+                        stub.messages.append(json.loads(body or b"null"))
+                    status = stub._failure_status if failing else 200
+                if stub.echo:
+                    print(f"{status} {body.decode(errors='replace')}", flush=True)
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.end_headers()
+                self.wfile.write(b"error" if failing else b"1")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    stub = WebhookStub(args.host, args.port, echo=True)
+    print(f"Listening on {stub.url}", flush=True)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Background job worker.
+
+Run from the backend directory, as many processes as needed:
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+import signal
+
+from .database import AsyncSessionLocal, async_engine
+from .jobs import Worker
+from . import notifications  # noqa: F401 - registers the notification handler
+
+logger = logging.getLogger(__name__)
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    # Finish the jobs in hand on SIGTERM/SIGINT instead of abandoning them until the lock times out
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await Worker(AsyncSessionLocal).run(stop)
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""Requests per second for blocking vs async sessions under mixed read/write load.
+
+The blocking variant is the pre-port pattern: an async def handler calling a
+sync Session, which holds the event loop for the whole query. The async variant
+is the real expenses router on get_async_db. Both run in-process through
+httpx's ASGI transport against the same database.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_async_sessions --concurrency 32 --requests 2000
+
+Point --database-url at a MySQL server to see the effect of real network round-trips.
+"""
+from fastapi import FastAPI
+from sqlalchemy import insert
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import httpx
+import logging
+import os
+import random
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="sync SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed-rows", type=int, default=20000)
+    return parser.parse_args()
+
+USERS = 200
+BENCH_USER = SimpleNamespace(id=1, username="bench", role="employee")
+
+# The pre-port handlers, kept here only for comparison. The session is opened in
+# the handler rather than through Depends(get_db): get_db's teardown runs in the
+# threadpool and needs the event loop these handlers block, so under load the
+# pool starves until its timeout and the run stalls instead of finishing.
+def make_blocking_app():
+    from app import models, schemas
+    from app.database import SessionLocal
+
+    blocking_app = FastAPI()
+
+    @blocking_app.get("/api/expenses/me")
+    async def blocking_read_my_expenses(limit: int = 100):
+        with SessionLocal() as db:
+            query = db.query(models.Expense).filter(models.Expense.user_id == BENCH_USER.id)
+            rows = query.order_by(models.Expense.created_at, models.Expense.id).limit(limit).all()
+            return [schemas.Expense.model_validate(row, from_attributes=True) for row in rows]
+
+    @blocking_app.post("/api/expenses/", status_code=201)
+    async def blocking_create_expense(expense: schemas.ExpenseCreate):
+        with SessionLocal() as db:
+            db_expense = models.Expense(user_id=BENCH_USER.id, **expense.model_dump())
+            db.add(db_expense)
+            db.commit()
+            db.refresh(db_expense)
+            return schemas.Expense.model_validate(db_expense, from_attributes=True)
+
+    return blocking_app
+
+def seed(rows):
+    from app import models
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Expense), [
+            {
+                "user_id": i % USERS + 1,
+                "amount": float(i % 500),
+                "category": "travel",
+                "description": f"expense {i}",
+                "status": "pending",
+                "created_at": start + timedelta(seconds=i),
+                "updated_at": start + timedelta(seconds=i),
+            }
+            for i in range(rows)
+        ])
+
+async def run_load(target_app, concurrency, total, write_ratio):
+    transport = httpx.ASGITransport(app=target_app)
+    remaining = iter(range(total))
+    errors = 0
+
+    async def worker(client):
+        nonlocal errors
+        rng = random.Random()
+        for _ in remaining:
+            if rng.random() < write_ratio:
+                response = await client.post(
+                    "/api/expenses/", json={"amount": 10.0, "category": "meals", "description": "bench"}
+                )
+            else:
+                response = await client.get("/api/expenses/me", params={"limit": 50})
+            if response.status_code >= 400:
+                errors += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return total / elapsed, errors
+
+async def main(args):
+    from app import auth
+    from app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    seed(args.seed_rows)
+    app.dependency_overrides[auth.get_current_user] = lambda: BENCH_USER
+
+    print(f"{'variant':>10} {'req/s':>10} {'errors':>8}   "
+          f"(concurrency={args.concurrency}, requests={args.requests}, write ratio={args.write_ratio})")
+    for name, target in (("blocking", make_blocking_app()), ("async", app)):
+        # Warm up pools and caches before measuring
+        await run_load(target, args.concurrency, min(100, args.requests), args.write_ratio)
+        rps, errors = await run_load(target, args.concurrency, args.requests, args.write_ratio)
+        print(f"{name:>10} {rps:>10.1f} {errors:>8}")
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # The app builds its engines from DATABASE_URL at import time, so app
+        # modules are imported inside the functions, once it is set
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        try:
+            asyncio.run(main(args))
+        finally:
+            from app.database import engine
+            engine.dispose()
@@ -0,0 +1,80 @@
+"""Per-request authentication overhead: token verification before and after the token cache.
+
+For each algorithm, times the token step of get_current_user, which is all of
+its work on requests whose user is already cached:
+
+    before      jwt.decode with the secret or public key PEM, every request
+    uncached    auth.decode_token with prebuilt key objects and a cold token cache
+    cached      auth.decode_token for a token this process has already verified
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_auth --requests 2000
+"""
+from jose import jwt
+import argparse
+import ecdsa
+import os
+import rsa
+import statistics
+import tempfile
+import time
+
+from app import auth
+from app.signing_keys import load_key_ring
+
+# Key ring with one key, and the key a verifier would have configured before
+def key_ring(algorithm, tmp):
+    if algorithm == "HS256":
+        return load_key_ring(algorithm="HS256", secret_keys="bench:" + "s" * 64), "s" * 64
+    if algorithm == "RS256":
+        public_key, private_key = rsa.newkeys(2048)
+        pem, public_pem = private_key.save_pkcs1(), public_key.save_pkcs1()
+    else:
+        private_key = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p)
+        pem, public_pem = private_key.to_pem(), private_key.get_verifying_key().to_pem()
+    keys_dir = os.path.join(tmp, algorithm)
+    os.makedirs(keys_dir)
+    with open(os.path.join(keys_dir, "bench.pem"), "wb") as f:
+        f.write(pem)
+    return load_key_ring(algorithm=algorithm, secret_keys="", keys_dir=keys_dir), public_pem.decode()
+
+def timed(fn, requests):
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.mean(timings) * 1e6, timings[int(len(timings) * 0.99)] * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "RS256", "ES256"])
+    args = parser.parse_args()
+
+    print(f"{'algorithm':>10} {'variant':>9} {'mean us':>9} {'p99 us':>9} {'requests/s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for algorithm in args.algorithms:
+            ring, configured_key = key_ring(algorithm, tmp)
+            auth.use_key_ring(ring)
+            token = auth.create_access_token({"sub": "bench"})
+
+            def before():
+                jwt.decode(token, configured_key, algorithms=[algorithm])
+
+            def uncached():
+                auth.token_cache.clear()
+                auth.decode_token(token)
+
+            def cached():
+                auth.decode_token(token)
+
+            for name, fn in (("before", before), ("uncached", uncached), ("cached", cached)):
+                fn()
+                mean, p99 = timed(fn, args.requests)
+                print(f"{algorithm:>10} {name:>9} {mean:>9.1f} {p99:>9.1f} {1e6 / mean:>11.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput of single-row vs batch expense submission and approval.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_expense_batches --rows 2000
+"""
+from types import SimpleNamespace
+import argparse
+import asyncio
+import httpx
+import logging
+import os
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    return parser.parse_args()
+
+BENCH_USER = SimpleNamespace(id=1, username="bench", role="admin")
+ITEM = {"amount": 42.0, "category": "travel", "description": "Taxi to the airport"}
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def main(args):
+    from app import auth
+    from app.database import Base, engine
+    from app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+    app.dependency_overrides[auth.get_current_user] = lambda: BENCH_USER
+    app.dependency_overrides[auth.get_current_admin] = lambda: BENCH_USER
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        timings = {}
+
+        started = time.perf_counter()
+        single_ids = []
+        for _ in range(args.rows):
+            single_ids.append((await client.post("/api/expenses/", json=ITEM)).json()["id"])
+        timings["create, single"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch_ids = []
+        for batch in chunks([ITEM] * args.rows, args.batch_size):
+            response = await client.post("/api/expenses/batch", json={"items": batch})
+            batch_ids.extend(result["id"] for result in response.json())
+        timings["create, batch"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for expense_id in single_ids:
+            await client.put(f"/api/expenses/{expense_id}", json={"status": "approved"})
+        timings["approve, single"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for batch in chunks(batch_ids, args.batch_size):
+            await client.post("/api/expenses/batch/status", json={"ids": batch, "status": "approved"})
+        timings["approve, batch"] = time.perf_counter() - started
+
+    print(f"rows={args.rows}, batch size={args.batch_size}")
+    print(f"{'operation':>16} {'seconds':>9} {'rows/s':>10}")
+    for name, elapsed in timings.items():
+        print(f"{name:>16} {elapsed:>9.2f} {args.rows / elapsed:>10.1f}")
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # The app builds its engines from DATABASE_URL at import time, so app
+        # modules are imported inside the functions, once it is set
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        try:
+            asyncio.run(main(args))
+        finally:
+            from app.database import engine
+            engine.dispose()
@@ -0,0 +1,121 @@
+"""Login throughput with bcrypt inline on the event loop vs on the hashing pool.
+
+The inline variant verifies the password on the event loop, as /token did
+before the hashing pool; the pooled variant is the real /api/users/token
+endpoint. Throughput is also reported per hashing worker (one per core by default).
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_login --rounds 12 --logins 200 --concurrency 32
+"""
+from fastapi import FastAPI, Form, HTTPException
+from sqlalchemy import insert, select
+import argparse
+import asyncio
+import httpx
+import logging
+import os
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None, help="hashing workers (default: CPU count)")
+    return parser.parse_args()
+
+# The app reads its configuration at import time, so app modules are imported
+# only once configure() has set it
+def configure(args, tmpdir):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["HASHING_MAX_QUEUE"] = str(args.concurrency)
+    if args.workers:
+        os.environ["HASHING_WORKERS"] = str(args.workers)
+
+PASSWORD = "benchmark-password"
+
+# /token as it was before the hashing pool, kept here only for comparison
+def make_inline_app():
+    from app import auth, models
+    from app.database import SessionLocal
+
+    inline_app = FastAPI()
+
+    @inline_app.post("/api/users/token")
+    async def inline_login(username: str = Form(...), password: str = Form(...)):
+        with SessionLocal() as db:
+            db_user = db.scalar(select(models.User).where(models.User.username == username))
+        if db_user is None or not auth.verify_password(password, db_user.hashed_password):
+            raise HTTPException(status_code=401)
+        return {"access_token": auth.create_access_token({"sub": username}), "token_type": "bearer"}
+
+    return inline_app
+
+def seed(users):
+    from app import auth, models
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    hashed = auth.get_password_hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {
+                "email": f"user{i}@example.com",
+                "username": f"user{i}",
+                "hashed_password": hashed,
+                "first_name": "Bench",
+                "last_name": str(i),
+                "role": "employee",
+                "is_active": True,
+            }
+            for i in range(users)
+        ])
+
+async def run_logins(target_app, total, concurrency, users):
+    remaining = iter(range(total))
+    failures = 0
+
+    async def worker(client):
+        nonlocal failures
+        for i in remaining:
+            response = await client.post(
+                "/api/users/token", data={"username": f"user{i % users}", "password": PASSWORD}
+            )
+            if response.status_code != 200:
+                failures += 1
+
+    transport = httpx.ASGITransport(app=target_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return total / elapsed, failures
+
+async def main(args):
+    from app import auth
+    from app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    seed(args.users)
+    workers = auth.HASHING_WORKERS
+
+    print(f"bcrypt rounds={args.rounds}, hashing workers={workers}, concurrency={args.concurrency}")
+    print(f"{'variant':>10} {'logins/s':>10} {'per worker':>11} {'failures':>9}")
+    for name, target in (("inline", make_inline_app()), ("pooled", app)):
+        rate, failures = await run_logins(target, args.logins, args.concurrency, args.users)
+        per_worker = rate if name == "inline" else rate / workers
+        print(f"{name:>10} {rate:>10.1f} {per_worker:>11.1f} {failures:>9}")
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure(args, tmpdir)
+        try:
+            asyncio.run(main(args))
+        finally:
+            from app.database import engine
+            engine.dispose()
@@ -0,0 +1,78 @@
+"""Offset vs keyset pagination latency as page depth grows.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_pagination --rows 200000
+"""
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app import models
+from app.database import Base
+from app.pagination import paginate
+
+def seed(engine, rows):
+    start = datetime(2020, 1, 1)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            batch.append({
+                "user_id": i % 500 + 1,
+                "amount": float(i % 1000),
+                "category": "travel",
+                "description": f"expense {i}",
+                "status": "pending",
+                "created_at": start + timedelta(seconds=i),
+                "updated_at": start + timedelta(seconds=i),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(models.Expense), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.Expense), batch)
+
+def time_page(Session, limit, skip=0, cursor=None, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        db = Session()
+        started = time.perf_counter()
+        rows, _ = paginate(db.query(models.Expense), models.Expense, skip=skip, limit=limit, cursor=cursor)
+        timings.append(time.perf_counter() - started)
+        db.close()
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine, args.rows)
+        Session = sessionmaker(bind=engine)
+
+        print(f"{'depth':>10} {'offset ms':>12} {'keyset ms':>12}")
+        depth = 0
+        while depth < args.rows:
+            # Cursor for the page starting at this depth, as a client walking pages would hold
+            cursor = None
+            if depth:
+                db = Session()
+                _, cursor = paginate(db.query(models.Expense), models.Expense, skip=depth - 1, limit=1)
+                db.close()
+            offset_ms = time_page(Session, args.limit, skip=depth)
+            keyset_ms = time_page(Session, args.limit, cursor=cursor)
+            print(f"{depth:>10} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+            depth = depth * 4 if depth else 1000
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
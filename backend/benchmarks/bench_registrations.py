@@ -0,0 +1,118 @@
+"""Concurrent registrations for one popular activity; fails if it is overbooked.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_registrations --users 2000 --capacity 500 --concurrency 100
+"""
+from datetime import datetime
+from fastapi import Request
+from sqlalchemy import func, select
+from types import SimpleNamespace
+import argparse
+import asyncio
+import httpx
+import logging
+import os
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    return parser.parse_args()
+
+# Every request authenticates as the user id in its X-User header
+def user_from_header(request: Request):
+    return SimpleNamespace(id=int(request.headers["X-User"]), username="bench", role="employee", department=None)
+
+async def run_phase(client, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send(method, url, user_id):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, headers={"X-User": str(user_id)})
+            latencies.append(time.perf_counter() - started)
+            return response
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(send(*request) for request in requests))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return responses, elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+def check_no_overbooking(activity_id, capacity):
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        registered = db.execute(
+            select(func.count()).select_from(models.ActivityRegistration).where(
+                models.ActivityRegistration.activity_id == activity_id,
+                models.ActivityRegistration.status == "registered",
+            )
+        ).scalar()
+        seats_remaining = db.get(models.EducationActivity, activity_id).seats_remaining
+    finally:
+        db.close()
+    assert registered + seats_remaining == capacity, "seat counter out of step with registrations"
+    assert registered <= capacity, f"overbooked: {registered} registered for {capacity} seats"
+    return registered, seats_remaining
+
+async def main(args):
+    from app import auth, models
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    activity = models.EducationActivity(
+        title="Popular course", description="", location="HQ",
+        start_date=datetime(2024, 5, 6, 9), end_date=datetime(2024, 5, 6, 17),
+        capacity=args.capacity, seats_remaining=args.capacity,
+    )
+    db.add(activity)
+    db.commit()
+    activity_id = activity.id
+    db.close()
+    app.dependency_overrides[auth.get_current_user] = user_from_header
+
+    url = f"/api/education/{activity_id}/registrations"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"users={args.users}, capacity={args.capacity}, concurrency={args.concurrency}")
+        print(f"{'phase':>24} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+        responses, elapsed, p50, p99 = await run_phase(
+            client, [("POST", url, user_id) for user_id in range(1, args.users + 1)], args.concurrency
+        )
+        print(f"{'register':>24} {len(responses):>9} {len(responses) / elapsed:>9.1f} {p50:>9.2f} {p99:>9.2f}")
+        errors = [response.status_code for response in responses if response.status_code != 201]
+        assert not errors, f"failed registrations: {errors[:10]}"
+        seated = [response.json() for response in responses if response.json()["status"] == "registered"]
+        print(f"registered={check_no_overbooking(activity_id, args.capacity)[0]}")
+
+        # A fifth of the seat holders cancel while everyone retries (and gets 409)
+        cancels = [("DELETE", f"{url}/{r['id']}", r["user_id"]) for r in seated[: len(seated) // 5]]
+        retries = [("POST", url, user_id) for user_id in range(1, args.users + 1)]
+        responses, elapsed, p50, p99 = await run_phase(client, cancels + retries, args.concurrency)
+        print(f"{'cancel + retry':>24} {len(responses):>9} {len(responses) / elapsed:>9.1f} {p50:>9.2f} {p99:>9.2f}")
+        registered, seats_remaining = check_no_overbooking(activity_id, args.capacity)
+        print(f"registered={registered}, seats remaining={seats_remaining}, no overbooking")
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # The app builds its engines from DATABASE_URL at import time, so app
+        # modules are imported inside the functions, once it is set
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        try:
+            asyncio.run(main(args))
+        finally:
+            from app.database import engine
+            engine.dispose()
@@ -0,0 +1,127 @@
+"""Full-text search latency against LIKE scans on a synthetic expense corpus.
+
+Seeds expense descriptions drawn from a skewed vocabulary (so some terms are
+common and some rare), with the FTS5 triggers maintaining the index during
+the inserts, then times app.search.search for typical queries.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_search --rows 1000000
+"""
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import models
+from app.database import Base
+from app.search import search
+
+VOCABULARY_SIZE = 5000
+WORDS_PER_DESCRIPTION = 8
+ADMIN = SimpleNamespace(id=1, role="admin")
+EMPLOYEE = SimpleNamespace(id=7, role="employee")
+
+def vocabulary():
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(words)
+
+def seed(engine, rows, words):
+    rng = random.Random(42)
+    # Zipf-like: word i is picked with weight 1 / (i + 1)
+    weights = [1 / (i + 1) for i in range(len(words))]
+    start = datetime(2020, 1, 1)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "user_id": i % 500 + 1,
+                "amount": float(i % 1000),
+                "category": "travel",
+                "description": " ".join(rng.choices(words, weights, k=WORDS_PER_DESCRIPTION)),
+                "status": rng.choice(["pending", "approved", "approved", "rejected"]),
+                "created_at": start + timedelta(seconds=i * 60),
+                "updated_at": start + timedelta(seconds=i * 60),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(models.Expense), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.Expense), batch)
+    return time.perf_counter() - started
+
+async def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.95)] * 1000, result
+
+# Baseline: LIKE '%term%' over every row, which any ranking of LIKE matches
+# needs (an unranked LIMIT 20 can stop early on common terms)
+async def like_scan(db, terms):
+    query = select(func.count()).where(*[models.Expense.description.like(f"%{t}%") for t in terms])
+    return (await db.execute(query)).scalar()
+
+async def run(database_path, words, repeat):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    common, frequent, rare = words[0], words[20], words[-1]
+    cases = [
+        ("common term", f"{common}", {}),
+        ("frequent term", f"{frequent}", {}),
+        ("rare term", f"{rare}", {}),
+        ("two terms", f"{common} {frequent}", {}),
+        ("prefix", f"{frequent[:3]}", {}),
+        ("common, status filter", f"{common}", {"status": "pending"}),
+        ("common, one month", f"{common}", {"date_from": datetime(2020, 3, 1), "date_to": datetime(2020, 4, 1)}),
+        ("common, one employee", f"{common}", {"user": EMPLOYEE}),
+        ("common, page 10", f"{common}", {"skip": 180}),
+    ]
+    print(f"{'query':>24} {'p50 ms':>9} {'p95 ms':>9} {'hits':>6} {'LIKE scan ms':>13}")
+    async with AsyncSession(async_engine) as db:
+        for name, q, options in cases:
+            options = dict(options)
+            user = options.pop("user", ADMIN)
+            p50, p95, hits = await timed(lambda: search(db, q, user, types=["expense"], limit=20, **options), repeat)
+            like = ""
+            if not options and user is ADMIN:
+                like_ms, _, _ = await timed(lambda: like_scan(db, q.split()), 3)
+                like = f"{like_ms:.2f}"
+            print(f"{name:>24} {p50:>9.2f} {p95:>9.2f} {len(hits):>6} {like:>13}")
+    await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    words = vocabulary()
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{database_path}")
+        Base.metadata.create_all(bind=engine)
+        elapsed = seed(engine, args.rows, words)
+        with engine.connect() as conn:
+            count = conn.execute(select(func.count()).select_from(models.Expense)).scalar()
+        engine.dispose()
+        print(f"expenses={count}, seeded with FTS triggers in {elapsed:.1f} s ({count / elapsed:.0f} rows/s)")
+        asyncio.run(run(database_path, words, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Response serialization: the response_model path against the row-based fast path, per schema.
+
+For every model in schemas.py a page of synthetic rows is encoded three ways:
+
+    response_model  attribute objects validated one page at a time with
+                    from_attributes, dumped to Python and json.dumps'ed
+                    (what FastAPI does with ORM objects and a response_model)
+    adapter         row dicts validated and dumped to JSON by one TypeAdapter
+    direct          row dicts encoded without validation (orjson if installed)
+
+It then times a full expense page from SQLite: ORM objects through the
+response_model path against column rows through serialization.encode_rows.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization --rows 100 1000
+"""
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from enum import Enum
+from pydantic import BaseModel
+from types import SimpleNamespace
+from typing import Union, get_args, get_origin
+import argparse
+import inspect
+import json
+import statistics
+import time
+import warnings
+
+warnings.filterwarnings("ignore", message=".*orm_mode.*")
+
+from app import models, schemas  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.serialization import encode_rows, list_adapter, orjson, schema_columns  # noqa: E402
+
+def sample_value(annotation, name, i):
+    origin = get_origin(annotation)
+    if origin is Union:
+        return sample_value(next(a for a in get_args(annotation) if a is not type(None)), name, i)
+    if origin is list:
+        return [sample_value(get_args(annotation)[0], name, i) for _ in range(2)]
+    if inspect.isclass(annotation):
+        if issubclass(annotation, Enum):
+            return list(annotation)[0].value
+        if issubclass(annotation, BaseModel):
+            return sample_row(annotation, i)
+        if issubclass(annotation, bool):
+            return True
+        if issubclass(annotation, int):
+            return i
+        if issubclass(annotation, float):
+            return i * 1.25
+        if issubclass(annotation, datetime):
+            return datetime(2024, 5, 6, 9, 30, i % 60, 123456)
+        if issubclass(annotation, date):
+            return date(2024, 5, 6)
+    if name == "email":
+        return f"user{i}@example.com"
+    return f"{name} {i}"
+
+def sample_row(schema, i):
+    return {name: sample_value(field.annotation, name, i) for name, field in schema.model_fields.items()}
+
+def response_model_path(schema, objects):
+    adapter = list_adapter(schema)
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+# Rows as SQLAlchemy returns them: tuples with _asdict()
+class Row(SimpleNamespace):
+    def _asdict(self):
+        return dict(self.__dict__)
+
+def bench_schemas(rows, repeat):
+    print(f"\nper-schema encoding, {rows} rows (median ms)")
+    print(f"{'schema':>32} {'response_model':>15} {'adapter':>9} {'direct':>9} {'speedup':>8}")
+    for name, schema in inspect.getmembers(schemas, inspect.isclass):
+        if not issubclass(schema, BaseModel) or schema is BaseModel or not schema.model_fields:
+            continue
+        data = [sample_row(schema, i) for i in range(rows)]
+        objects = [Row(**row) for row in data]
+        current = median_ms(lambda: response_model_path(schema, objects), repeat)
+        adapter = median_ms(lambda: encode_rows(objects, schema, "adapter"), repeat)
+        direct = median_ms(lambda: encode_rows(objects, schema, "direct"), repeat)
+        print(f"{name:>32} {current:>15.2f} {adapter:>9.2f} {direct:>9.2f} {current / adapter:>7.1f}x")
+
+def bench_expense_page(rows, repeat):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    created_at = datetime(2024, 5, 6, 9, 30)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Expense), [
+            {"user_id": 1, "amount": i * 1.25, "category": "meals", "description": f"Lunch {i}",
+             "status": "pending", "created_at": created_at, "updated_at": created_at}
+            for i in range(rows)
+        ])
+    columns = schema_columns(models.Expense, schemas.Expense)
+    with Session(engine) as db:
+        def orm_page():
+            objects = db.execute(select(models.Expense).limit(rows)).scalars().all()
+            body = response_model_path(schemas.Expense, objects)
+            db.expunge_all()
+            return body
+
+        def row_page(serializer):
+            return encode_rows(db.execute(select(*columns).limit(rows)).all(), schemas.Expense, serializer)
+
+        current = median_ms(orm_page, repeat)
+        adapter = median_ms(lambda: row_page("adapter"), repeat)
+        direct = median_ms(lambda: row_page("direct"), repeat)
+    engine.dispose()
+    print(f"{'expense page from SQLite':>32} {current:>15.2f} {adapter:>9.2f} {direct:>9.2f} {current / adapter:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(f"direct encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    for rows in args.rows:
+        bench_schemas(rows, args.repeat)
+        bench_expense_page(rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Sick-leave calendar and per-day absence histogram on synthetic employees.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sick_leave --employees 10000
+"""
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+from datetime import date, datetime, time as day_start, timedelta
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import models
+from app.absences import absence_histogram, absence_intervals_query, leave_overlap_conditions
+from app.database import Base
+
+HISTORY_START = date(2021, 1, 1)
+HISTORY_DAYS = 3 * 365
+
+def seed(engine, employees, departments, leaves_per_year):
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {
+                "email": f"user{i}@example.com",
+                "username": f"user{i}",
+                "hashed_password": "x",
+                "first_name": f"First{i}",
+                "last_name": f"Last{i}",
+                "role": "employee",
+                "department": f"dept{i % departments}",
+                "is_active": True,
+            }
+            for i in range(employees)
+        ])
+        batch = []
+        for user_id in range(1, employees + 1):
+            for _ in range(leaves_per_year * HISTORY_DAYS // 365):
+                start = datetime.combine(HISTORY_START, day_start.min) + timedelta(days=rng.randrange(HISTORY_DAYS))
+                batch.append({
+                    "user_id": user_id,
+                    "start_date": start,
+                    "end_date": start + timedelta(days=rng.choice([0, 0, 1, 2, 4, 9])),
+                    "reason": "Sick",
+                    "status": rng.choice(["approved", "approved", "approved", "pending", "rejected"]),
+                })
+                if len(batch) == 10000:
+                    conn.execute(insert(models.SickLeave), batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(models.SickLeave), batch)
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+def calendar(db, first, last, department):
+    query = (
+        select(models.SickLeave.id, models.User.first_name, models.SickLeave.start_date, models.SickLeave.end_date)
+        .join(models.User, models.User.id == models.SickLeave.user_id)
+        .where(*leave_overlap_conditions(first, last))
+    )
+    if department:
+        query = query.where(models.User.department == department)
+    return db.execute(query).all()
+
+def sweep_histogram(db, first, last, department):
+    return absence_histogram(db.execute(absence_intervals_query(first, last, department)).all(), first, last)
+
+# Baseline: one COUNT(DISTINCT user_id) query per day
+def per_day_histogram(db, first, last, department):
+    histogram = []
+    day = first
+    while day <= last:
+        query = select(func.count(models.SickLeave.user_id.distinct())).where(*leave_overlap_conditions(day, day))
+        if department:
+            query = query.join(models.User, models.User.id == models.SickLeave.user_id).where(
+                models.User.department == department
+            )
+        histogram.append((day, db.execute(query).scalar()))
+        day += timedelta(days=1)
+    return histogram
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--departments", type=int, default=50)
+    parser.add_argument("--leaves-per-year", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine, args.employees, args.departments, args.leaves_per_year)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        leaves = db.execute(select(func.count()).select_from(models.SickLeave)).scalar()
+        print(f"employees={args.employees}, departments={args.departments}, sick leaves={leaves}")
+
+        week_start = HISTORY_START + timedelta(days=HISTORY_DAYS - 60)
+        week = (week_start, week_start + timedelta(days=6))
+        quarter = (date(2023, 7, 1), date(2023, 9, 30))
+
+        print(f"{'query':>34} {'ms':>10} {'rows':>8}")
+        for department in (None, "dept7"):
+            scope = department or "everyone"
+            ms, rows = timed(lambda: calendar(db, *week, department), args.repeat)
+            print(f"{'calendar, week, ' + scope:>34} {ms:>10.2f} {len(rows):>8}")
+
+            ms, sweep = timed(lambda: sweep_histogram(db, *quarter, department), args.repeat)
+            print(f"{'histogram sweep, quarter, ' + scope:>34} {ms:>10.2f} {len(sweep):>8}")
+
+            ms, naive = timed(lambda: per_day_histogram(db, *quarter, department), args.repeat)
+            print(f"{'histogram per day, quarter, ' + scope:>34} {ms:>10.2f} {len(naive):>8}")
+            assert sweep == naive, "sweep and per-day histograms disagree"
+
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
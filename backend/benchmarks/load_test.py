@@ -0,0 +1,299 @@
+"""Scripted load scenarios against the API with p50/p95/p99 latency and throughput.
+
+Scenarios, each run by --concurrency simulated users for --iterations rounds:
+
+    login           POST /api/users/token as a random employee
+    my_expenses     an employee's first page of /api/expenses/me
+    approval_sweep  an admin lists 100 pending expenses and approves them in one
+                    batch, until the seeded backlog is empty (no warmup rounds)
+    dashboard       a manager's landing page: profile, expense summary, team
+                    sick-leave calendar, maintenance queue and own travel, fetched together
+
+Latency is per scenario round (a whole sweep or dashboard, not each request).
+By default the app runs in-process through httpx's ASGI transport on a
+temporary SQLite database seeded by benchmarks.seed_data; --base-url sends
+the same load to a running server seeded with the same seed_data options.
+
+Results are written as JSON with --output. Compare two runs with --compare,
+which prints the change per metric and exits 1 if a p95 latency grew by more
+than --max-regression:
+
+    python -m benchmarks.load_test --output before.json
+    python -m benchmarks.load_test --compare before.json --output after.json
+
+Run from the backend directory.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = ["login", "my_expenses", "approval_sweep", "dashboard"]
+
+def add_target_arguments(parser):
+    parser.add_argument("--base-url", default=None, help="running server to load (default: the app in-process)")
+    parser.add_argument("--database-url", default=None, help="sync SQLAlchemy URL to seed (default: temporary SQLite file)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="bcrypt cost for seeded passwords (default: the app's)")
+    parser.add_argument("--concurrency", type=int, default=16)
+
+# The app reads its configuration at import time, so the options that shape it
+# are read before anything imports it
+target_parser = argparse.ArgumentParser(add_help=False)
+add_target_arguments(target_parser)
+target, _ = target_parser.parse_known_args()
+if target.base_url is None:
+    os.environ["DATABASE_URL"] = target.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    if target.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(target.bcrypt_rounds)
+    os.environ.setdefault("HASHING_MAX_QUEUE", str(max(target.concurrency * 2, 64)))
+
+import httpx  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+
+from benchmarks import seed_data  # noqa: E402
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_target_arguments(parser)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--iterations", type=int, default=500, help="rounds per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured rounds per scenario")
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative p95 growth in --compare")
+    seed_data.add_arguments(parser)
+    parser.set_defaults(users=200, expenses_per_user=50)
+    return parser.parse_args()
+
+# Nearest-rank percentile of sorted values
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+def summarize(latencies, requests: int, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "rounds": len(latencies),
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rounds_per_s": round(len(latencies) / elapsed, 1),
+        "requests_per_s": round(requests / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Raised by a scenario that has run out of work; its user stops early
+class ScenarioDone(Exception):
+    pass
+
+class LoadTest:
+    def __init__(self, client, options):
+        self.client = client
+        self.options = options
+        self.tokens = {}
+
+    async def login(self, username):
+        response = await self.client.post(
+            "/api/users/token", data={"username": username, "password": seed_data.PASSWORD}
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    # Bearer headers for a user, logging in once per run
+    async def headers(self, username):
+        if username not in self.tokens:
+            self.tokens[username] = await self.login(username)
+        return {"Authorization": f"Bearer {self.tokens[username]}"}
+
+    def employee(self, rng):
+        while True:
+            i = rng.randrange(self.options.users)
+            if seed_data.role(i) == "employee":
+                return seed_data.username(i)
+
+    # Every twentieth user is a manager; small seeds fall back to the admin
+    def manager(self, rng):
+        return seed_data.username(rng.randrange(20, self.options.users, 20) if self.options.users > 20 else 0)
+
+    # Each scenario round returns the responses it got
+    async def scenario_login(self, rng):
+        return [await self.client.post(
+            "/api/users/token", data={"username": self.employee(rng), "password": seed_data.PASSWORD}
+        )]
+
+    async def scenario_my_expenses(self, rng):
+        headers = await self.headers(self.employee(rng))
+        return [await self.client.get("/api/expenses/me", params={"limit": 50}, headers=headers)]
+
+    async def scenario_approval_sweep(self, rng):
+        headers = await self.headers("user0")
+        listed = await self.client.get("/api/expenses/", params={"status": "pending", "limit": 100}, headers=headers)
+        ids = [expense["id"] for expense in listed.json()] if listed.status_code == 200 else []
+        if not ids:
+            raise ScenarioDone()
+        approved = await self.client.post(
+            "/api/expenses/batch/status", json={"ids": ids, "status": "approved"}, headers=headers
+        )
+        return [listed, approved]
+
+    async def scenario_dashboard(self, rng):
+        headers = await self.headers(self.manager(rng))
+        week = seed_data.EPOCH.date().toordinal() + rng.randrange(seed_data.SEEDED_DAYS - 7)
+        calendar = {
+            "start": datetime.fromordinal(week).date().isoformat(),
+            "end": datetime.fromordinal(week + 6).date().isoformat(),
+        }
+        return await asyncio.gather(
+            self.client.get("/api/users/me", headers=headers),
+            self.client.get("/api/expenses/summary", headers=headers),
+            self.client.get("/api/sick-leave/calendar", params=calendar, headers=headers),
+            self.client.get("/api/maintenance/queue", headers=headers),
+            self.client.get("/api/travel/me", params={"limit": 20}, headers=headers),
+        )
+
+    # Closed loop: concurrency users each run rounds back to back until
+    # `rounds` have been started
+    async def run(self, name, rounds, concurrency):
+        scenario = getattr(self, f"scenario_{name}")
+        remaining = iter(range(rounds))
+        latencies = []
+        counts = {"requests": 0, "errors": 0}
+
+        async def user(worker_id):
+            rng = random.Random(f"{self.options.seed}:{name}:{worker_id}")
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    responses = await scenario(rng)
+                except ScenarioDone:
+                    return
+                except Exception:
+                    counts["errors"] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                counts["requests"] += len(responses)
+                counts["errors"] += sum(response.status_code >= 400 for response in responses)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(worker_id) for worker_id in range(concurrency)))
+        return summarize(latencies, counts["requests"], counts["errors"], time.perf_counter() - started)
+
+def print_results(results):
+    print(f"{'scenario':>15} {'rounds/s':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        print(f"{name:>15} {result['rounds_per_s']:>9.1f} {result['requests_per_s']:>8.1f} {latency['p50']:>8.2f} "
+              f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} {latency['max']:>8.2f} {result['errors']:>7}")
+
+# Print the relative change of each metric; returns the scenarios whose p95
+# grew by more than max_regression
+def compare(baseline, results, max_regression):
+    regressions = []
+    print(f"\nagainst {baseline['meta'].get('git_commit') or 'baseline'} ({baseline['meta']['timestamp']}):")
+    options, baseline_options = results["meta"]["options"], baseline["meta"]["options"]
+    differing = sorted(key for key in options.keys() | baseline_options.keys() if options.get(key) != baseline_options.get(key))
+    if differing:
+        print(f"warning: runs used different options ({', '.join(differing)}); numbers may not be comparable")
+    print(f"{'scenario':>15} {'rounds/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:>15} {'(new)':>9}")
+            continue
+
+        def change(new, old):
+            return (new - old) / old if old else 0.0
+        throughput = change(result["rounds_per_s"], before["rounds_per_s"])
+        latency = {p: change(result["latency_ms"][p], before["latency_ms"][p]) for p in ("p50", "p95", "p99")}
+        print(f"{name:>15} {throughput:>+9.1%} {latency['p50']:>+8.1%} {latency['p95']:>+8.1%} {latency['p99']:>+8.1%}")
+        if latency["p95"] > max_regression:
+            regressions.append(name)
+    return regressions
+
+async def run(args, client, database):
+    load_test = LoadTest(client, args)
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or "asgi",
+            "database": database,
+            "options": {
+                key: value for key, value in vars(args).items()
+                if key not in ("output", "compare", "max_regression", "base_url", "database_url")
+            },
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        # Warming up the sweep would only shrink its backlog
+        if args.warmup and name != "approval_sweep":
+            await load_test.run(name, args.warmup, args.concurrency)
+        results["scenarios"][name] = await load_test.run(name, args.iterations, args.concurrency)
+    return results
+
+def main():
+    args = parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    engine = None
+    if args.base_url is None:
+        from app.database import engine
+        from app.main import app
+
+        started = time.perf_counter()
+        counts = seed_data.seed(engine, **seed_data.seed_options(args))
+        print(", ".join(f"{table}={count}" for table, count in counts.items()),
+              f"(seeded in {time.perf_counter() - started:.1f} s)")
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+
+    async def load():
+        async with client:
+            return await run(args, client, engine.dialect.name if engine is not None else None)
+
+    try:
+        results = asyncio.run(load())
+    finally:
+        if engine is not None:
+            engine.dispose()
+
+    print(f"concurrency={args.concurrency}, rounds per scenario={args.iterations}")
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.max_regression)
+        if regressions:
+            print(f"\np95 regressed by more than {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Deterministic synthetic data for load tests and benchmarks.
+
+Seeds users, expenses (with their summaries), sick leaves, assets and asset
+bookings, travel requests with bookings and maintenance issues. The same
+arguments always produce the same rows, so runs against two builds compare
+like with like. Every user's password is PASSWORD; user0 is an admin and every
+twentieth user a manager.
+
+Run from the backend directory to seed a database for a server under test:
+
+    python -m benchmarks.seed_data --database-url sqlite:///bench.db --users 1000
+"""
+from sqlalchemy import create_engine, insert
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+from app import auth, models
+from app.database import Base
+
+PASSWORD = "benchmark-password"
+DEPARTMENTS = ["engineering", "sales", "finance", "support", "marketing", "operations", "legal", "hr"]
+EXPENSE_CATEGORIES = ["travel", "meals", "equipment", "software", "training", "office"]
+EXPENSE_WORDS = ["taxi", "airport", "client", "lunch", "dinner", "hotel", "laptop", "monitor", "license",
+                 "conference", "workshop", "books", "train", "parking", "coffee", "team", "offsite", "cables"]
+DESTINATIONS = ["Berlin", "Paris", "London", "Madrid", "Oslo", "New York", "Tokyo", "Warsaw"]
+ASSET_CATEGORIES = ["room", "car", "projector", "laptop"]
+LOCATIONS = ["HQ", "North office", "South office", "Remote hub"]
+# Start of the seeded period; rows are spread over the year that follows
+EPOCH = datetime(2024, 1, 1)
+SEEDED_DAYS = 365
+
+def username(i: int) -> str:
+    return f"user{i}"
+
+def role(i: int) -> str:
+    if i == 0:
+        return models.UserRole.ADMIN.value
+    if i % 20 == 0:
+        return models.UserRole.MANAGER.value
+    return models.UserRole.EMPLOYEE.value
+
+def _insert(conn, model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        conn.execute(insert(model), rows[start:start + batch_size])
+    return len(rows)
+
+def _moment(rng, days=SEEDED_DAYS):
+    return EPOCH + timedelta(seconds=rng.randrange(days * 86400))
+
+# Create the schema on engine and fill it; returns the row count per table
+def seed(
+    engine,
+    users: int = 1000,
+    expenses_per_user: int = 50,
+    sick_leaves_per_user: int = 2,
+    travel_per_user: int = 2,
+    assets: int = 100,
+    bookings_per_asset: int = 20,
+    issues: int = 500,
+    seed: int = 42,
+    batch_size: int = 5000,
+):
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+    # One hash for everyone: seeding stays fast at any bcrypt cost
+    hashed_password = auth.get_password_hash(PASSWORD)
+    counts = {}
+
+    with engine.begin() as conn:
+        counts["users"] = _insert(conn, models.User, [
+            {
+                "id": i + 1,
+                "email": f"{username(i)}@example.com",
+                "username": username(i),
+                "hashed_password": hashed_password,
+                "first_name": "Bench",
+                "last_name": str(i),
+                "role": role(i),
+                "department": DEPARTMENTS[i % len(DEPARTMENTS)],
+                "is_active": True,
+                "created_at": EPOCH,
+                "updated_at": EPOCH,
+            }
+            for i in range(users)
+        ], batch_size)
+
+        expenses = []
+        summaries = {}
+        for user_id in range(1, users + 1):
+            for _ in range(expenses_per_user):
+                created_at = _moment(rng)
+                status = rng.choices(["pending", "approved", "rejected"], weights=[3, 6, 1])[0]
+                amount = round(rng.lognormvariate(3.5, 1.0), 2)
+                expenses.append({
+                    "user_id": user_id,
+                    "amount": amount,
+                    "category": rng.choice(EXPENSE_CATEGORIES),
+                    "description": " ".join(rng.sample(EXPENSE_WORDS, 3)),
+                    "status": status,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                })
+                count, total = summaries.get((user_id, status), (0, 0.0))
+                summaries[(user_id, status)] = (count + 1, total + amount)
+        counts["expenses"] = _insert(conn, models.Expense, expenses, batch_size)
+        # Kept in step by the app on every write; seeded rows need them up front
+        counts["expense_summaries"] = _insert(conn, models.ExpenseSummary, [
+            {"user_id": user_id, "status": status, "count": count, "total_amount": total}
+            for (user_id, status), (count, total) in summaries.items()
+        ], batch_size)
+
+        sick_leaves = []
+        for user_id in range(1, users + 1):
+            for _ in range(sick_leaves_per_user):
+                start = _moment(rng).replace(hour=0, minute=0, second=0)
+                sick_leaves.append({
+                    "user_id": user_id,
+                    "start_date": start,
+                    "end_date": start + timedelta(days=rng.randint(0, 4)),
+                    "reason": "flu",
+                    "status": rng.choice(["pending", "approved", "approved"]),
+                    "created_at": start,
+                    "updated_at": start,
+                })
+        counts["sick_leaves"] = _insert(conn, models.SickLeave, sick_leaves, batch_size)
+
+        counts["assets"] = _insert(conn, models.Asset, [
+            {
+                "id": asset_id,
+                "name": f"{ASSET_CATEGORIES[asset_id % len(ASSET_CATEGORIES)]} {asset_id}",
+                "description": "",
+                "category": ASSET_CATEGORIES[asset_id % len(ASSET_CATEGORIES)],
+                "location": LOCATIONS[asset_id % len(LOCATIONS)],
+                "is_available": True,
+                "created_at": EPOCH,
+                "updated_at": EPOCH,
+            }
+            for asset_id in range(1, assets + 1)
+        ], batch_size)
+
+        asset_bookings = []
+        for asset_id in range(1, assets + 1):
+            # Back-to-back slots of 1-8 hours with gaps, so bookings never overlap
+            start = EPOCH
+            for _ in range(bookings_per_asset):
+                start += timedelta(hours=rng.randint(1, 48))
+                end = start + timedelta(hours=rng.randint(1, 8))
+                asset_bookings.append({
+                    "asset_id": asset_id,
+                    "user_id": rng.randint(1, users),
+                    "start_time": start,
+                    "end_time": end,
+                    "purpose": "meeting",
+                    "status": rng.choice(["pending", "approved"]),
+                    "created_at": start,
+                    "updated_at": start,
+                })
+                start = end
+        counts["asset_bookings"] = _insert(conn, models.AssetBooking, asset_bookings, batch_size)
+
+        travel_requests, travel_bookings = [], []
+        for user_id in range(1, users + 1):
+            for _ in range(travel_per_user):
+                travel_id = len(travel_requests) + 1
+                departure = _moment(rng)
+                estimated = float(rng.randrange(300, 3000, 50))
+                travel_requests.append({
+                    "id": travel_id,
+                    "user_id": user_id,
+                    "destination": rng.choice(DESTINATIONS),
+                    "purpose": "Customer visit",
+                    "departure_date": departure,
+                    "return_date": departure + timedelta(days=rng.randint(1, 5)),
+                    "estimated_cost": estimated,
+                    "status": rng.choice(["pending", "approved", "approved", "rejected"]),
+                    "created_at": departure - timedelta(days=14),
+                    "updated_at": departure - timedelta(days=14),
+                })
+                for booking_type in rng.sample(["flight", "hotel", "car"], rng.randint(0, 3)):
+                    travel_bookings.append({
+                        "travel_request_id": travel_id,
+                        "booking_type": booking_type,
+                        "provider": "Bench Travel",
+                        "booking_reference": f"B{len(travel_bookings)}",
+                        "details": "",
+                        "cost": round(estimated * rng.uniform(0.2, 0.6), 2),
+                        "created_at": departure - timedelta(days=7),
+                        "updated_at": departure - timedelta(days=7),
+                    })
+        counts["travel_requests"] = _insert(conn, models.TravelRequest, travel_requests, batch_size)
+        counts["travel_bookings"] = _insert(conn, models.TravelBooking, travel_bookings, batch_size)
+
+        maintenance_issues = []
+        for i in range(issues):
+            created_at = _moment(rng)
+            priority = rng.choices(list(models.PRIORITY_RANKS), weights=[1, 3, 8, 4])[0]
+            maintenance_issues.append({
+                "reporter_id": rng.randint(1, users),
+                "title": f"{rng.choice(['Broken', 'Leaking', 'Noisy', 'Flickering'])} {rng.choice(['tap', 'lamp', 'door', 'heater'])}",
+                "description": "",
+                "location": rng.choice(LOCATIONS),
+                "priority": priority,
+                "priority_rank": models.PRIORITY_RANKS[priority],
+                "status": rng.choices(["open", "in_progress", "resolved"], weights=[5, 2, 3])[0],
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        counts["maintenance_issues"] = _insert(conn, models.MaintenanceIssue, maintenance_issues, batch_size)
+    return counts
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--expenses-per-user", type=int, default=50)
+    parser.add_argument("--sick-leaves-per-user", type=int, default=2)
+    parser.add_argument("--travel-per-user", type=int, default=2)
+    parser.add_argument("--assets", type=int, default=100)
+    parser.add_argument("--bookings-per-asset", type=int, default=20)
+    parser.add_argument("--issues", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+
+# Keyword arguments for seed() from parsed add_arguments options
+def seed_options(args) -> dict:
+    return {
+        "users": args.users,
+        "expenses_per_user": args.expenses_per_user,
+        "sick_leaves_per_user": args.sick_leaves_per_user,
+        "travel_per_user": args.travel_per_user,
+        "assets": args.assets,
+        "bookings_per_asset": args.bookings_per_asset,
+        "issues": args.issues,
+        "seed": args.seed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="sync SQLAlchemy URL of an empty database")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    counts = seed(engine, **seed_options(args))
+    engine.dispose()
+    print(", ".join(f"{table}={count}" for table, count in counts.items()))
+    print(f"seeded in {time.perf_counter() - started:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Cold-start cost of a worker: import time per module and each startup step.
+
+Starts fresh interpreters that import app.main under -X importtime and run the
+app's startup (app.main.initialize) against a temporary SQLite database, then
+prints the median wall times and where the import time went: self time per
+app module and per third-party package.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup_report --runs 5
+"""
+from collections import defaultdict
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs in the measured interpreter; prints the wall times as JSON on its last line
+CHILD = """
+import time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+
+import asyncio, json
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return app.main.app.state.startup_timings
+timings = asyncio.run(start())
+print(json.dumps({"import": imported, **timings, "total": time.perf_counter() - started}))
+"""
+
+CREATE_SCHEMA = "from app import models; from app.database import Base, engine; Base.metadata.create_all(bind=engine)"
+
+# Report name for a module: app modules one by one, anything else by top-level package
+def group(module: str) -> str:
+    return module if module.split(".")[0] == "app" else module.split(".")[0]
+
+# Self time in seconds per group from -X importtime output
+def import_times(stderr: str) -> dict:
+    times = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        times[group(module.strip())] += int(self_us) / 1e6
+    return times
+
+def run_once(env) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD], env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1]), import_times(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25, help="modules and packages to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}"}
+        env.pop("ASYNC_DATABASE_URL", None)
+        subprocess.run([sys.executable, "-c", CREATE_SCHEMA], env=env, check=True)
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"{'step':>20} {'median ms':>10} {'min ms':>8}")
+    for step in runs[0][0]:
+        values = [timings[step] * 1000 for timings, _ in runs]
+        print(f"{step:>20} {statistics.median(values):>10.1f} {min(values):>8.1f}")
+
+    modules = defaultdict(list)
+    for _, times in runs:
+        for name, seconds in times.items():
+            modules[name].append(seconds * 1000)
+    ranked = sorted(modules.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    total = sum(statistics.median(values) for values in modules.values())
+    print(f"\nimport self time, {total:.1f} ms in all (-X importtime adds some overhead):")
+    print(f"{'module or package':>32} {'median ms':>10} {'share':>7}")
+    for name, values in ranked[:args.top]:
+        median = statistics.median(values)
+        print(f"{name:>32} {median:>10.1f} {median / total:>7.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Production server: gunicorn managing uvicorn workers. Run from the backend directory:
+#
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# Every setting can be overridden with the environment variables below.
+import glob
+import math
+import os
+import shutil
+import tempfile
+
+# CPUs this process may actually use: its affinity mask, capped by a cgroup
+# (container) CPU quota, which os.cpu_count() ignores
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+# One event loop per core; at least two, so a recycled worker never leaves none serving
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or max(available_cpus(), 2)
+worker_class = "uvicorn.workers.UvicornWorker"
+# The app reads the worker count to turn off per-worker state that must be shared
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# Import the app once in the master and fork workers from it, so they share
+# its memory copy-on-write and start faster. Code changes need a full restart
+# (not SIGHUP) while this is on.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() in ("1", "true", "yes")
+
+# On SIGTERM workers stop accepting, finish in-flight requests and run the
+# app's shutdown for up to graceful_timeout seconds before being killed.
+# Orchestrators should wait longer than this before sending SIGKILL.
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Replace each worker after about this many requests to contain slow memory
+# growth; the jitter keeps workers from restarting all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+# Heartbeat files on disk can stall workers in containers; use memory when there is some
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# Workers write their metrics snapshots to one directory so that /metrics
+# reports all of them (see app/metrics.py). Unless one is configured, a fresh
+# directory is created for this server and removed when it exits.
+_own_metrics_dir = None
+if workers > 1 and not os.getenv("METRICS_MULTIPROC_DIR"):
+    _own_metrics_dir = tempfile.mkdtemp(prefix="metrics-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    os.environ["METRICS_MULTIPROC_DIR"] = _own_metrics_dir
+
+# Snapshots left by a previous run would be added to this run's totals
+def on_starting(server):
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            os.remove(path)
+
+def child_exit(server, worker):
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        from app.metrics import mark_worker_dead
+
+        mark_worker_dead(directory, worker.pid)
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(_own_metrics_dir, ignore_errors=True)
+
+# Connections opened in the master must not be shared with the forked workers;
+# each worker starts with empty pools and warms its own (see app.main.lifespan)
+def post_fork(server, worker):
+    from app.database import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
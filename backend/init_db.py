@@ -1,22 +1,17 @@
 # Local Development Helper
+#
+# Creates or upgrades the database schema by running the Alembic migrations
+# in backend/migrations. Run it from the backend directory after installing
+# the requirements:
+#
+#   python init_db.py
+#
+# New schema changes go in a new revision under migrations/versions
+# (alembic revision -m "describe the change") rather than create_all.
+from app.database import DATABASE_URL
+from app.migrations import upgrade_database
 
-This script helps to initialize the database for local development.
-
-```python
-from app.database import Base, engine
-from app.models import *  # Import all models
-
-print("Creating database tables...")
-Base.metadata.create_all(bind=engine)
-print("Database tables created successfully!")
-```
-
-Run this script after setting up your backend environment:
-
-```bash
-cd backend
-python -m venv venv
-source venv/bin/activate  # On Windows: venv\Scripts\activate
-pip install -r requirements.txt
-python init_db.py
-```
\ No newline at end of file
+if __name__ == "__main__":
+    print(f"Migrating database at {DATABASE_URL}...")
+    upgrade_database()
+    print("Database is up to date!")
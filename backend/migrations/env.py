@@ -0,0 +1,72 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+config = context.config
+
+# Leave the application's logging alone when migrations run in-process (see app/migrations.py)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = config.attributes.get("target_metadata")
+if target_metadata is None:
+    # Invoked through the alembic CLI from the backend directory
+    from app.database import Base
+    from app import models  # noqa: F401 - registers every table on Base.metadata
+    target_metadata = Base.metadata
+
+# Full-text search tables and indexes are managed by hand (see app/search.py)
+SEARCH_OBJECT_PREFIXES = ("expenses_fts", "maintenance_issues_fts", "education_activities_fts")
+SEARCH_INDEXES = ("ix_expenses_fulltext", "ix_maintenance_issues_fulltext", "ix_education_activities_fulltext")
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not name.startswith(SEARCH_OBJECT_PREFIXES)
+    if type_ == "index":
+        return name not in SEARCH_INDEXES
+    return True
+
+def get_url():
+    from app.database import DATABASE_URL
+    return DATABASE_URL
+
+def run_migrations_offline():
+    url = get_url()
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=url.startswith("sqlite"),
+        include_name=include_name,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
+    engine = create_engine(get_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        do_run_migrations(connection)
+    engine.dispose()
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can't ALTER most things in place; batch mode recreates the table
+        render_as_batch=connection.dialect.name == "sqlite",
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,39 @@
+"""Indexes for the hot filter and pagination columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_expenses_created_at_id', 'expenses', ['created_at', 'id'], unique=False)
+    op.create_index('ix_expenses_user_status_created_at', 'expenses', ['user_id', 'status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_expenses_status_created_at', 'expenses', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_sick_leaves_user_start_date', 'sick_leaves', ['user_id', 'start_date'], unique=False)
+    op.create_index('ix_asset_bookings_asset_time', 'asset_bookings', ['asset_id', 'start_time', 'end_time'], unique=False)
+    op.create_index('ix_asset_bookings_user_id', 'asset_bookings', ['user_id'], unique=False)
+    op.create_index('ix_travel_requests_user_status_created_at', 'travel_requests', ['user_id', 'status', 'created_at'], unique=False)
+    op.create_index('ix_travel_bookings_travel_request_id', 'travel_bookings', ['travel_request_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_travel_bookings_travel_request_id', table_name='travel_bookings')
+    op.drop_index('ix_travel_requests_user_status_created_at', table_name='travel_requests')
+    op.drop_index('ix_asset_bookings_user_id', table_name='asset_bookings')
+    op.drop_index('ix_asset_bookings_asset_time', table_name='asset_bookings')
+    op.drop_index('ix_sick_leaves_user_start_date', table_name='sick_leaves')
+    op.drop_index('ix_expenses_status_created_at', table_name='expenses')
+    op.drop_index('ix_expenses_user_status_created_at', table_name='expenses')
+    op.drop_index('ix_expenses_created_at_id', table_name='expenses')
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,37 @@
+"""Per-user expense summary aggregates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('expense_summaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'status')
+    )
+    # Backfill from the existing expenses
+    op.execute(
+        "INSERT INTO expense_summaries (user_id, status, count, total_amount) "
+        "SELECT user_id, status, COUNT(*), COALESCE(SUM(amount), 0) FROM expenses "
+        "WHERE user_id IS NOT NULL AND status IS NOT NULL GROUP BY user_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table('expense_summaries')
@@ -0,0 +1,43 @@
+"""Uploaded receipts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('receipts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('storage_key', sa.String(length=255), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=32), nullable=True),
+    sa.Column('rejection_reason', sa.String(length=255), nullable=True),
+    sa.Column('thumbnail_key', sa.String(length=255), nullable=True),
+    sa.Column('uploaded_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_receipts_id'), 'receipts', ['id'], unique=False)
+    op.create_index(op.f('ix_receipts_sha256'), 'receipts', ['sha256'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_receipts_sha256'), table_name='receipts')
+    op.drop_index(op.f('ix_receipts_id'), table_name='receipts')
+    op.drop_table('receipts')
@@ -0,0 +1,29 @@
+"""User departments and the sick-leave calendar index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('department', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_users_department'), 'users', ['department'], unique=False)
+    op.create_index('ix_sick_leaves_end_start', 'sick_leaves', ['end_date', 'start_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sick_leaves_end_start', table_name='sick_leaves')
+    op.drop_index(op.f('ix_users_department'), table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('department')
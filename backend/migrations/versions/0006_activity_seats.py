@@ -0,0 +1,50 @@
+"""Remaining seats and waitlist for education activities
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('education_activities', sa.Column('seats_remaining', sa.Integer(), nullable=True))
+    # Registrations used the generic request statuses before
+    op.execute(
+        "UPDATE activity_registrations SET status = 'registered' "
+        "WHERE status IS NULL OR status IN ('pending', 'approved')"
+    )
+    op.execute("UPDATE activity_registrations SET status = 'cancelled' WHERE status = 'rejected'")
+    # Keep the oldest registration per user and activity so the unique index can be built
+    op.execute(
+        "DELETE FROM activity_registrations WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM activity_registrations GROUP BY activity_id, user_id) AS keep)"
+    )
+    op.create_index('ix_activity_registrations_activity_user', 'activity_registrations', ['activity_id', 'user_id'], unique=True)
+    op.create_index('ix_activity_registrations_activity_status_id', 'activity_registrations', ['activity_id', 'status', 'id'], unique=False)
+    # Oversubscribed activities start below zero and take no one new until enough seats are freed
+    op.execute(
+        "UPDATE education_activities SET seats_remaining = capacity - ("
+        "SELECT COUNT(*) FROM activity_registrations "
+        "WHERE activity_registrations.activity_id = education_activities.id "
+        "AND activity_registrations.status = 'registered') "
+        "WHERE capacity IS NOT NULL"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_activity_registrations_activity_status_id', table_name='activity_registrations')
+    op.drop_index('ix_activity_registrations_activity_user', table_name='activity_registrations')
+    op.execute("UPDATE activity_registrations SET status = 'approved' WHERE status = 'registered'")
+    op.execute("UPDATE activity_registrations SET status = 'pending' WHERE status = 'waitlisted'")
+    with op.batch_alter_table('education_activities') as batch_op:
+        batch_op.drop_column('seats_remaining')
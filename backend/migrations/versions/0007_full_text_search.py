@@ -0,0 +1,60 @@
+"""Full-text search indexes for expenses, maintenance issues and activities
+
+SQLite gets external-content FTS5 tables kept in step by triggers; MySQL gets
+FULLTEXT indexes. Neither is part of Base.metadata (see app/search.py).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# table -> indexed columns
+SEARCH_COLUMNS = {
+    'expenses': ['description'],
+    'maintenance_issues': ['title', 'description'],
+    'education_activities': ['title', 'description'],
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, columns in SEARCH_COLUMNS.items():
+        if dialect == 'sqlite':
+            cols = ', '.join(columns)
+            fts = f'{table}_fts'
+            delete_old = (
+                f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+                f"VALUES ('delete', old.id, {', '.join('old.' + c for c in columns)});"
+            )
+            insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {', '.join('new.' + c for c in columns)});"
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            op.execute(f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {insert_new} END")
+            op.execute(f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {delete_old} END")
+            op.execute(f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN {delete_old} {insert_new} END")
+            # Index the rows that already exist
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect in ('mysql', 'mariadb'):
+            op.execute(f"CREATE FULLTEXT INDEX ix_{table}_fulltext ON {table} ({', '.join(columns)})")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in SEARCH_COLUMNS:
+        if dialect == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{trigger}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif dialect in ('mysql', 'mariadb'):
+            op.drop_index(f'ix_{table}_fulltext', table_name=table)
@@ -0,0 +1,72 @@
+"""Maintenance triage queue: priority ordinal, assignee and queue index
+
+Free-form priorities are normalized to critical/high/medium/low (anything
+unrecognised becomes medium) and ranked in priority_rank.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# priority -> rank, most urgent first (models.PRIORITY_RANKS)
+PRIORITY_RANKS = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+PRIORITY_ALIASES = {'urgent': 'critical', 'normal': 'medium'}
+
+
+def upgrade():
+    # Plain ADD COLUMN: a batch rebuild on SQLite would drop the full-text search triggers
+    op.add_column('maintenance_issues', sa.Column('priority_rank', sa.Integer(), nullable=False, server_default='2'))
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite can only add a foreign key inline, with the column
+        op.execute("ALTER TABLE maintenance_issues ADD COLUMN assignee_id INTEGER REFERENCES users (id)")
+    else:
+        op.add_column('maintenance_issues', sa.Column('assignee_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            'fk_maintenance_issues_assignee_id', 'maintenance_issues', 'users', ['assignee_id'], ['id']
+        )
+    op.add_column('maintenance_issues', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE maintenance_issues SET priority = LOWER(TRIM(priority))")
+    for alias, priority in PRIORITY_ALIASES.items():
+        op.execute(f"UPDATE maintenance_issues SET priority = '{priority}' WHERE priority = '{alias}'")
+    known = ', '.join(f"'{priority}'" for priority in PRIORITY_RANKS)
+    op.execute(f"UPDATE maintenance_issues SET priority = 'medium' WHERE priority IS NULL OR priority NOT IN ({known})")
+    for priority, rank in PRIORITY_RANKS.items():
+        op.execute(f"UPDATE maintenance_issues SET priority_rank = {rank} WHERE priority = '{priority}'")
+    op.execute("UPDATE maintenance_issues SET status = 'open' WHERE status IS NULL")
+
+    op.create_index(
+        'ix_maintenance_issues_status_rank_created', 'maintenance_issues',
+        ['status', 'priority_rank', 'created_at', 'id'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_maintenance_issues_status_rank_created', table_name='maintenance_issues')
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('fk_maintenance_issues_assignee_id', 'maintenance_issues', type_='foreignkey')
+    with op.batch_alter_table('maintenance_issues') as batch_op:
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('assignee_id')
+        batch_op.drop_column('priority_rank')
+    if op.get_bind().dialect.name == 'sqlite':
+        # The rebuilt table lost its full-text search triggers (see 0007)
+        fts = 'maintenance_issues_fts'
+        delete_old = f"INSERT INTO {fts}({fts}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);"
+        insert_new = f"INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description);"
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON maintenance_issues BEGIN {insert_new} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON maintenance_issues BEGIN {delete_old} END")
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF title, description ON maintenance_issues "
+            f"BEGIN {delete_old} {insert_new} END"
+        )
@@ -0,0 +1,46 @@
+"""Longest booking per asset, bounding booking overlap checks
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 21:00:00
+
+"""
+from alembic import op
+import math
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('assets', sa.Column('longest_booking_seconds', sa.Integer(), nullable=True))
+    # Durations are computed here rather than in SQL, which differs between databases
+    bookings = sa.table(
+        'asset_bookings',
+        sa.column('asset_id', sa.Integer()),
+        sa.column('start_time', sa.DateTime()),
+        sa.column('end_time', sa.DateTime()),
+    )
+    bind = op.get_bind()
+    longest = {}
+    rows = bind.execute(
+        sa.select(bookings.c.asset_id, bookings.c.start_time, bookings.c.end_time)
+        .where(bookings.c.start_time.isnot(None), bookings.c.end_time.isnot(None))
+    )
+    for asset_id, start_time, end_time in rows:
+        seconds = max(math.ceil((end_time - start_time).total_seconds()), 0)
+        longest[asset_id] = max(longest.get(asset_id, 0), seconds)
+    op.execute("UPDATE assets SET longest_booking_seconds = 0")
+    assets = sa.table('assets', sa.column('id', sa.Integer()), sa.column('longest_booking_seconds', sa.Integer()))
+    for asset_id, seconds in longest.items():
+        op.execute(assets.update().where(assets.c.id == asset_id).values(longest_booking_seconds=seconds))
+
+
+def downgrade():
+    with op.batch_alter_table('assets') as batch_op:
+        batch_op.drop_column('longest_booking_seconds')
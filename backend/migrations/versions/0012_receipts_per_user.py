@@ -0,0 +1,32 @@
+"""Deduplicate receipts per uploader
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index(op.f('ix_receipts_sha256'), table_name='receipts')
+    op.create_index(op.f('ix_receipts_sha256'), 'receipts', ['sha256'], unique=False)
+    op.create_index('ix_receipts_uploaded_by_sha256', 'receipts', ['uploaded_by', 'sha256'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_receipts_uploaded_by_sha256', table_name='receipts')
+    op.drop_index(op.f('ix_receipts_sha256'), table_name='receipts')
+    # Keep the oldest receipt per file so the global unique index can be rebuilt
+    op.execute(
+        "DELETE FROM receipts WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM receipts GROUP BY sha256) AS keep)"
+    )
+    op.create_index(op.f('ix_receipts_sha256'), 'receipts', ['sha256'], unique=True)
@@ -0,0 +1,100 @@
+import os
+
+# Cheap bcrypt for tests; must be set before the app reads its configuration
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from types import SimpleNamespace
+import pytest
+
+from ..app.main import app
+from ..app.database import Base, get_db, get_async_db
+from ..app import auth
+from ..app.response_cache import response_cache
+from ..app.revocation import revocation_list
+
+# File-backed SQLite database shared by the sync and async sessions of a test
+@pytest.fixture
+def database_path(tmp_path):
+    return tmp_path / "test.db"
+
+@pytest.fixture
+def engine(database_path):
+    engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+# Sync session for seeding and inspecting data around requests
+@pytest.fixture
+def db_session(engine):
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# TestClient runs every request on a fresh event loop, so async connections
+# must not outlive a request: NullPool opens one per session.
+@pytest.fixture
+def async_engine(engine, database_path):
+    return create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+
+@pytest.fixture
+def client(engine, async_engine):
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+# Resolved users and verified tokens must not leak between tests that reuse usernames
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    auth.user_cache.clear()
+    auth.token_cache.clear()
+    yield
+    auth.user_cache.clear()
+    auth.token_cache.clear()
+
+# Every test starts with a fresh database, so cached responses must not carry over
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    response_cache.store.clear()
+    yield
+    response_cache.store.clear()
+
+# Revocations live in the test's database, so the in-process mirror must not carry over
+@pytest.fixture(autouse=True)
+def clear_revocation_list():
+    revocation_list.clear()
+    yield
+    revocation_list.clear()
+
+# Authenticate every request of the test client as the given user
+@pytest.fixture
+def login_as():
+    def _login_as(user_id=1, username="testuser", role="employee", department=None):
+        user = SimpleNamespace(id=user_id, username=username, role=role, department=department)
+        app.dependency_overrides[auth.get_current_user] = lambda: user
+        app.dependency_overrides[auth.get_current_admin] = lambda: user
+        return user
+    return _login_as
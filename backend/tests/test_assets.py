@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+from unittest import mock
+import asyncio
+import httpx
+
+from ..app.main import app
+from ..app import models
+from ..app.bookings import free_slots
+from ..app.routers import assets
+
+DAY = datetime(2024, 3, 4)
+
+def at(hour, minute=0):
+    return (DAY + timedelta(hours=hour, minutes=minute)).isoformat()
+
+def seed_assets(db_session, count=1, **fields):
+    assets = [
+        models.Asset(name=f"Room {i}", description="", category=fields.get("category", "room"), location="HQ")
+        for i in range(count)
+    ]
+    db_session.add_all(assets)
+    db_session.commit()
+    return [asset.id for asset in assets]
+
+def book(client, asset_id, start, end):
+    return client.post(
+        "/api/assets/bookings",
+        json={"asset_id": asset_id, "start_time": start, "end_time": end, "purpose": "Meeting"},
+    )
+
+def test_overlapping_booking_is_rejected(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+
+    first = book(client, asset_id, at(9), at(11))
+    assert first.status_code == 201
+    assert first.json()["status"] == "pending"
+
+    assert book(client, asset_id, at(10), at(12)).status_code == 409
+    assert book(client, asset_id, at(8), at(9, 30)).status_code == 409
+    # Touching intervals do not overlap
+    assert book(client, asset_id, at(11), at(12)).status_code == 201
+    assert book(client, asset_id, at(7), at(9)).status_code == 201
+
+    # Cancelling releases the slot
+    assert client.delete(f"/api/assets/bookings/{first.json()['id']}").status_code == 204
+    assert book(client, asset_id, at(10), at(11)).status_code == 201
+
+def test_booking_validation(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+    assert book(client, asset_id, at(11), at(9)).status_code == 400
+    assert book(client, asset_id, at(0), (DAY + timedelta(days=30)).isoformat()).status_code == 400
+    assert book(client, 9999, at(9), at(10)).status_code == 404
+
+def test_long_booking_is_found_by_bounded_range(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+    # Starts days before the probe but still covers it
+    assert book(client, asset_id, (DAY - timedelta(days=3)).isoformat(), at(12)).status_code == 201
+    assert book(client, asset_id, at(10), at(11)).status_code == 409
+
+def test_booking_longer_than_current_limit_still_blocks(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+    # Booked while the limit was higher, then the limit was lowered
+    with mock.patch.object(assets, "ASSET_BOOKING_MAX_DURATION", timedelta(days=30)):
+        long_start = (DAY - timedelta(days=20)).isoformat()
+        assert book(client, asset_id, long_start, at(12)).status_code == 201
+
+    assert book(client, asset_id, at(10), at(11)).status_code == 409
+    listed = client.get(f"/api/assets/{asset_id}/bookings", params={"start": at(10), "end": at(11)}).json()
+    assert [b["start_time"] for b in listed] == [long_start]
+    availability = client.get("/api/assets/availability", params={"start": at(8), "end": at(14)}).json()
+    assert availability[0]["free_slots"] == [{"start": at(12), "end": at(14)}]
+
+def test_owner_rescheduling_approved_booking_needs_new_approval(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+    booking = book(client, asset_id, at(9), at(10)).json()
+    login_as(user_id=2, role="admin")
+    client.put(f"/api/assets/bookings/{booking['id']}", json={"status": "approved"})
+
+    # Changing only the purpose keeps the approval
+    login_as(user_id=1)
+    kept = client.put(f"/api/assets/bookings/{booking['id']}", json={"purpose": "Review"})
+    assert kept.json()["status"] == "approved"
+    moved = client.put(f"/api/assets/bookings/{booking['id']}", json={"start_time": at(8)})
+    assert moved.status_code == 200
+    assert moved.json()["status"] == "pending"
+
+    # Admins may move a booking and keep it approved
+    login_as(user_id=2, role="admin")
+    client.put(f"/api/assets/bookings/{booking['id']}", json={"status": "approved"})
+    moved = client.put(f"/api/assets/bookings/{booking['id']}", json={"start_time": at(7)})
+    assert moved.json()["status"] == "approved"
+
+def test_rescheduling_rechecks_overlap(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+    book(client, asset_id, at(9), at(10))
+    second = book(client, asset_id, at(13), at(14)).json()
+
+    moved = client.put(f"/api/assets/bookings/{second['id']}", json={"start_time": at(9, 30)})
+    assert moved.status_code == 409
+    moved = client.put(f"/api/assets/bookings/{second['id']}", json={"start_time": at(12), "purpose": "Review"})
+    assert moved.status_code == 200
+    assert moved.json()["purpose"] == "Review"
+
+    # Reactivating a cancelled booking must not double-book the slot
+    login_as(role="admin")
+    client.delete(f"/api/assets/bookings/{second['id']}")
+    book(client, asset_id, at(12), at(13))
+    assert client.put(f"/api/assets/bookings/{second['id']}", json={"status": "approved"}).status_code == 409
+
+def test_concurrent_bookings_cannot_double_book(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+
+    async def race():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            payload = {"asset_id": asset_id, "start_time": at(9), "end_time": at(10), "purpose": "Race"}
+            return await asyncio.gather(*(http.post("/api/assets/bookings", json=payload) for _ in range(8)))
+
+    responses = asyncio.run(race())
+    assert sorted(response.status_code for response in responses) == [201] + [409] * 7
+    assert db_session.query(models.AssetBooking).count() == 1
+
+def test_availability_across_assets(client, login_as, db_session):
+    login_as(user_id=1)
+    busy, free, _ = seed_assets(db_session, count=3)
+    book(client, busy, at(9), at(10))
+    book(client, busy, at(13), at(17))
+
+    response = client.get(
+        "/api/assets/availability",
+        params={"start": at(8), "end": at(18), "asset_ids": [busy, free]},
+    )
+    assert response.status_code == 200
+    slots = {entry["asset_id"]: entry["free_slots"] for entry in response.json()}
+    assert set(slots) == {busy, free}
+    assert slots[free] == [{"start": at(8), "end": at(18)}]
+    assert slots[busy] == [
+        {"start": at(8), "end": at(9)},
+        {"start": at(10), "end": at(13)},
+        {"start": at(17), "end": at(18)},
+    ]
+
+    response = client.get(
+        "/api/assets/availability",
+        params={"start": at(8), "end": at(18), "asset_ids": [busy], "min_duration_minutes": 90},
+    )
+    assert response.json()[0]["free_slots"] == [{"start": at(10), "end": at(13)}]
+
+def test_availability_window_is_bounded(client, login_as):
+    login_as(user_id=1)
+    response = client.get(
+        "/api/assets/availability",
+        params={"start": at(0), "end": (DAY + timedelta(days=90)).isoformat()},
+    )
+    assert response.status_code == 400
+
+def test_free_slots_merges_overlapping_bookings():
+    start, end = DAY, DAY + timedelta(hours=10)
+    hour = lambda h: DAY + timedelta(hours=h)
+    intervals = [(hour(-2), hour(1)), (hour(2), hour(5)), (hour(3), hour(4)), (hour(4), hour(6)), (hour(9), hour(12))]
+    assert free_slots(start, end, intervals) == [(hour(1), hour(2)), (hour(6), hour(9))]
+    assert free_slots(start, end, intervals, timedelta(hours=2)) == [(hour(6), hour(9))]
+    assert free_slots(start, end, []) == [(start, end)]
+
+def test_booking_leaves_asset_catalog_entry_unchanged(client, login_as, db_session):
+    login_as(user_id=1)
+    (asset_id,) = seed_assets(db_session)
+    updated_at = db_session.get(models.Asset, asset_id).updated_at
+    assert book(client, asset_id, at(9), at(10)).status_code == 201
+    assert book(client, asset_id, at(9), at(10)).status_code == 409
+
+    db_session.expire_all()
+    asset = db_session.get(models.Asset, asset_id)
+    assert asset.updated_at == updated_at
+    assert asset.longest_booking_seconds == 3600
@@ -0,0 +1,184 @@
+from datetime import timedelta
+from jose import jwt
+from sqlalchemy import event
+import ecdsa
+import pytest
+import time
+
+from ..app import auth, models
+from ..app.signing_keys import load_key_ring
+
+def add_user(db, username="alice", role="employee"):
+    user = models.User(
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password="not-used",
+        first_name=username.title(),
+        last_name="Example",
+        role=role,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+def bearer(username):
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': username})}"}
+
+def count_user_lookups(async_engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+def test_current_user_is_resolved_once_then_cached(client, db_session, async_engine):
+    alice = add_user(db_session)
+    lookups = count_user_lookups(async_engine)
+
+    for _ in range(3):
+        response = client.get("/api/expenses/me", headers=bearer("alice"))
+        assert response.status_code == 200
+    assert len(lookups) == 1
+    assert auth.user_cache.get("alice").id == alice.id
+
+def test_unknown_or_inactive_user_is_rejected(client, db_session):
+    add_user(db_session, username="bob").is_active = False
+    db_session.commit()
+    assert client.get("/api/expenses/me", headers=bearer("bob")).status_code == 401
+    assert client.get("/api/expenses/me", headers=bearer("nobody")).status_code == 401
+
+def test_update_and_delete_invalidate_cached_user(client, db_session):
+    admin = add_user(db_session, username="admin", role="admin")
+    carol = add_user(db_session, username="carol")
+
+    assert client.get("/api/users/me", headers=bearer("carol")).json()["role"] == "employee"
+    assert auth.user_cache.get("carol") is not None
+
+    response = client.put(f"/api/users/{carol.id}", json={"role": "manager"}, headers=bearer("admin"))
+    assert response.status_code == 200
+    assert auth.user_cache.get("carol") is None
+    assert client.get("/api/users/me", headers=bearer("carol")).json()["role"] == "manager"
+
+    response = client.put(f"/api/users/{carol.id}", json={"is_active": False}, headers=bearer("admin"))
+    assert response.status_code == 200
+    assert client.get("/api/users/me", headers=bearer("carol")).status_code == 401
+
+    assert client.delete(f"/api/users/{admin.id}", headers=bearer("admin")).status_code == 204
+    assert client.get("/api/users/me", headers=bearer("admin")).status_code == 401
+
+def test_users_cannot_promote_themselves(client, db_session):
+    dave = add_user(db_session, username="dave")
+    headers = bearer("dave")
+    assert client.put(f"/api/users/{dave.id}", json={"first_name": "David"}, headers=headers).status_code == 200
+    assert client.put(f"/api/users/{dave.id}", json={"role": "admin"}, headers=headers).status_code == 403
+
+def test_login_issues_token_for_valid_password(client, db_session):
+    user = add_user(db_session, username="erin")
+    user.hashed_password = auth.get_password_hash("s3cret")
+    db_session.commit()
+
+    response = client.post("/api/users/token", data={"username": "erin", "password": "wrong"})
+    assert response.status_code == 401
+
+    # Email works as the login name too
+    response = client.post("/api/users/token", data={"username": "erin@example.com", "password": "s3cret"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["username"] == "erin"
+
+def test_login_rehashes_outdated_cost(client, db_session):
+    user = add_user(db_session, username="frank")
+    user.hashed_password = auth.pwd_context.hash("s3cret", rounds=auth.BCRYPT_ROUNDS + 1)
+    db_session.commit()
+
+    response = client.post("/api/users/token", data={"username": "frank", "password": "s3cret"})
+    assert response.status_code == 200
+    db_session.refresh(user)
+    assert user.hashed_password.startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+    assert auth.verify_password("s3cret", user.hashed_password)
+
+def test_login_is_rejected_when_hashing_queue_is_full(client, db_session, monkeypatch):
+    user = add_user(db_session, username="gina")
+    user.hashed_password = auth.get_password_hash("s3cret")
+    db_session.commit()
+
+    full_pool = auth.HashingPool(workers=1, max_queue=0)
+    full_pool._pending = full_pool.capacity
+    monkeypatch.setattr(auth, "hashing_pool", full_pool)
+
+    response = client.post("/api/users/token", data={"username": "gina", "password": "s3cret"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def es256_ring(tmp_path, *kids, public_only=()):
+    for kid in kids:
+        pem = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p)
+        if kid in public_only:
+            (tmp_path / f"{kid}.pub.pem").write_bytes(pem.get_verifying_key().to_pem())
+        else:
+            (tmp_path / f"{kid}.pem").write_bytes(pem.to_pem())
+    return load_key_ring(algorithm="ES256", secret_keys="", keys_dir=str(tmp_path))
+
+@pytest.fixture
+def restore_key_ring():
+    ring = auth.key_ring
+    yield
+    auth.use_key_ring(ring)
+
+def test_rotated_secrets_keep_old_tokens_valid(client, db_session, restore_key_ring):
+    add_user(db_session, username="alice")
+    # Tokens from before key ids were issued
+    legacy = jwt.encode({"sub": "alice", "exp": time.time() + 60}, auth.SECRET_KEY, algorithm="HS256")
+
+    auth.use_key_ring(load_key_ring(secret_keys=f"2026-10:new-secret,default:{auth.SECRET_KEY}"))
+    headers = bearer("alice")
+    assert jwt.get_unverified_header(headers["Authorization"][7:])["kid"] == "2026-10"
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {legacy}"}).status_code == 200
+
+    # Once the old secret is dropped its tokens stop working, cached or not
+    auth.use_key_ring(load_key_ring(secret_keys="2026-10:new-secret"))
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {legacy}"}).status_code == 401
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+def test_asymmetric_tokens_verify_with_published_keys(client, db_session, tmp_path, restore_key_ring):
+    add_user(db_session, username="alice")
+    auth.use_key_ring(es256_ring(tmp_path, "2026-04", "2026-10", public_only=("2026-04",)))
+    assert auth.key_ring.active.kid == "2026-10"
+    token = bearer("alice")["Authorization"][7:]
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    jwks = client.get("/.well-known/jwks.json").json()
+    assert sorted(key["kid"] for key in jwks["keys"]) == ["2026-04", "2026-10"]
+    assert all("d" not in key for key in jwks["keys"])
+    # Another service needs nothing but the published key
+    published = next(key for key in jwks["keys"] if key["kid"] == "2026-10")
+    assert jwt.decode(token, published, algorithms=["ES256"])["sub"] == "alice"
+
+    # HS256 tokens signed with the old secret are not accepted once it is gone
+    forged = jwt.encode({"sub": "alice", "exp": time.time() + 60}, auth.SECRET_KEY, algorithm="HS256", headers={"kid": "2026-10"})
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
+
+def test_verified_tokens_are_cached_until_expiry(client, db_session, monkeypatch):
+    add_user(db_session, username="alice")
+    decoded = []
+    decode = jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decoded.append(1) or decode(*args, **kwargs))
+
+    token = auth.create_access_token({"sub": "alice"}, expires_delta=timedelta(seconds=1))
+    for _ in range(3):
+        assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert len(decoded) == 1
+
+    # A tampered copy is a different key in the cache and fails verification
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload, signature[:-2] + ("AA" if signature[-2:] != "AA" else "BB")])
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {tampered}"}).status_code == 401
+
+    # jose compares exp in whole seconds
+    time.sleep(2.1)
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
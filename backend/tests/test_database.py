@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import pytest
+
+from ..app import database
+from ..app.database import Base, engine_options, pool_status, to_async_url
+from ..app.main import app
+
+def test_async_url_follows_database_url():
+    assert to_async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert to_async_url("mysql+pymysql://u:p@db/app") == "mysql+aiomysql://u:p@db/app"
+    assert to_async_url("postgresql+asyncpg://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+def test_in_memory_sqlite_keeps_default_pool():
+    assert "poolclass" not in engine_options("sqlite://")
+    assert "poolclass" not in engine_options("sqlite:///:memory:")
+
+def test_pool_status_reports_checkouts_and_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url))
+
+    held = engine.connect()
+    status = pool_status(engine)
+    assert status["pool"] == "TimedQueuePool"
+    assert status["checked_out"] == 1
+    assert status["overflow"] == 0
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    status = pool_status(engine)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 2
+    assert status["timeouts"] == 1
+    assert status["wait_seconds_max"] >= 0.05
+    engine.dispose()
+
+def test_pool_health_endpoint():
+    response = TestClient(app).get("/health/pool")
+    assert response.status_code == 200
+    assert set(response.json()) == {"sync", "async"}
+
+def test_readiness_waits_for_timed_startup(tmp_path, monkeypatch):
+    from ..app import main
+
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'ready.db'}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    url = f"sqlite+aiosqlite:///{tmp_path / 'ready.db'}"
+    async_engine = create_async_engine(url, **engine_options(url, pool_class=database.TimedAsyncQueuePool))
+    monkeypatch.setattr(main, "async_engine", async_engine)
+    monkeypatch.setattr(main, "AsyncSessionLocal", async_sessionmaker(bind=async_engine))
+    monkeypatch.setattr(database, "DB_POOL_WARM", 3)
+
+    assert TestClient(app).get("/health/ready").status_code == 503
+    with TestClient(app) as client:
+        assert client.get("/health/ready").status_code == 200
+        assert pool_status(async_engine)["checked_in"] == 3
+        assert set(app.state.startup_timings) == {"mappers", "warm_pool", "revocations"}
+    assert client.get("/health/ready").status_code == 503
+    async_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,131 @@
+from fastapi import Request
+from datetime import datetime
+from types import SimpleNamespace
+import asyncio
+import httpx
+
+from ..app.main import app
+from ..app import auth, models
+
+def seed_activity(db_session, capacity):
+    activity = models.EducationActivity(
+        title="Python 101", description="", location="HQ", capacity=capacity, seats_remaining=capacity,
+        start_date=datetime(2024, 5, 6, 9), end_date=datetime(2024, 5, 6, 17),
+    )
+    db_session.add(activity)
+    db_session.commit()
+    return activity.id
+
+def registrations(db_session, activity_id):
+    db_session.expire_all()
+    rows = db_session.query(models.ActivityRegistration).filter_by(activity_id=activity_id).order_by(models.ActivityRegistration.id)
+    return [(row.user_id, row.status) for row in rows]
+
+def seats(db_session, activity_id):
+    db_session.expire_all()
+    return db_session.get(models.EducationActivity, activity_id).seats_remaining
+
+# Each request authenticates as the user id in its X-User header
+def login_from_header():
+    def user(request: Request):
+        return SimpleNamespace(id=int(request.headers["X-User"]), username="u", role="employee", department=None)
+    app.dependency_overrides[auth.get_current_user] = user
+
+def test_registration_fills_seats_then_waitlists(client, login_as, db_session):
+    activity_id = seed_activity(db_session, capacity=2)
+    url = f"/api/education/{activity_id}/registrations"
+    statuses = []
+    for user_id in (1, 2, 3, 4):
+        login_as(user_id=user_id)
+        response = client.post(url)
+        assert response.status_code == 201
+        statuses.append((response.json()["status"], response.json()["waitlist_position"]))
+    assert statuses == [("registered", None), ("registered", None), ("waitlisted", 1), ("waitlisted", 2)]
+    assert seats(db_session, activity_id) == 0
+
+    # One registration per user
+    assert client.post(url).status_code == 409
+    assert client.post("/api/education/9999/registrations").status_code == 404
+
+def test_cancellation_promotes_head_of_waitlist(client, login_as, db_session):
+    activity_id = seed_activity(db_session, capacity=1)
+    url = f"/api/education/{activity_id}/registrations"
+    ids = {}
+    for user_id in (1, 2, 3):
+        login_as(user_id=user_id)
+        ids[user_id] = client.post(url).json()["id"]
+
+    # Leaving the waitlist frees no seat
+    login_as(user_id=3)
+    assert client.delete(f"{url}/{ids[3]}").status_code == 204
+    login_as(user_id=2)
+    assert client.delete(f"{url}/{ids[1]}").status_code == 403
+
+    login_as(user_id=1)
+    assert client.delete(f"{url}/{ids[1]}").status_code == 204
+    assert registrations(db_session, activity_id) == [(1, "cancelled"), (2, "registered"), (3, "cancelled")]
+    assert seats(db_session, activity_id) == 0
+
+    # Registering again goes to the back of the line; the last seat freed stays free
+    assert client.post(url).json()["status"] == "waitlisted"
+    login_as(user_id=2)
+    client.delete(f"{url}/{ids[2]}")
+    assert registrations(db_session, activity_id)[-1] == (1, "registered")
+    login_as(user_id=1)
+    client.delete(f"{url}/{client.get('/api/education/registrations/me').json()[0]['id']}")
+    assert seats(db_session, activity_id) == 1
+
+def test_capacity_change_promotes_and_guards(client, login_as, db_session):
+    activity_id = seed_activity(db_session, capacity=1)
+    for user_id in (1, 2, 3):
+        login_as(user_id=user_id)
+        client.post(f"/api/education/{activity_id}/registrations")
+
+    login_as(role="admin")
+    response = client.put(f"/api/education/{activity_id}", json={"capacity": 2, "location": "Room 4"})
+    assert response.status_code == 200
+    assert response.json()["seats_remaining"] == 0
+    assert response.json()["location"] == "Room 4"
+    assert [s for _, s in registrations(db_session, activity_id)] == ["registered", "registered", "waitlisted"]
+
+    assert client.put(f"/api/education/{activity_id}", json={"capacity": 1}).status_code == 400
+    assert client.put(f"/api/education/{activity_id}", json={"capacity": None}).json()["seats_remaining"] is None
+    assert [s for _, s in registrations(db_session, activity_id)] == ["registered"] * 3
+
+def test_unlimited_capacity_never_waitlists(client, login_as, db_session):
+    activity_id = seed_activity(db_session, capacity=None)
+    for user_id in range(1, 6):
+        login_as(user_id=user_id)
+        assert client.post(f"/api/education/{activity_id}/registrations").json()["status"] == "registered"
+
+def test_concurrent_registrations_never_overbook(client, db_session):
+    capacity, users = 10, 60
+    activity_id = seed_activity(db_session, capacity=capacity)
+    login_from_header()
+
+    async def rush():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            url = f"/api/education/{activity_id}/registrations"
+            registered = await asyncio.gather(*(http.post(url, headers={"X-User": str(u)}) for u in range(1, users + 1)))
+            # Half the seat holders cancel while the rest of the company retries
+            holders = [r.json() for r in registered if r.json()["status"] == "registered"][:capacity // 2]
+            await asyncio.gather(
+                *(http.delete(f"{url}/{r['id']}", headers={"X-User": str(r['user_id'])}) for r in holders),
+                *(http.post(url, headers={"X-User": str(u)}) for u in range(1, users + 1)),
+            )
+            return registered
+
+    responses = asyncio.run(rush())
+    assert all(response.status_code == 201 for response in responses)
+    rows = registrations(db_session, activity_id)
+    assert len(rows) == users
+    assert sum(1 for _, s in rows if s == "registered") == capacity
+    assert sum(1 for _, s in rows if s == "cancelled") == capacity // 2
+    assert seats(db_session, activity_id) == 0
+    # Freed seats went to the head of the waitlist
+    first_round = [response.json() for response in responses]
+    seated = {r["id"] for r in first_round if r["status"] == "registered"}
+    head_of_waitlist = set(sorted(r["id"] for r in first_round if r["status"] == "waitlisted")[:capacity // 2])
+    by_status = lambda s: {row.id for row in db_session.query(models.ActivityRegistration).filter_by(status=s)}
+    assert by_status("registered") == (seated - by_status("cancelled")) | head_of_waitlist
@@ -0,0 +1,70 @@
+from sqlalchemy import event, text
+
+def test_batch_create_is_all_or_nothing(client, login_as):
+    login_as(user_id=7)
+    items = [{"amount": 10 + i, "category": "meals", "description": f"Lunch {i}"} for i in range(5)]
+
+    response = client.post("/api/expenses/batch", json={"items": items})
+    assert response.status_code == 201
+    results = response.json()
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert all(r["ok"] for r in results)
+    ids = [r["id"] for r in results]
+    assert len(set(ids)) == 5
+
+    created = client.get("/api/expenses/me").json()
+    assert sorted(e["id"] for e in created) == sorted(ids)
+    assert all(e["user_id"] == 7 and e["status"] == "pending" for e in created)
+
+    # One invalid item rejects the whole batch
+    bad = items + [{"amount": "lots", "category": "meals", "description": "?"}]
+    assert client.post("/api/expenses/batch", json={"items": bad}).status_code == 422
+    assert len(client.get("/api/expenses/me").json()) == 5
+
+def test_batch_status_transition_reports_per_item(client, login_as):
+    login_as(user_id=1)
+    items = [{"amount": 1, "category": "misc", "description": "x"} for _ in range(4)]
+    ids = [r["id"] for r in client.post("/api/expenses/batch", json={"items": items}).json()]
+
+    login_as(role="admin")
+    response = client.post("/api/expenses/batch/status", json={"ids": ids[:2], "status": "rejected"})
+    assert all(r["ok"] for r in response.json())
+
+    response = client.post(
+        "/api/expenses/batch/status", json={"ids": ids + [ids[2], 9999], "status": "approved"}
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["ok"] for r in results] == [False, False, True, True, False, False]
+    assert results[0]["error"] == "Cannot change status from rejected to approved"
+    assert results[4]["error"] == "Duplicate id"
+    assert results[5]["error"] == "Expense not found"
+
+    statuses = {e["id"]: e["status"] for e in client.get("/api/expenses/").json()}
+    assert [statuses[i] for i in ids] == ["rejected", "rejected", "approved", "approved"]
+
+def test_batch_status_transition_skips_rows_moved_concurrently(client, login_as, engine, async_engine):
+    login_as(user_id=1)
+    items = [{"amount": 10, "category": "misc", "description": "x"} for _ in range(3)]
+    ids = [r["id"] for r in client.post("/api/expenses/batch", json={"items": items}).json()]
+
+    # Another request approves the first expense between the batch's check and its UPDATE
+    raced = []
+    def approve_first(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE expenses") and not raced:
+            raced.append(statement)
+            with engine.begin() as other:
+                other.execute(text("UPDATE expenses SET status = 'approved' WHERE id = :id"), {"id": ids[0]})
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", approve_first)
+    login_as(user_id=1, role="admin")
+    response = client.post("/api/expenses/batch/status", json={"ids": ids, "status": "rejected"})
+    event.remove(async_engine.sync_engine, "before_cursor_execute", approve_first)
+    results = response.json()
+    assert [r["ok"] for r in results] == [False, True, True]
+    assert results[0]["error"] == "Status was changed by another request"
+
+    statuses = {e["id"]: e["status"] for e in client.get("/api/expenses/me").json()}
+    assert statuses == {ids[0]: "approved", ids[1]: "rejected", ids[2]: "rejected"}
+    summary = {row["status"]: row["count"] for row in client.get("/api/expenses/summary").json()}
+    assert summary == {"pending": 1, "rejected": 2}
@@ -0,0 +1,67 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+
+from ..app import models
+from ..app.summaries import find_expense_summary_drift, reconcile_expense_summaries
+
+def summary(client, **params):
+    return {row["status"]: (row["count"], row["total_amount"]) for row in client.get(
+        "/api/expenses/summary", params=params
+    ).json()}
+
+def drift(async_engine):
+    async def run():
+        async with AsyncSession(async_engine) as db:
+            return await find_expense_summary_drift(db)
+    return asyncio.run(run())
+
+def test_summary_follows_every_write_path(client, login_as, async_engine):
+    login_as(user_id=1)
+    first = client.post("/api/expenses/", json={"amount": 100, "category": "travel", "description": "Train"}).json()
+    items = [{"amount": 50, "category": "meals", "description": "Dinner"} for _ in range(3)]
+    batch_ids = [r["id"] for r in client.post("/api/expenses/batch", json={"items": items}).json()]
+    assert summary(client) == {"pending": (4, 250.0)}
+
+    client.put(f"/api/expenses/{first['id']}", json={"amount": 120})
+    assert summary(client) == {"pending": (4, 270.0)}
+
+    login_as(user_id=1, role="admin")
+    client.put(f"/api/expenses/{first['id']}", json={"status": "approved"})
+    client.post("/api/expenses/batch/status", json={"ids": batch_ids[:2], "status": "rejected"})
+    assert summary(client) == {"approved": (1, 120.0), "pending": (1, 50.0), "rejected": (2, 100.0)}
+
+    client.delete(f"/api/expenses/{batch_ids[2]}")
+    assert summary(client) == {"approved": (1, 120.0), "rejected": (2, 100.0)}
+    assert drift(async_engine) == []
+
+def test_summary_of_other_users_is_admin_only(client, login_as):
+    login_as(user_id=2)
+    client.post("/api/expenses/", json={"amount": 10, "category": "misc", "description": "Tape"})
+
+    login_as(user_id=3)
+    assert summary(client) == {}
+    assert client.get("/api/expenses/summary", params={"user_id": 2}).status_code == 403
+
+    login_as(user_id=3, role="admin")
+    assert summary(client, user_id=2) == {"pending": (1, 10.0)}
+
+def test_reconciliation_reports_and_repairs_drift(client, login_as, db_session, async_engine):
+    login_as(user_id=1)
+    client.post("/api/expenses/", json={"amount": 30, "category": "misc", "description": "Ink"})
+
+    # A write that bypassed the API
+    db_session.add(models.Expense(user_id=1, amount=5.0, category="misc", description="x", status="approved"))
+    db_session.query(models.ExpenseSummary).filter_by(status="pending").update({"count": 9})
+    db_session.commit()
+
+    async def run():
+        async with AsyncSession(async_engine) as db:
+            return await reconcile_expense_summaries(db)
+
+    report = asyncio.run(run())
+    assert {(entry["status"], entry["expected_count"], entry["actual_count"]) for entry in report} == {
+        ("approved", 1, 0),
+        ("pending", 1, 9),
+    }
+    assert drift(async_engine) == []
+    assert summary(client) == {"approved": (1, 5.0), "pending": (1, 30.0)}
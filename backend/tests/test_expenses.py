@@ -0,0 +1,41 @@
+def test_expense_crud_round_trip(client, login_as):
+    login_as(user_id=1)
+    response = client.post("/api/expenses/", json={"amount": 12.5, "category": "meals", "description": "Lunch"})
+    assert response.status_code == 201
+    expense = response.json()
+    assert expense["user_id"] == 1
+    assert expense["status"] == "pending"
+
+    response = client.put(f"/api/expenses/{expense['id']}", json={"amount": 15.0})
+    assert response.status_code == 200
+    assert response.json()["amount"] == 15.0
+
+    # Only admins may change the status
+    response = client.put(f"/api/expenses/{expense['id']}", json={"status": "approved"})
+    assert response.status_code == 403
+
+    assert client.get(f"/api/expenses/{expense['id']}").status_code == 200
+    assert client.delete(f"/api/expenses/{expense['id']}").status_code == 204
+    assert client.get(f"/api/expenses/{expense['id']}").status_code == 404
+
+def test_expense_of_another_user_is_forbidden(client, login_as):
+    login_as(user_id=1)
+    expense = client.post("/api/expenses/", json={"amount": 1, "category": "misc", "description": "Pens"}).json()
+
+    login_as(user_id=2)
+    assert client.get(f"/api/expenses/{expense['id']}").status_code == 403
+    assert client.delete(f"/api/expenses/{expense['id']}").status_code == 403
+
+def test_null_fields_leave_expense_unchanged(client, login_as):
+    login_as(user_id=1)
+    expense = client.post("/api/expenses/", json={"amount": 20, "category": "misc", "description": "Pens"}).json()
+
+    login_as(user_id=1, role="admin")
+    response = client.put(
+        f"/api/expenses/{expense['id']}", json={"status": None, "amount": None, "description": "Pencils"}
+    )
+    assert response.status_code == 200
+    updated = response.json()
+    assert (updated["status"], updated["amount"], updated["description"]) == ("pending", 20, "Pencils")
+    summary = client.get("/api/expenses/summary").json()
+    assert [(row["status"], row["count"], row["total_amount"]) for row in summary] == [("pending", 1, 20.0)]
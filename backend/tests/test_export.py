@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import csv
+import io
+import json
+import os
+import tracemalloc
+
+from ..app import models
+from ..app.export import stream_export
+
+# Set EXPORT_MEMORY_TEST_ROWS=1000000 for the full-size run
+MEMORY_TEST_ROWS = int(os.getenv("EXPORT_MEMORY_TEST_ROWS", "100000"))
+
+def seed_expenses(engine, count):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, count, 50000):
+            conn.execute(insert(models.Expense), [
+                {
+                    "user_id": i % 3 + 1,
+                    "amount": float(i),
+                    "category": "travel" if i % 2 else "meals",
+                    "description": f"expense, \"number\" {i}",
+                    "status": "approved" if i % 4 == 0 else "pending",
+                    "created_at": start + timedelta(minutes=i),
+                    "updated_at": start + timedelta(minutes=i),
+                }
+                for i in range(offset, min(offset + 50000, count))
+            ])
+
+def test_csv_export_applies_filters(client, engine, login_as):
+    login_as(role="admin")
+    seed_expenses(engine, 40)
+
+    response = client.get("/api/expenses/export", params={
+        "status": "approved",
+        "category": "meals",
+        "created_from": "2024-01-01T00:05:00",
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == [9, 13, 17, 21, 25, 29, 33, 37]
+    assert rows[0]["description"] == 'expense, "number" 8'
+
+def test_ndjson_export_and_empty_csv(client, engine, login_as):
+    login_as(role="admin")
+    seed_expenses(engine, 10)
+
+    response = client.get("/api/expenses/export", params={"format": "ndjson", "user_id": 2})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [2, 5, 8]
+    assert lines[0]["created_at"] == "2024-01-01T00:01:00"
+
+    response = client.get("/api/expenses/export", params={"status": "rejected"})
+    assert response.text.strip() == "id,user_id,amount,category,description,status,receipt_url,created_at,updated_at"
+
+def test_export_memory_stays_flat(engine, async_engine):
+    seed_expenses(engine, MEMORY_TEST_ROWS)
+    stmt = select(
+        models.Expense.id, models.Expense.amount, models.Expense.description, models.Expense.created_at
+    ).order_by(models.Expense.created_at, models.Expense.id)
+
+    async def consume():
+        exported = 0
+        early_peak = None
+        async with AsyncSession(async_engine) as db:
+            async for chunk in stream_export(db, stmt, "csv"):
+                exported += chunk.count("\n")
+                if early_peak is None and exported > MEMORY_TEST_ROWS // 10:
+                    early_peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.reset_peak()
+        return exported, early_peak
+
+    tracemalloc.start()
+    try:
+        exported, early_peak = asyncio.run(consume())
+        late_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert exported == MEMORY_TEST_ROWS + 1
+    # Streaming ten times as many rows must not need meaningfully more memory
+    assert late_peak < early_peak * 1.5 + 256 * 1024
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import asyncio
+import json
+import pytest
+
+from ..app import jobs, models, notifications
+from ..app.webhook_stub import WebhookStub
+
+@pytest.fixture
+def session_factory(async_engine):
+    return async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+@pytest.fixture
+def webhook(monkeypatch):
+    with WebhookStub() as stub:
+        monkeypatch.setattr(notifications, "TEAMS_WEBHOOK_URL", stub.url)
+        monkeypatch.setattr(notifications, "NOTIFICATION_BATCH_SECONDS", 0)
+        yield stub
+
+def queued_jobs(db_session):
+    db_session.expire_all()
+    return db_session.execute(select(models.Job).order_by(models.Job.id)).scalars().all()
+
+def run_worker(session_factory, worker_id="test"):
+    return asyncio.run(jobs.Worker(session_factory, worker_id=worker_id).run_once())
+
+# Make every queued job due now, as if its backoff had passed
+def make_due(db_session):
+    db_session.execute(update(models.Job).values(run_at=datetime.utcnow() - timedelta(seconds=1)))
+    db_session.commit()
+
+def create_expenses(client, login_as, user_id, count):
+    login_as(user_id=user_id)
+    return [
+        client.post("/api/expenses/", json={"amount": 10 + i, "category": "meals", "description": "Lunch"}).json()["id"]
+        for i in range(count)
+    ]
+
+def test_decisions_are_coalesced_per_recipient(client, login_as, db_session, session_factory, webhook):
+    alice = create_expenses(client, login_as, 1, 3)
+    bob = create_expenses(client, login_as, 2, 1)
+
+    login_as(user_id=9, role="admin")
+    client.put(f"/api/expenses/{alice[0]}", json={"status": "approved"})
+    client.post("/api/expenses/batch/status", json={"ids": alice[1:] + bob, "status": "rejected"})
+    # Edits that don't change the status notify no one
+    client.put(f"/api/expenses/{alice[0]}", json={"amount": 99})
+
+    pending = queued_jobs(db_session)
+    assert [(job.pending_key, len(json.loads(job.payload)["items"])) for job in pending] == [
+        ("notify:1", 3), ("notify:2", 1),
+    ]
+
+    assert run_worker(session_factory) == 2
+    assert queued_jobs(db_session) == []
+    texts = sorted(message["text"] for message in webhook.messages)
+    assert len(texts) == 2
+    assert texts[0].startswith("User #1: 3 updates")
+    assert f"Expense #{alice[0]} (meals, 10.00) is now approved" in texts[0]
+    assert texts[1] == f"User #2: Expense #{bob[0]} (10.00) is now rejected"
+
+def test_claimed_jobs_take_no_more_items(client, login_as, db_session, session_factory, webhook):
+    expense_ids = create_expenses(client, login_as, 1, 2)
+    login_as(user_id=9, role="admin")
+    client.put(f"/api/expenses/{expense_ids[0]}", json={"status": "approved"})
+
+    async def claim():
+        async with session_factory() as db:
+            return await jobs.claim_jobs(db, "test")
+    claimed = asyncio.run(claim())
+    client.put(f"/api/expenses/{expense_ids[1]}", json={"status": "approved"})
+
+    pending = queued_jobs(db_session)
+    assert [job.status for job in pending] == ["running", "queued"]
+    assert pending[0].id == claimed[0].id and pending[0].pending_key is None
+    assert asyncio.run(claim()) != []  # the new job
+    assert asyncio.run(claim()) == []  # nothing left to claim
+
+def test_failures_back_off_then_succeed(client, login_as, db_session, session_factory, webhook):
+    expense_id = create_expenses(client, login_as, 1, 1)[0]
+    login_as(user_id=9, role="admin")
+    client.put(f"/api/expenses/{expense_id}", json={"status": "approved"})
+    webhook.fail_next(2)
+
+    assert run_worker(session_factory) == 1
+    job = queued_jobs(db_session)[0]
+    assert (job.status, job.attempts) == ("queued", 1)
+    assert "500" in job.last_error
+    assert job.run_at > datetime.utcnow() + timedelta(seconds=jobs.JOB_BACKOFF_SECONDS * 0.4)
+    # Not due yet
+    assert run_worker(session_factory) == 0
+
+    make_due(db_session)
+    run_worker(session_factory)
+    make_due(db_session)
+    run_worker(session_factory)
+    assert queued_jobs(db_session) == []
+    assert len(webhook.messages) == 1
+
+def test_exhausted_and_rejected_jobs_are_dead_lettered(db_session, session_factory, webhook):
+    async def enqueue():
+        async with session_factory() as db:
+            await jobs.enqueue(db, notifications.NOTIFY_JOB, {"key": "1", "items": ["a"]}, max_attempts=2)
+            await jobs.enqueue(db, notifications.NOTIFY_JOB, {"key": "2", "items": ["b"]})
+            await jobs.enqueue(db, "unknown", {})
+            await db.commit()
+    asyncio.run(enqueue())
+
+    # The unknown kind is dead at once; both notifications fail twice, which
+    # exhausts the first; the second is then rejected
+    for failure in (500, 500, 400):
+        webhook.fail_next(2, status=failure)
+        run_worker(session_factory)
+        make_due(db_session)
+
+    dead = db_session.execute(select(models.DeadJob).order_by(models.DeadJob.job_id)).scalars().all()
+    assert [(d.kind, d.attempts) for d in dead] == [("notify", 2), ("notify", 3), ("unknown", 1)]
+    assert "500" in dead[0].last_error and "400" in dead[1].last_error and "No handler" in dead[2].last_error
+    assert queued_jobs(db_session) == []
+
+def test_jobs_of_dead_workers_are_reclaimed(db_session, session_factory):
+    db_session.add(models.Job(
+        kind="unknown", payload="{}", status="running", attempts=1, max_attempts=3, locked_by="gone",
+        locked_at=datetime.utcnow() - timedelta(seconds=jobs.JOB_LOCK_TIMEOUT_SECONDS + 1),
+        run_at=datetime.utcnow(),
+    ))
+    db_session.commit()
+
+    async def claim():
+        async with session_factory() as db:
+            return await jobs.claim_jobs(db, "alive")
+    [job] = asyncio.run(claim())
+    assert job.locked_by.startswith("alive:") and job.attempts == 2
+
+def test_rolled_back_changes_queue_nothing(db_session, session_factory):
+    async def notify_then_roll_back():
+        async with session_factory() as db:
+            await notifications.notify(db, 1, "never sent")
+            await db.rollback()
+    asyncio.run(notify_then_roll_back())
+    assert queued_jobs(db_session) == []
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import asyncio
+
+from ..app import models
+from ..app.routers.maintenance import _claim_next_issue
+
+def seed_issues(db_session, *priorities):
+    start = datetime(2024, 5, 1)
+    issues = [
+        models.MaintenanceIssue(
+            reporter_id=1, title=f"Issue {i}", description="", location="HQ", priority=priority,
+            status="open", created_at=start + timedelta(hours=i),
+        )
+        for i, priority in enumerate(priorities)
+    ]
+    db_session.add_all(issues)
+    db_session.commit()
+    return [issue.id for issue in issues]
+
+def test_report_normalizes_priority(client, login_as, db_session):
+    login_as(user_id=1)
+    response = client.post("/api/maintenance/", json={"title": "Leak", "description": "Sink", "location": "Kitchen", "priority": "high"})
+    assert response.status_code == 201
+    issue = response.json()
+    assert (issue["priority"], issue["status"], issue["assignee_id"]) == ("high", "open", None)
+    assert db_session.get(models.MaintenanceIssue, issue["id"]).priority_rank == models.PRIORITY_RANKS["high"]
+
+    response = client.post("/api/maintenance/", json={"title": "Leak", "description": "", "location": "", "priority": "soonish"})
+    assert response.status_code == 422
+
+def test_claims_follow_priority_then_age(client, login_as, db_session):
+    low, high_old, critical, high_new = seed_issues(db_session, "low", "high", "critical", "high")
+
+    login_as(user_id=1)
+    assert client.get("/api/maintenance/queue").status_code == 403
+    assert client.post("/api/maintenance/queue/claim").status_code == 403
+
+    login_as(user_id=5, role="manager")
+    assert [i["id"] for i in client.get("/api/maintenance/queue").json()] == [critical, high_old, high_new, low]
+    claimed = [client.post("/api/maintenance/queue/claim").json() for _ in range(4)]
+    assert [i["id"] for i in claimed] == [critical, high_old, high_new, low]
+    assert all(i["status"] == "in_progress" and i["assignee_id"] == 5 and i["claimed_at"] for i in claimed)
+    assert client.post("/api/maintenance/queue/claim").status_code == 204
+    assert client.get("/api/maintenance/queue").json() == []
+
+def test_concurrent_claims_never_share_an_issue(db_session, async_engine):
+    issue_ids = seed_issues(db_session, *["medium"] * 5)
+    session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def claim(user_id):
+        async with session_factory() as db:
+            issue_id = await _claim_next_issue(db, user_id)
+            await db.commit()
+            return issue_id
+
+    async def claim_all():
+        return await asyncio.gather(*(claim(user_id) for user_id in range(8)))
+
+    claimed = asyncio.run(claim_all())
+    assert sorted(i for i in claimed if i is not None) == issue_ids
+    assert claimed.count(None) == 3
+    assignees = db_session.execute(select(models.MaintenanceIssue.assignee_id)).scalars().all()
+    assert len(set(assignees)) == 5
+
+def test_reopened_issue_returns_to_queue_and_reporter_is_notified(client, login_as, db_session):
+    [issue_id] = seed_issues(db_session, "medium")
+
+    login_as(user_id=5, role="manager")
+    client.post("/api/maintenance/queue/claim")
+    login_as(user_id=1)
+    # The reporter may edit the issue but not move it along
+    assert client.put(f"/api/maintenance/{issue_id}", json={"status": "resolved"}).status_code == 403
+    assert client.put(f"/api/maintenance/{issue_id}", json={"priority": "critical"}).json()["priority"] == "critical"
+
+    login_as(user_id=5, role="manager")
+    issue = client.put(f"/api/maintenance/{issue_id}", json={"status": "open"}).json()
+    assert (issue["status"], issue["assignee_id"], issue["claimed_at"]) == ("open", None, None)
+    assert client.get("/api/maintenance/queue").json()[0]["id"] == issue_id
+
+    job = db_session.execute(select(models.Job)).scalar_one()
+    assert job.pending_key == "notify:1"
+    assert "is now in_progress" in job.payload and "is now open" in job.payload
+
+def test_issue_visibility(client, login_as, db_session):
+    [issue_id] = seed_issues(db_session, "low")
+    login_as(user_id=2)
+    assert client.get(f"/api/maintenance/{issue_id}").status_code == 403
+    assert client.get("/api/maintenance/me").json() == []
+    login_as(user_id=1)
+    assert client.get(f"/api/maintenance/{issue_id}").json()["title"] == "Issue 0"
+    assert [i["id"] for i in client.get("/api/maintenance/me").json()] == [issue_id]
+    assert client.get("/api/maintenance/").status_code == 403
+    assert client.get("/api/maintenance/999").status_code == 404
@@ -0,0 +1,94 @@
+from unittest import mock
+import json
+import logging
+import os
+import re
+
+from ..app import metrics
+
+def sample(client, name, **labels):
+    text = client.get("/metrics").text
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_metrics_endpoint_is_prometheus_text(client):
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",status="200",le="+Inf"}' in response.text
+    assert '# TYPE db_pool_checkouts counter' in response.text
+
+def test_request_records_latency_size_and_sql(client, login_as, async_engine):
+    metrics.instrument_engine(async_engine.sync_engine)
+    login_as(user_id=1)
+    client.post("/api/expenses/", json={"amount": 12.5, "category": "meals", "description": "Lunch"})
+    labels = {"method": "GET", "route": "/api/expenses/me", "status": "200"}
+    before_count = sample(client, "http_request_duration_seconds_count", **labels)
+    before_sql = sample(client, "http_request_sql_statements_sum", **labels)
+    before_size = sample(client, "http_response_size_bytes_sum", **labels)
+
+    response = client.get("/api/expenses/me")
+
+    assert sample(client, "http_request_duration_seconds_count", **labels) == before_count + 1
+    # One SELECT for the page
+    assert sample(client, "http_request_sql_statements_sum", **labels) == before_sql + 1
+    assert sample(client, "http_response_size_bytes_sum", **labels) == before_size + len(response.content)
+    assert sample(client, "sql_statements_total", route="/api/expenses/me") >= 1
+
+def test_unknown_paths_share_one_label(client):
+    before = sample(client, "http_request_duration_seconds_count", method="GET", route="unmatched", status="404")
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+    after = sample(client, "http_request_duration_seconds_count", method="GET", route="unmatched", status="404")
+    assert after == before + 2
+
+def test_slow_queries_are_logged_with_route(client, login_as, async_engine, caplog):
+    metrics.instrument_engine(async_engine.sync_engine)
+    login_as(user_id=1)
+    with mock.patch.object(metrics, "SLOW_QUERY_MS", 0), caplog.at_level(logging.WARNING, logger="backend.app.metrics"):
+        client.get("/api/expenses/me")
+    messages = [record.getMessage() for record in caplog.records if record.name.endswith("metrics")]
+    assert any(m.startswith("Slow query") and "/api/expenses/me" in m and "FROM expenses" in m for m in messages)
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(("/x",), value)
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{route="/x",le="0.1"} 1',
+        'test_seconds_bucket{route="/x",le="1.0"} 3',
+        'test_seconds_bucket{route="/x",le="+Inf"} 4',
+        'test_seconds_sum{route="/x"} 4.25',
+        'test_seconds_count{route="/x"} 4',
+    ]
+
+def test_workers_sharing_a_directory_are_summed(tmp_path):
+    def worker_registry(durations, idle):
+        registry = metrics.Registry()
+        requests = registry.register(metrics.Counter("test_requests_total", "Test.", ("route",)))
+        latency = registry.register(metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0)))
+        for value in durations:
+            requests.inc(("/x",))
+            latency.observe(("/x",), value)
+        registry.add_collector(lambda: [("test_pool_idle", "Test.", "gauge", [({"engine": "sync"}, idle)])])
+        return registry
+
+    # Another worker's snapshot, as it would have written it
+    other = worker_registry([0.5, 3.0], idle=2).snapshot()
+    (tmp_path / "4242.json").write_text(json.dumps(other))
+
+    text = worker_registry([0.05], idle=5).render(str(tmp_path))
+    assert 'test_requests_total{route="/x"} 3' in text
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 2' in text
+    assert 'test_seconds_count{route="/x"} 3' in text
+    assert f'test_pool_idle{{engine="sync",worker="{os.getpid()}"}} 5' in text
+    assert 'test_pool_idle{engine="sync",worker="4242"} 2' in text
+
+    # An exited worker's counts stay in the totals; its gauges are dropped
+    metrics.mark_worker_dead(str(tmp_path), 4242)
+    text = worker_registry([0.05], idle=5).render(str(tmp_path))
+    assert 'test_requests_total{route="/x"} 3' in text
+    assert 'worker="4242"' not in text
@@ -0,0 +1,135 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, event
+import pytest
+
+from ..app.database import Base
+from ..app.migrations import alembic_config, upgrade_database
+from ..app.search import is_search_object
+
+# The client fixture's sessions then run against the migrated schema instead of create_all
+@pytest.fixture
+def migrated_engine(database_path):
+    engine = create_engine(f"sqlite:///{database_path}")
+    upgrade_database(engine)
+    yield engine
+    engine.dispose()
+
+# Full-text search tables and indexes are not part of Base.metadata
+def include_name(name, type_, parent_names):
+    return not (type_ in ("table", "index") and is_search_object(name))
+
+def test_migrations_match_models(migrated_engine):
+    with migrated_engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_name": include_name})
+        diff = compare_metadata(context, Base.metadata)
+    assert diff == []
+
+def test_legacy_create_all_database_is_stamped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    upgrade_database(engine, revision="0001")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE alembic_version")
+    upgrade_database(engine)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT version_num FROM alembic_version").scalar() is not None
+    engine.dispose()
+
+def test_longest_booking_is_backfilled(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bookings.db'}")
+    upgrade_database(engine, revision="0010")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO assets (id, name) VALUES (1, 'Van'), (2, 'Room')")
+        connection.exec_driver_sql(
+            "INSERT INTO asset_bookings (asset_id, start_time, end_time) VALUES "
+            "(1, '2024-03-01 09:00:00.000000', '2024-03-11 09:00:00.000000'), "
+            "(1, '2024-03-12 09:00:00.000000', '2024-03-12 10:00:00.000000')"
+        )
+    upgrade_database(engine)
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT id, longest_booking_seconds FROM assets ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [(1, 10 * 24 * 3600), (2, 0)]
+    engine.dispose()
+
+def test_current_create_all_database_is_stamped_at_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'create_all.db'}")
+    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
+    with engine.connect() as connection:
+        version = connection.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+    assert version == ScriptDirectory.from_config(alembic_config()).get_current_head()
+    engine.dispose()
+
+def test_unrecognised_unversioned_database_is_not_guessed(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'partial.db'}")
+    upgrade_database(engine, revision="0005")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE alembic_version")
+    with pytest.raises(RuntimeError, match="alembic stamp"):
+        upgrade_database(engine)
+    engine.dispose()
+
+# Run a request and return the query plan of every SELECT it issued
+def query_plans(client, async_engine, engine, login_as, path, params, role="employee"):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    login_as(user_id=1, role=role)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(path, params=params).status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            plans.append(" | ".join(row[-1] for row in rows))
+    return plans
+
+def test_my_expenses_status_filter_uses_index(migrated_engine, client, async_engine, login_as):
+    plans = query_plans(client, async_engine, migrated_engine, login_as, "/api/expenses/me", {"status": "pending"})
+    assert any("ix_expenses_user_status_created_at" in plan for plan in plans)
+    assert not any("SCAN expenses" in plan and "INDEX" not in plan for plan in plans)
+
+def test_admin_status_filter_uses_index(migrated_engine, client, async_engine, login_as):
+    plans = query_plans(
+        client, async_engine, migrated_engine, login_as, "/api/expenses/", {"status": "approved"}, role="admin"
+    )
+    assert any("ix_expenses_status_created_at" in plan for plan in plans)
+    assert not any("TEMP B-TREE" in plan for plan in plans)
+
+def test_asset_booking_range_uses_index(migrated_engine):
+    with migrated_engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM asset_bookings "
+            "WHERE asset_id = ? AND start_time < ? AND end_time > ?",
+            (1, "2024-01-02", "2024-01-01"),
+        ).fetchall()
+    assert "ix_asset_bookings_asset_time" in " | ".join(row[-1] for row in rows)
+
+def test_availability_uses_booking_range_index(migrated_engine, client, async_engine, login_as):
+    plans = query_plans(
+        client, async_engine, migrated_engine, login_as, "/api/assets/availability",
+        {"start": "2024-03-04T08:00:00", "end": "2024-03-04T18:00:00", "category": "room"},
+    )
+    assert any("ix_asset_bookings_asset_time" in plan for plan in plans)
+    assert not any("SCAN asset_bookings" in plan for plan in plans)
+
+def test_sick_leave_calendar_uses_end_date_index(migrated_engine, client, async_engine, login_as):
+    plans = query_plans(
+        client, async_engine, migrated_engine, login_as, "/api/sick-leave/calendar",
+        {"start": "2024-03-04", "end": "2024-03-10"}, role="admin",
+    )
+    assert any("ix_sick_leaves_end_start" in plan for plan in plans)
+    assert not any("SCAN sick_leaves" in plan for plan in plans)
+
+def test_maintenance_queue_uses_triage_index(migrated_engine, client, async_engine, login_as):
+    plans = query_plans(client, async_engine, migrated_engine, login_as, "/api/maintenance/queue", {}, role="manager")
+    assert any("ix_maintenance_issues_status_rank_created" in plan for plan in plans)
+    assert not any("TEMP B-TREE" in plan for plan in plans)
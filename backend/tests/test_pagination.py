@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from ..app import models
+from ..app.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+
+def seed_expenses(db, count, user_id=1):
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        db.add(models.Expense(
+            user_id=user_id,
+            amount=10.0 + i,
+            category="travel",
+            description=f"expense {i}",
+            status="pending" if i % 2 else "approved",
+            # Every other pair shares a timestamp to exercise the id tie-breaker
+            created_at=start + timedelta(minutes=i // 2),
+        ))
+    db.commit()
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 1, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+def test_invalid_cursor_is_rejected(client, login_as):
+    login_as(role="admin")
+    response = client.get("/api/expenses/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_cursor_walk_matches_offset_listing(client, db_session, login_as):
+    login_as(role="admin")
+    seed_expenses(db_session, 25)
+
+    everything = client.get("/api/expenses/", params={"limit": 100}).json()
+    assert len(everything) == 25
+
+    seen = []
+    params = {"limit": 10}
+    while True:
+        response = client.get("/api/expenses/", params=params)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        next_cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not next_cursor:
+            break
+        params = {"limit": 10, "cursor": next_cursor}
+
+    assert [e["id"] for e in seen] == [e["id"] for e in everything]
+
+def test_offset_clients_still_work(client, db_session, login_as):
+    login_as(user_id=1)
+    seed_expenses(db_session, 6, user_id=1)
+    seed_expenses(db_session, 3, user_id=2)
+
+    response = client.get("/api/expenses/me", params={"skip": 4, "limit": 10, "status": "approved"})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    response = client.get("/api/expenses/me", params={"skip": 1, "limit": 1})
+    assert len(response.json()) == 1
+    assert response.headers[NEXT_CURSOR_HEADER]
@@ -0,0 +1,160 @@
+from unittest import mock
+import hashlib
+import os
+import pytest
+
+from ..app.main import app
+from ..app import models, receipts
+from ..app.storage import LocalStorage, get_storage
+
+PDF = b"%PDF-1.4\n" + b"receipt line\n" * 1000
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(tmp_path / "uploads")
+    app.dependency_overrides[get_storage] = lambda: storage
+    yield storage
+    app.dependency_overrides.pop(get_storage, None)
+
+def stored_files(storage):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), storage.root)
+        for directory, _, names in os.walk(storage.root)
+        for name in names
+    )
+
+def upload(client, data, filename="receipt.pdf", content_type="application/pdf"):
+    return client.post("/api/expenses/upload-receipt", files={"file": (filename, data, content_type)})
+
+def test_upload_streams_to_storage_and_processes(client, login_as, storage, db_session):
+    login_as(user_id=3)
+    # Small chunks force the upload through many writes
+    with mock.patch.object(receipts, "RECEIPT_CHUNK_SIZE", 1024):
+        response = upload(client, PDF)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert body["size"] == len(PDF)
+    assert body["deduplicated"] is False
+    assert body["receipt_url"] == f"/api/expenses/receipts/{body['receipt_id']}"
+
+    files = stored_files(storage)
+    assert len(files) == 1 and files[0].endswith(".pdf")
+    with open(os.path.join(storage.root, files[0]), "rb") as handle:
+        assert handle.read() == PDF
+
+    # TestClient runs background tasks before returning the response
+    receipt = db_session.get(models.Receipt, body["receipt_id"])
+    assert receipt.status == "ready"
+    assert receipt.uploaded_by == 3
+    assert receipt.content_type == "application/pdf"
+
+def test_duplicate_upload_reuses_existing_receipt(client, login_as, storage):
+    login_as(user_id=3)
+    first = upload(client, PDF).json()
+    second = upload(client, PDF, filename="copy.pdf").json()
+    assert second["deduplicated"] is True
+    assert second["receipt_id"] == first["receipt_id"]
+    assert second["receipt_url"] == first["receipt_url"]
+    assert len(stored_files(storage)) == 1
+
+def test_oversized_upload_is_rejected_and_cleaned_up(client, login_as, storage, db_session):
+    login_as(user_id=3)
+    with mock.patch.object(receipts, "RECEIPT_CHUNK_SIZE", 1024), \
+         mock.patch.object(receipts, "RECEIPT_MAX_BYTES", 2048):
+        response = upload(client, PDF)
+    assert response.status_code == 413
+    assert stored_files(storage) == []
+    assert db_session.query(models.Receipt).count() == 0
+
+def test_unrecognised_file_is_rejected_before_storing(client, login_as, storage, db_session):
+    login_as(user_id=3)
+    response = upload(client, b"MZ\x90\x00 not a receipt", filename="invoice.pdf")
+    assert response.status_code == 415
+    assert stored_files(storage) == []
+    assert db_session.query(models.Receipt).count() == 0
+
+def test_stored_name_follows_content_not_filename(client, login_as, storage, db_session):
+    login_as(user_id=3)
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+    response = upload(client, png, filename="page.html", content_type="text/html")
+    receipt = db_session.get(models.Receipt, response.json()["receipt_id"])
+    assert receipt.storage_key.endswith(".png")
+    assert receipt.content_type == "image/png"
+
+def test_scan_command_failure_rejects_receipt(client, login_as, storage, db_session):
+    login_as(user_id=3)
+    with mock.patch.object(receipts, "RECEIPT_SCAN_COMMAND", "false"):
+        response = upload(client, PDF)
+    receipt = db_session.get(models.Receipt, response.json()["receipt_id"])
+    assert receipt.status == "rejected"
+    assert receipt.rejection_reason == "Failed virus scan"
+    assert stored_files(storage) == []
+
+    # A rejected receipt is never served
+    assert client.get(response.json()["receipt_url"]).status_code == 404
+
+def test_upload_after_failed_processing_retries(client, login_as, storage, db_session):
+    login_as(user_id=3)
+    with mock.patch.object(storage, "read", side_effect=OSError("storage unavailable")):
+        first = upload(client, PDF).json()
+    receipt = db_session.get(models.Receipt, first["receipt_id"])
+    assert receipt.rejection_reason == "Processing failed"
+    assert stored_files(storage) == []
+
+    second = upload(client, PDF).json()
+    assert second["receipt_id"] == first["receipt_id"]
+    assert second["deduplicated"] is False
+    db_session.refresh(receipt)
+    assert receipt.status == "ready"
+    assert len(stored_files(storage)) == 1
+
+def test_download_is_an_authorised_attachment(client, login_as, storage):
+    login_as(user_id=3)
+    body = upload(client, PDF).json()
+    response = client.get(body["receipt_url"])
+    assert response.status_code == 200
+    assert response.content == PDF
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-disposition"] == f'attachment; filename="receipt-{body["receipt_id"]}.pdf"'
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+    # Pointing an expense at someone else's receipt grants nothing
+    login_as(user_id=4)
+    assert client.get(body["receipt_url"]).status_code == 404
+    expense = {"amount": 12, "category": "meals", "description": "Lunch", "receipt_url": body["receipt_url"]}
+    assert client.post("/api/expenses/", json=expense).status_code == 400
+    assert client.post("/api/expenses/batch", json={"items": [expense]}).status_code == 400
+    own = client.post("/api/expenses/", json={**expense, "receipt_url": None}).json()
+    assert client.put(f"/api/expenses/{own['id']}", json={"receipt_url": body["receipt_url"]}).status_code == 400
+    assert client.get(body["receipt_url"]).status_code == 404
+
+    login_as(user_id=3)
+    assert client.post("/api/expenses/", json=expense).status_code == 201
+
+    for role in ("manager", "admin"):
+        login_as(user_id=5, role=role)
+        assert client.get(body["receipt_url"]).status_code == 200
+
+def test_uploads_are_deduplicated_per_user(client, login_as, storage):
+    login_as(user_id=3)
+    first = upload(client, PDF).json()
+    login_as(user_id=4)
+    second = upload(client, PDF).json()
+    assert second["deduplicated"] is False
+    assert second["receipt_id"] != first["receipt_id"]
+    assert client.get(second["receipt_url"]).status_code == 200
+    assert client.get(first["receipt_url"]).status_code == 404
+
+def test_uploads_are_not_served_statically(client, login_as, storage):
+    login_as(user_id=3)
+    upload(client, PDF)
+    for key in stored_files(storage):
+        assert client.get(f"/uploads/{key}").status_code == 404
+
+def test_upload_requires_authentication(client, storage):
+    assert upload(client, PDF).status_code == 401
+
+def test_local_storage_rejects_keys_outside_root(storage):
+    with pytest.raises(ValueError):
+        storage._path("../escape.txt")
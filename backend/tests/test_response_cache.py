@@ -0,0 +1,123 @@
+from datetime import datetime
+from pydantic import BaseModel
+from starlette.requests import Request
+from types import SimpleNamespace
+import asyncio
+
+from ..app import models
+from ..app.response_cache import MemoryStore, ResponseCache, _cache_enabled, etag_matches
+from .test_travel import count_selects
+
+class NameOnly(BaseModel):
+    name: str
+
+def seed_asset(db_session, name="Projector"):
+    asset = models.Asset(name=name, description="", category="av", location="HQ")
+    db_session.add(asset)
+    db_session.commit()
+    return asset.id
+
+def test_unchanged_asset_is_served_from_cache_and_revalidated(client, login_as, db_session, async_engine):
+    asset_id = seed_asset(db_session)
+    login_as(user_id=1)
+
+    first = client.get(f"/api/assets/{asset_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    with count_selects(async_engine) as statements:
+        second = client.get(f"/api/assets/{asset_id}")
+        not_modified = client.get(f"/api/assets/{asset_id}", headers={"If-None-Match": etag})
+    assert statements == []
+    assert second.json() == first.json() and second.headers["etag"] == etag
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+def test_writes_invalidate_and_change_the_etag(client, login_as, db_session):
+    asset_id = seed_asset(db_session)
+    login_as(user_id=1, role="admin")
+    listing = client.get("/api/assets/")
+    detail = client.get(f"/api/assets/{asset_id}")
+
+    client.put(f"/api/assets/{asset_id}", json={"location": "Annex"})
+
+    changed = client.get(f"/api/assets/{asset_id}", headers={"If-None-Match": detail.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["location"] == "Annex"
+    assert changed.headers["etag"] != detail.headers["etag"]
+    assert client.get("/api/assets/").json()[0]["location"] == "Annex"
+    assert client.get("/api/assets/").headers["etag"] != listing.headers["etag"]
+
+def test_cache_is_keyed_by_query_and_keeps_cursor_header(client, login_as, db_session):
+    for i in range(3):
+        seed_asset(db_session, name=f"Laptop {i}")
+    login_as(user_id=1)
+
+    page = client.get("/api/assets/", params={"limit": 2})
+    cached_page = client.get("/api/assets/", params={"limit": 2})
+    assert len(cached_page.json()) == 2
+    assert cached_page.headers["x-next-cursor"] == page.headers["x-next-cursor"]
+    assert len(client.get("/api/assets/", params={"limit": 3}).json()) == 3
+
+def test_activity_seats_are_fresh_after_registration(client, login_as, db_session):
+    activity = models.EducationActivity(
+        title="Course", description="", location="HQ", capacity=2, seats_remaining=2,
+        start_date=datetime(2024, 5, 6, 9), end_date=datetime(2024, 5, 6, 17),
+    )
+    db_session.add(activity)
+    db_session.commit()
+    login_as(user_id=1)
+    assert client.get(f"/api/education/{activity.id}").json()["seats_remaining"] == 2
+
+    client.post(f"/api/education/{activity.id}/registrations")
+
+    assert client.get(f"/api/education/{activity.id}").json()["seats_remaining"] == 1
+    assert client.get("/api/education/").json()[0]["seats_remaining"] == 1
+
+def test_user_updates_invalidate_cached_users(client, login_as, db_session):
+    user = models.User(email="a@example.com", username="alice", hashed_password="x", first_name="A", last_name="B")
+    db_session.add(user)
+    db_session.commit()
+    login_as(user_id=user.id, role="admin")
+    assert client.get(f"/api/users/{user.id}").json()["first_name"] == "A"
+    assert client.get("/api/users/").json()[0]["first_name"] == "A"
+
+    client.put(f"/api/users/{user.id}", json={"first_name": "Alicia"})
+
+    assert client.get(f"/api/users/{user.id}").json()["first_name"] == "Alicia"
+    assert client.get("/api/users/").json()[0]["first_name"] == "Alicia"
+    assert client.get("/api/users/999").status_code == 404
+
+# Two workers sharing one store: an invalidation in one is seen by the other
+def test_invalidation_is_shared_through_the_store():
+    store = MemoryStore()
+    worker_a, worker_b = ResponseCache(store), ResponseCache(store)
+    request = Request({"type": "http", "method": "GET", "path": "/api/assets/1", "query_string": b"", "headers": []})
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return SimpleNamespace(id=1, name="Projector", updated_at=None), {}
+
+    async def scenario():
+        await worker_b.respond(request, "assets", "employee", NameOnly, load)
+        await worker_b.respond(request, "assets", "employee", NameOnly, load)
+        await worker_a.invalidate("assets")
+        await worker_b.respond(request, "assets", "employee", NameOnly, load)
+
+    asyncio.run(scenario())
+    assert len(loads) == 2
+
+def test_if_none_match_parsing():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"c"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+def test_per_worker_cache_is_off_with_several_workers():
+    assert _cache_enabled(True, "memory", 1)
+    assert not _cache_enabled(True, "memory", 4)
+    assert _cache_enabled(True, "redis", 4)
+    assert not _cache_enabled(False, "redis", 1)
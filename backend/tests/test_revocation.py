@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import asyncio
+import pytest
+
+from ..app import auth, models
+from ..app.revocation import RevocationList, revocation_list
+
+@pytest.fixture
+def session_factory(async_engine):
+    return async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+def login(client, db_session, username="alice"):
+    db_session.add(models.User(
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password=auth.get_password_hash("s3cret"),
+        first_name=username.title(),
+        last_name="Example",
+        role="employee",
+    ))
+    db_session.commit()
+    response = client.post("/api/users/token", data={"username": username, "password": "s3cret"})
+    assert response.status_code == 200
+    return response.json()
+
+def me(client, tokens):
+    return client.get("/api/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+def refresh(client, tokens):
+    return client.post("/api/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+def test_refresh_tokens_rotate(client, db_session):
+    tokens = login(client, db_session)
+    response = refresh(client, tokens)
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert me(client, rotated).json()["username"] == "alice"
+    # Only hashes are stored
+    stored = {token.token_hash for token in db_session.query(models.RefreshToken)}
+    assert tokens["refresh_token"] not in stored and len(stored) == 2
+
+    assert client.post("/api/users/token/refresh", json={"refresh_token": "made-up"}).status_code == 401
+
+def test_reused_refresh_token_revokes_its_family(client, db_session):
+    tokens = login(client, db_session)
+    rotated = refresh(client, tokens).json()
+
+    # The spent token is presented again: both the thief's and the owner's tokens stop working
+    assert refresh(client, tokens).status_code == 401
+    assert refresh(client, rotated).status_code == 401
+    assert me(client, rotated).status_code == 401
+    assert me(client, tokens).status_code == 401
+
+    # Other logins of the same user are unaffected
+    auth.user_cache.clear()
+    other = client.post("/api/users/token", data={"username": "alice", "password": "s3cret"}).json()
+    assert me(client, other).status_code == 200
+
+def test_expired_refresh_token_is_rejected(client, db_session):
+    tokens = login(client, db_session)
+    db_session.query(models.RefreshToken).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db_session.commit()
+    assert refresh(client, tokens).status_code == 401
+
+def test_logout_revokes_without_querying_revocations(client, db_session, async_engine):
+    tokens = login(client, db_session)
+    statements = []
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    assert me(client, tokens).status_code == 200
+    response = client.post("/api/users/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 204
+    assert me(client, tokens).status_code == 401
+    assert refresh(client, tokens).status_code == 401
+    assert not any("FROM revoked_tokens" in statement for statement in statements)
+
+def test_deactivated_user_loses_refresh_tokens(client, db_session):
+    tokens = login(client, db_session)
+    db_session.add(models.User(email="admin@example.com", username="admin", hashed_password="x", role="admin"))
+    db_session.commit()
+    alice = db_session.query(models.User).filter_by(username="alice").one()
+    admin_headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'admin'})}"}
+
+    assert client.put(f"/api/users/{alice.id}", json={"is_active": False}, headers=admin_headers).status_code == 200
+    assert refresh(client, tokens).status_code == 401
+
+def test_sync_picks_up_other_workers_revocations(db_session, session_factory):
+    # Another worker's mirror, which did not see the revocations being made
+    other_worker = RevocationList()
+    now = datetime.utcnow()
+    db_session.add_all([
+        models.RevokedToken(token_id="expired", expires_at=now - timedelta(minutes=1)),
+        models.RevokedToken(token_id="old", expires_at=now + timedelta(minutes=5)),
+    ])
+    db_session.commit()
+
+    async def sync():
+        async with session_factory() as db:
+            return await other_worker.sync(db)
+
+    # The first sync loads everything that has not expired yet
+    assert asyncio.run(sync()) == 1
+    assert other_worker.is_revoked("old") and not other_worker.is_revoked("expired")
+
+    # Later syncs read only recent rows, including ones committed out of order
+    db_session.add_all([
+        models.RevokedToken(token_id="new", expires_at=now + timedelta(minutes=5)),
+        models.RevokedToken(token_id="late", expires_at=now + timedelta(minutes=5), created_at=now - timedelta(seconds=30)),
+    ])
+    db_session.commit()
+    asyncio.run(sync())
+    assert other_worker.is_revoked("new") and other_worker.is_revoked("late")
+    assert not other_worker.is_revoked(None, "unknown")
+    assert len(revocation_list) == 0
+
+    other_worker.prune(now + timedelta(minutes=10))
+    assert len(other_worker) == 0
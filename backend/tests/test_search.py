@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+from ..app import models
+from ..app.migrations import upgrade_database
+from ..app.search import fts5_query, search_terms
+
+def seed(db_session):
+    db_session.add_all([
+        models.Expense(user_id=1, amount=30.0, category="travel", description="Taxi to the airport in Oslo",
+                       status="pending", created_at=datetime(2024, 5, 6)),
+        models.Expense(user_id=1, amount=12.0, category="meals", description="Airport lunch, airport coffee",
+                       status="approved", created_at=datetime(2024, 6, 2)),
+        models.Expense(user_id=2, amount=99.0, category="travel", description="Airport parking",
+                       status="pending", created_at=datetime(2024, 5, 7)),
+        models.MaintenanceIssue(reporter_id=1, title="Broken coffee machine", description="Kitchen, 3rd floor",
+                                location="HQ", priority="high", status="open", created_at=datetime(2024, 5, 8)),
+        models.EducationActivity(title="Coffee tasting", description="Learn to brew at the office",
+                                 location="HQ", start_date=datetime(2024, 7, 1), end_date=datetime(2024, 7, 1)),
+    ])
+    db_session.commit()
+
+def results(client, **params):
+    response = client.get("/api/search/", params=params)
+    assert response.status_code == 200, response.text
+    return [(r["type"], r["title"]) for r in response.json()]
+
+def test_search_ranks_matches_across_sources(client, login_as, db_session):
+    seed(db_session)
+    login_as(user_id=1)
+
+    hits = client.get("/api/search/", params={"q": "airport"}).json()
+    # The description that mentions the term twice ranks first; user 2's expense is hidden
+    assert [(h["type"], h["title"]) for h in hits] == [("expense", "meals"), ("expense", "travel")]
+    assert "[airport]" in hits[0]["snippet"].lower()
+    assert hits[0]["score"] >= hits[1]["score"]
+
+    assert set(results(client, q="coffee")) == {("expense", "meals"), ("maintenance", "Broken coffee machine"), ("activity", "Coffee tasting")}
+    # Prefix match on the last term
+    assert results(client, q="coff", type="activity") == [("activity", "Coffee tasting")]
+    assert results(client, q="taxi oslo") == [("expense", "travel")]
+    assert results(client, q='"); DROP TABLE expenses; --') == []
+
+    login_as(user_id=3, role="admin")
+    assert len(results(client, q="airport")) == 3
+
+def test_maintenance_results_follow_issue_access(client, login_as, db_session):
+    seed(db_session)
+    # User 1 reported the coffee machine; user 2 neither reported nor was assigned it
+    login_as(user_id=2)
+    assert results(client, q="coffee", type="maintenance") == []
+
+    issue = db_session.query(models.MaintenanceIssue).one()
+    issue.assignee_id = 2
+    db_session.commit()
+    assert results(client, q="coffee", type="maintenance") == [("maintenance", "Broken coffee machine")]
+
+    login_as(user_id=3, role="manager")
+    assert results(client, q="coffee", type="maintenance") == [("maintenance", "Broken coffee machine")]
+
+def test_search_filters_and_pages(client, login_as, db_session):
+    seed(db_session)
+    login_as(user_id=1, role="admin")
+    assert results(client, q="airport", status="pending") == [("expense", "travel"), ("expense", "travel")]
+    # Activities have no status and drop out of status-filtered searches
+    assert results(client, q="coffee", status="open") == [("maintenance", "Broken coffee machine")]
+    assert results(client, q="airport", date_from="2024-06-01T00:00:00") == [("expense", "meals")]
+    assert results(client, q="coffee", date_to="2024-06-01T00:00:00") == [("maintenance", "Broken coffee machine")]
+
+    everything = results(client, q="airport", limit=3)
+    assert results(client, q="airport", limit=2) + results(client, q="airport", skip=2, limit=2) == everything
+
+    assert client.get("/api/search/", params={"q": "airport", "type": "travel"}).status_code == 400
+    assert client.get("/api/search/", params={"q": "airport", "skip": 990, "limit": 20}).status_code == 400
+
+def test_index_follows_updates_and_deletes(client, login_as, db_session):
+    seed(db_session)
+    login_as(user_id=1)
+    expense_id = client.post("/api/expenses/", json={"amount": 5, "category": "office", "description": "Stapler"}).json()["id"]
+    assert results(client, q="stapler") == [("expense", "office")]
+
+    client.put(f"/api/expenses/{expense_id}", json={"description": "Hole punch"})
+    assert results(client, q="stapler") == []
+    assert results(client, q="punch") == [("expense", "office")]
+
+    client.delete(f"/api/expenses/{expense_id}")
+    assert results(client, q="punch") == []
+
+def test_migration_indexes_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    upgrade_database(engine, revision="0006")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO maintenance_issues (title, description, status) VALUES ('Leaking tap', 'Second floor', 'open')"
+        ))
+    upgrade_database(engine)
+    with engine.connect() as connection:
+        rowids = connection.execute(text(
+            "SELECT rowid FROM maintenance_issues_fts WHERE maintenance_issues_fts MATCH 'leaking'"
+        )).scalars().all()
+    engine.dispose()
+    assert rowids == [1]
+
+def test_query_text_is_reduced_to_terms():
+    assert search_terms('taxi "oslo" -airport*') == ["taxi", "oslo", "airport"]
+    assert fts5_query(["taxi", "osl"]) == '"taxi" "osl"*'
@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy import insert, select
+from unittest import mock
+import json
+import pytest
+
+from ..app import models, schemas, serialization
+from ..app.routers import expenses
+from ..app.serialization import encode_rows, list_adapter, schema_columns
+
+def seed_expenses(db_session, count, user_id=1):
+    created_at = datetime(2024, 5, 6, 9, 30, 15, 123456)
+    db_session.execute(insert(models.Expense), [
+        {"user_id": user_id, "amount": i * 1.25, "category": "meals", "description": f"Lunch {i}",
+         "status": "pending", "receipt_url": None if i % 2 else f"/uploads/{i}.pdf",
+         "created_at": created_at, "updated_at": created_at}
+        for i in range(count)
+    ])
+    db_session.commit()
+
+# The JSON the response_model path produced from ORM objects
+def response_model_json(objects):
+    adapter = list_adapter(schemas.Expense)
+    return json.loads(json.dumps(adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")))
+
+@pytest.mark.parametrize("serializer", ["adapter", "direct"])
+def test_rows_encode_like_the_response_model(db_session, serializer):
+    seed_expenses(db_session, 5)
+    objects = db_session.execute(select(models.Expense).order_by(models.Expense.id)).scalars().all()
+    rows = db_session.execute(
+        select(*schema_columns(models.Expense, schemas.Expense)).order_by(models.Expense.id)
+    ).all()
+    assert json.loads(encode_rows(rows, schemas.Expense, serializer)) == response_model_json(objects)
+
+def test_schema_columns_rejects_fields_without_columns():
+    with pytest.raises(ValueError, match="bookings"):
+        schema_columns(models.TravelRequest, schemas.TravelRequestDetail)
+
+@pytest.mark.parametrize("setting", ["off", "adapter", "direct"])
+def test_expense_pages_keep_cursor_and_shape(client, login_as, db_session, setting):
+    seed_expenses(db_session, 3)
+    login_as(user_id=1)
+    with mock.patch.object(serialization, "FAST_SERIALIZER", setting):
+        first = client.get("/api/expenses/me", params={"limit": 2})
+        rest = client.get("/api/expenses/me", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert [e["description"] for e in first.json()] == ["Lunch 0", "Lunch 1"]
+    assert first.json()[0]["created_at"] == "2024-05-06T09:30:15.123456"
+    assert [e["description"] for e in rest.json()] == ["Lunch 2"]
+    assert "x-next-cursor" not in rest.headers
+
+def test_fast_path_is_opt_in(client, login_as, db_session):
+    seed_expenses(db_session, 2)
+    login_as(user_id=1)
+    calls = {}
+    for setting in ("off", "adapter", "direct"):
+        with mock.patch.object(serialization, "FAST_SERIALIZER", setting), \
+             mock.patch.object(expenses, "rows_response", wraps=expenses.rows_response) as encoded:
+            assert client.get("/api/expenses/me").status_code == 200
+        calls[setting] = encoded.call_count
+    assert calls == {"off": 0, "adapter": 1, "direct": 1}
@@ -0,0 +1,166 @@
+from datetime import date, datetime, timedelta
+
+from ..app import models
+from ..app.absences import absence_histogram
+
+def seed_user(db_session, username, department):
+    user = models.User(
+        email=f"{username}@example.com", username=username, hashed_password="x",
+        first_name=username.title(), last_name="Test", role="employee", department=department,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+def seed_leave(db_session, user_id, start, end, status="approved"):
+    db_session.add(models.SickLeave(
+        user_id=user_id, start_date=datetime.fromisoformat(start), end_date=datetime.fromisoformat(end),
+        reason="Flu", status=status,
+    ))
+    db_session.commit()
+
+def test_employee_creates_and_lists_own_leave(client, login_as):
+    login_as(user_id=5)
+    response = client.post(
+        "/api/sick-leave/",
+        json={"start_date": "2024-03-04T00:00:00", "end_date": "2024-03-06T00:00:00", "reason": "Flu"},
+    )
+    assert response.status_code == 201
+    assert response.json()["status"] == "pending"
+    assert [leave["id"] for leave in client.get("/api/sick-leave/me").json()] == [response.json()["id"]]
+
+    bad = {"start_date": "2024-03-06T00:00:00", "end_date": "2024-03-04T00:00:00", "reason": "Flu"}
+    assert client.post("/api/sick-leave/", json=bad).status_code == 400
+    # Team views are for managers
+    assert client.get("/api/sick-leave/calendar").status_code == 403
+
+def test_calendar_returns_leaves_overlapping_window(client, login_as, db_session):
+    alice = seed_user(db_session, "alice", "sales")
+    bob = seed_user(db_session, "bob", "sales")
+    carol = seed_user(db_session, "carol", "support")
+    seed_leave(db_session, alice, "2024-03-01", "2024-03-04")   # ends on the first day
+    seed_leave(db_session, bob, "2024-03-10", "2024-03-12")     # starts on the last day
+    seed_leave(db_session, bob, "2024-02-01", "2024-02-03")     # before the window
+    seed_leave(db_session, carol, "2024-03-05", "2024-03-06")
+    seed_leave(db_session, alice, "2024-03-06", "2024-03-07", status="rejected")
+
+    login_as(role="admin")
+    params = {"start": "2024-03-04", "end": "2024-03-10"}
+    entries = client.get("/api/sick-leave/calendar", params=params).json()
+    assert [(e["first_name"], e["start_date"][:10]) for e in entries] == [
+        ("Alice", "2024-03-01"), ("Carol", "2024-03-05"), ("Bob", "2024-03-10"),
+    ]
+
+    entries = client.get("/api/sick-leave/calendar", params={**params, "department": "sales"}).json()
+    assert {e["first_name"] for e in entries} == {"Alice", "Bob"}
+
+    # Managers are limited to their own department
+    login_as(role="manager", department="support")
+    entries = client.get("/api/sick-leave/calendar", params=params).json()
+    assert [e["first_name"] for e in entries] == ["Carol"]
+    assert client.get("/api/sick-leave/calendar", params={**params, "department": "sales"}).status_code == 403
+
+    # A manager without a department sees no one's leave
+    login_as(role="manager", department=None)
+    assert client.get("/api/sick-leave/calendar", params=params).status_code == 403
+
+def test_histogram_counts_people_per_day(client, login_as, db_session):
+    alice = seed_user(db_session, "alice", "sales")
+    bob = seed_user(db_session, "bob", "sales")
+    carol = seed_user(db_session, "carol", "support")
+    seed_leave(db_session, alice, "2024-03-30", "2024-04-02")
+    # Overlapping leaves of one person count once
+    seed_leave(db_session, bob, "2024-04-02", "2024-04-04")
+    seed_leave(db_session, bob, "2024-04-03", "2024-04-05")
+    seed_leave(db_session, carol, "2024-04-01", "2024-04-01")
+
+    login_as(role="manager", department="sales")
+    response = client.get("/api/sick-leave/histogram", params={"start": "2024-04-01", "end": "2024-04-06"})
+    assert response.status_code == 200
+    assert [(day["date"], day["absent"]) for day in response.json()] == [
+        ("2024-04-01", 1), ("2024-04-02", 2), ("2024-04-03", 1),
+        ("2024-04-04", 1), ("2024-04-05", 1), ("2024-04-06", 0),
+    ]
+
+    too_long = {"start": "2024-01-01", "end": "2025-06-30"}
+    assert client.get("/api/sick-leave/histogram", params=too_long).status_code == 400
+
+def test_histogram_matches_per_day_count():
+    first, last = date(2024, 1, 1), date(2024, 3, 31)
+    leaves = []
+    for user_id in range(40):
+        for n in range(3):
+            start = datetime(2023, 12, 20) + timedelta(days=(user_id * 7 + n * 31) % 110)
+            leaves.append((user_id, start, start + timedelta(days=(user_id + n) % 9)))
+    leaves.sort()
+
+    expected = []
+    for offset in range((last - first).days + 1):
+        day = first + timedelta(days=offset)
+        absent = {user_id for user_id, start, end in leaves if start.date() <= day <= end.date()}
+        expected.append((day, len(absent)))
+    assert absence_histogram(leaves, first, last) == expected
+
+def test_only_managers_change_status(client, login_as, db_session):
+    employee = seed_user(db_session, "erin", "sales")
+    login_as(user_id=employee)
+    leave = client.post(
+        "/api/sick-leave/",
+        json={"start_date": "2024-03-04T00:00:00", "end_date": "2024-03-06T00:00:00", "reason": "Flu"},
+    ).json()
+    url = f"/api/sick-leave/{leave['id']}"
+    assert client.put(url, json={"status": "approved"}).status_code == 403
+    assert client.put(url, json={"reason": "Migraine"}).json()["reason"] == "Migraine"
+
+    login_as(user_id=employee + 1, role="manager", department="sales")
+    assert client.put(url, json={"status": "approved"}).json()["status"] == "approved"
+
+def test_managers_only_handle_their_own_department(client, login_as, db_session):
+    employee = seed_user(db_session, "frank", "sales")
+    seed_leave(db_session, employee, "2024-03-04", "2024-03-06", status="pending")
+    leave_id = db_session.query(models.SickLeave).filter_by(user_id=employee).one().id
+    url = f"/api/sick-leave/{leave_id}"
+
+    login_as(user_id=employee + 1, role="manager", department="support")
+    assert client.get(url).status_code == 403
+    assert client.put(url, json={"status": "approved"}).status_code == 403
+    assert client.delete(url).status_code == 403
+
+    login_as(user_id=employee + 1, role="manager", department=None)
+    assert client.get(url).status_code == 403
+
+    login_as(user_id=employee + 1, role="manager", department="sales")
+    assert client.get(url).status_code == 200
+    login_as(user_id=employee + 2, role="admin")
+    assert client.delete(url).status_code == 204
+
+def test_managers_cannot_decide_their_own_leave(client, login_as, db_session):
+    manager = seed_user(db_session, "grace", "sales")
+    login_as(user_id=manager, role="manager", department="sales")
+    leave = client.post(
+        "/api/sick-leave/",
+        json={"start_date": "2024-03-04T00:00:00", "end_date": "2024-03-06T00:00:00", "reason": "Flu"},
+    ).json()
+    url = f"/api/sick-leave/{leave['id']}"
+    assert client.put(url, json={"status": "approved"}).status_code == 403
+    assert client.get(url).json()["status"] == "pending"
+
+    login_as(user_id=manager + 1, role="manager", department="sales")
+    assert client.put(url, json={"status": "approved"}).json()["status"] == "approved"
+
+def test_null_dates_and_status_are_left_unchanged(client, login_as, db_session):
+    employee = seed_user(db_session, "heidi", "sales")
+    login_as(user_id=employee)
+    leave = client.post(
+        "/api/sick-leave/",
+        json={"start_date": "2024-03-04T00:00:00", "end_date": "2024-03-06T00:00:00", "reason": "Flu"},
+    ).json()
+    url = f"/api/sick-leave/{leave['id']}"
+    updated = client.put(url, json={"start_date": None, "end_date": None, "reason": "Migraine"})
+    assert updated.status_code == 200
+    assert updated.json()["start_date"] == leave["start_date"] and updated.json()["end_date"] == leave["end_date"]
+
+    login_as(user_id=employee + 1, role="manager", department="sales")
+    updated = client.put(url, json={"status": None})
+    assert updated.status_code == 200
+    assert updated.json()["status"] == "pending"
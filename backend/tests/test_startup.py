@@ -0,0 +1,46 @@
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Cold start of one worker: a fresh interpreter importing the app and running
+# its startup. Generous by default for slow CI machines; tighten it where the
+# hardware is known. benchmarks/startup_report.py shows where the time goes.
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+
+# Optional dependencies that must only load when used
+LAZY_MODULES = ["azure", "httpx"]
+
+COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+lazy = [name for name in sys.argv[1:] if name in sys.modules]
+
+import asyncio
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+asyncio.run(start())
+print(json.dumps({"seconds": time.perf_counter() - started, "loaded": lazy}))
+"""
+
+CREATE_SCHEMA = "from app import models; from app.database import Base, engine; Base.metadata.create_all(bind=engine)"
+
+def test_cold_start_is_within_budget(tmp_path):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}"}
+    env.pop("ASYNC_DATABASE_URL", None)
+    subprocess.run([sys.executable, "-c", CREATE_SCHEMA], cwd=BACKEND_DIR, env=env, check=True)
+
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START, *LAZY_MODULES],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    cold_start = json.loads(result.stdout.strip().splitlines()[-1])
+    assert cold_start["loaded"] == []
+    assert cold_start["seconds"] < STARTUP_BUDGET_SECONDS, (
+        f"Cold start took {cold_start['seconds']:.2f} s, over the {STARTUP_BUDGET_SECONDS} s budget"
+    )
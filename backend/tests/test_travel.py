@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+
+from ..app import models
+
+def seed_travel(db_session, user_id, destination, departure, estimated_cost, costs, status="approved"):
+    travel_request = models.TravelRequest(
+        user_id=user_id, destination=destination, purpose="Conference",
+        departure_date=datetime.fromisoformat(departure), return_date=datetime.fromisoformat(departure),
+        estimated_cost=estimated_cost, status=status,
+    )
+    travel_request.bookings = [
+        models.TravelBooking(booking_type="flight", provider="Air", booking_reference=f"R{i}", details="", cost=cost)
+        for i, cost in enumerate(costs)
+    ]
+    db_session.add(travel_request)
+    db_session.commit()
+    return travel_request.id
+
+# Count the SELECT statements the app sends while the block runs
+@contextmanager
+def count_selects(async_engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+def test_list_loads_bookings_without_n_plus_one(client, login_as, db_session, async_engine):
+    for i in range(25):
+        seed_travel(db_session, 1, "Berlin", "2024-05-06", 1000.0, [100.0 * i, 50.0, 25.0])
+
+    login_as(role="admin")
+    with count_selects(async_engine) as statements:
+        response = client.get("/api/travel/", params={"limit": 20})
+    assert response.status_code == 200
+    travel_requests = response.json()
+    assert len(travel_requests) == 20
+    assert all(len(t["bookings"]) == 3 for t in travel_requests)
+    # One query for the page and one for all of its bookings, however long the page
+    assert len(statements) == 2
+
+    with count_selects(async_engine) as statements:
+        client.get("/api/travel/me")
+    assert len(statements) == 2
+
+def test_detail_returns_actual_cost(client, login_as, db_session, async_engine):
+    travel_id = seed_travel(db_session, 1, "Paris", "2024-05-06", 800.0, [450.0, 320.5])
+    empty_id = seed_travel(db_session, 1, "Paris", "2024-05-07", 300.0, [])
+
+    login_as(user_id=1)
+    with count_selects(async_engine) as statements:
+        detail = client.get(f"/api/travel/{travel_id}").json()
+    assert len(statements) == 2
+    assert detail["estimated_cost"] == 800.0
+    assert detail["actual_cost"] == 770.5
+    assert {b["cost"] for b in detail["bookings"]} == {450.0, 320.5}
+    assert client.get(f"/api/travel/{empty_id}").json()["actual_cost"] == 0.0
+
+    login_as(user_id=2)
+    assert client.get(f"/api/travel/{travel_id}").status_code == 403
+
+def test_create_update_and_book(client, login_as):
+    login_as(user_id=1)
+    created = client.post("/api/travel/", json={
+        "destination": "Oslo", "purpose": "Workshop", "departure_date": "2024-06-03T08:00:00",
+        "return_date": "2024-06-05T18:00:00", "estimated_cost": 900.0,
+    })
+    assert created.status_code == 201
+    travel_id = created.json()["id"]
+    assert created.json()["bookings"] == [] and created.json()["actual_cost"] == 0.0
+
+    booking = client.post("/api/travel/bookings", json={
+        "travel_request_id": travel_id, "booking_type": "hotel", "provider": "Inn",
+        "booking_reference": "H1", "details": "2 nights", "cost": 310.0,
+    })
+    assert booking.status_code == 201
+    client.put(f"/api/travel/bookings/{booking.json()['id']}", json={"cost": 290.0})
+
+    updated = client.put(f"/api/travel/{travel_id}", json={"purpose": "Offsite"})
+    assert updated.status_code == 200
+    assert updated.json()["purpose"] == "Offsite"
+    assert updated.json()["actual_cost"] == 290.0
+    assert client.put(f"/api/travel/{travel_id}", json={"status": "approved"}).status_code == 403
+
+    login_as(user_id=2, role="admin")
+    updated = client.put(f"/api/travel/{travel_id}", json={"status": None, "purpose": "Summit"})
+    assert updated.status_code == 200
+    assert updated.json()["status"] == "pending" and updated.json()["purpose"] == "Summit"
+
+    assert client.delete(f"/api/travel/{travel_id}").status_code == 204
+    assert client.get(f"/api/travel/{travel_id}").status_code == 404
+
+def test_budget_by_destination_and_month(client, login_as, db_session):
+    seed_travel(db_session, 1, "Berlin", "2024-05-06", 1000.0, [600.0, 300.0])
+    seed_travel(db_session, 2, "Berlin", "2024-05-20", 500.0, [650.0])
+    seed_travel(db_session, 1, "Berlin", "2024-06-02", 400.0, [])
+    seed_travel(db_session, 3, "Paris", "2024-05-10", 700.0, [200.0, 200.0, 200.0])
+    seed_travel(db_session, 3, "Paris", "2024-05-11", 999.0, [999.0], status="rejected")
+
+    login_as(role="admin")
+    response = client.get("/api/travel/budget")
+    assert response.status_code == 200
+    rows = [(r["destination"], r["month"], r["request_count"], r["estimated_cost"], r["actual_cost"], r["variance"])
+            for r in response.json()]
+    assert rows == [
+        ("Berlin", "2024-05", 2, 1500.0, 1550.0, 50.0),
+        ("Paris", "2024-05", 1, 700.0, 600.0, -100.0),
+        ("Berlin", "2024-06", 1, 400.0, 0.0, -400.0),
+    ]
+
+    response = client.get("/api/travel/budget", params={"departure_from": "2024-06-01T00:00:00"})
+    assert [r["month"] for r in response.json()] == ["2024-06"]
@@ -0,0 +1,27 @@
+NEW_USER = {
+    "email": "jane@example.com",
+    "username": "jane",
+    "first_name": "Jane",
+    "last_name": "Doe",
+    "password": "correct horse battery staple",
+}
+
+def test_create_user_rejects_duplicates(client):
+    response = client.post("/api/users/", json=NEW_USER)
+    assert response.status_code == 201
+    assert response.json()["username"] == "jane"
+    assert "password" not in response.json()
+
+    assert client.post("/api/users/", json=NEW_USER).status_code == 400
+    assert client.post("/api/users/", json={**NEW_USER, "username": "jane2"}).status_code == 400
+
+def test_admin_updates_and_deletes_user(client, login_as):
+    user = client.post("/api/users/", json=NEW_USER).json()
+    login_as(role="admin")
+
+    response = client.put(f"/api/users/{user['id']}", json={"first_name": "Janet"})
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Janet"
+
+    assert client.delete(f"/api/users/{user['id']}").status_code == 204
+    assert client.get(f"/api/users/{user['id']}").status_code == 404
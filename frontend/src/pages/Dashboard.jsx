@@ -13,21 +13,38 @@ import {
   ListItemText,
   Divider,
 } from '@mui/material'
+import axios from 'axios'
 import { useAuth } from '../hooks/useAuth'
 
+const formatAmount = (amount) =>
+  amount.toLocaleString('en-US', { style: 'currency', currency: 'USD' })
+
 export default function Dashboard() {
   const { user } = useAuth()
   const [loading, setLoading] = useState(true)
+  const [expenseSummary, setExpenseSummary] = useState({})
 
   useEffect(() => {
-    // This would typically fetch data from the API
-    const timer = setTimeout(() => {
-      setLoading(false)
-    }, 1000)
-    
-    return () => clearTimeout(timer)
+    const fetchSummary = async () => {
+      try {
+        const response = await axios.get('/api/expenses/summary')
+        const byStatus = {}
+        response.data.forEach((row) => {
+          byStatus[row.status] = row
+        })
+        setExpenseSummary(byStatus)
+      } catch (error) {
+        console.error('Failed to load expense summary:', error)
+      } finally {
+        setLoading(false)
+      }
+    }
+
+    fetchSummary()
   }, [])
 
+  const summaryFor = (status) => expenseSummary[status] || { count: 0, total_amount: 0 }
+
   if (loading) {
     return (
       <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', height: '50vh' }}>
@@ -52,19 +69,20 @@ export default function Dashboard() {
             <CardHeader title="Expense Summary" />
             <CardContent>
               <Typography variant="body2" color="text.secondary">
-                You have 3 pending expenses totaling $1,250.00
+                You have {summaryFor('pending').count} pending expenses totaling{' '}
+                {formatAmount(summaryFor('pending').total_amount)}
               </Typography>
               <List dense>
                 <ListItem>
-                  <ListItemText primary="Approved" secondary="$2,500.00" />
+                  <ListItemText primary="Approved" secondary={formatAmount(summaryFor('approved').total_amount)} />
                 </ListItem>
                 <Divider />
                 <ListItem>
-                  <ListItemText primary="Pending" secondary="$1,250.00" />
+                  <ListItemText primary="Pending" secondary={formatAmount(summaryFor('pending').total_amount)} />
                 </ListItem>
                 <Divider />
                 <ListItem>
-                  <ListItemText primary="Rejected" secondary="$500.00" />
+                  <ListItemText primary="Rejected" secondary={formatAmount(summaryFor('rejected').total_amount)} />
                 </ListItem>
               </List>
             </CardContent>